@@ -1,3 +1,28 @@
+import logging
+
 from .client import BaleClient
+from .manager import BaleClientPool, BotManager
+from .sharding import HashRing, ShardedRunner
+from .objects import CallbackQuery, Chat, File, Message, Update, User
+from .dispatcher import Dispatcher
+from .webhook import WebhookServer
+from .uploads import FileId, InputFile, InputMedia, InputMediaAudio, InputMediaDocument, InputMediaPhoto, InputMediaVideo, UploadBudget
+from .file_cache import FileIdCache, MemoryFileIdCache, SQLiteFileIdCache
+from .exceptions import BaleAPIError, CircuitOpenError, RetryAfter
+from .retry import CircuitBreaker, CircuitBreakers, RetryPolicy
+from .broadcast import Broadcast, BroadcastEvent
+from .scheduler import CronSpec, JobStore, Scheduler, SQLiteJobStore
+from .ratelimit import RateLimiter
+from .converter import MediaConverter
+from .images import ImageProcessor
+from .chat_cache import ChatCache
+from .offsets import FileOffsetStore, OffsetStore, SQLiteOffsetStore
+from .codec import JSONCodec, PreparedMarkup, get_codec, prepare_markup
+from .connection import ConnectionConfig
+from .metrics import Instrumentation, Metrics, OpenTelemetryInstrumentation
+from .log import JSONFormatter, LogPipeline, RateLimitFilter, setup_logging
+
+# کتابخانه هیچ هندلری نصب نمی‌کند؛ تصمیم با برنامه است (یا setup_logging)
+logging.getLogger(__name__).addHandler(logging.NullHandler())
 
 __version__ = "0.2.2"
\ No newline at end of file
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, AsyncIterable, AsyncIterator, Dict, Iterable, Optional, Set, Union
+
+import aiohttp
+
+from .exceptions import BaleAPIError, CircuitOpenError, RetryAfter
+from .ratelimit import TokenBucket
+from .retry import _GATEWAY_ERRORS, RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+SENT = "sent"
+BLOCKED = "blocked"
+NOT_FOUND = "not_found"
+FAILED = "failed"
+TRANSIENT = "transient"
+# ممکن است پیام رسیده باشد (timeout یا 5xx بعد از ارسال)؛ دوباره فرستاده نمی‌شود
+UNKNOWN = "unknown"
+
+ChatIds = Union[Iterable[int], AsyncIterable[int]]
+
+
+@dataclass
+class BroadcastEvent:
+    """نتیجه ارسال به یک چت همراه با پیشرفت کلی"""
+
+    chat_id: int
+    status: str
+    error: Optional[str] = None
+    result: Any = None
+    progress: Dict[str, int] = field(default_factory=dict)
+
+
+def classify_error(error: BaseException) -> str:
+    """دسته‌بندی خطای ارسال به blocked، not_found، transient، unknown یا failed
+
+    transient فقط خطاهایی است که مطمئنیم پیام نرسیده (flood، مدار باز، خطای اتصال یا gateway).
+    """
+    if isinstance(error, (RetryAfter, CircuitOpenError)):
+        return TRANSIENT
+    if isinstance(error, BaleAPIError):
+        description = (error.description or "").lower()
+        if error.error_code == 403:
+            return BLOCKED
+        if error.error_code == 400 and "not found" in description:
+            return NOT_FOUND
+        if error.error_code in _GATEWAY_ERRORS:
+            return TRANSIENT
+        if (error.error_code or 0) >= 500:
+            return UNKNOWN
+        return FAILED
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return TRANSIENT
+    if isinstance(error, (aiohttp.ClientError, OSError, asyncio.TimeoutError)):
+        return UNKNOWN
+    return FAILED
+
+
+class BroadcastCheckpoint:
+    """فایل پیشرفت (append-only) تا ارسال قطع‌شده از همان‌جا ادامه پیدا کند"""
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self._buffer = []
+        self._file = None
+
+    def load(self) -> Set[int]:
+        """شناسه چت‌هایی که قبلاً نتیجه قطعی داشته‌اند"""
+        done: Set[int] = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                chat_id, _, _ = line.partition("\t")
+                if chat_id.strip():
+                    try:
+                        done.add(int(chat_id))
+                    except ValueError:
+                        continue  # خط ناقص در اثر قطع ناگهانی
+        return done
+
+    def record(self, chat_id: int, status: str):
+        self._buffer.append(f"{chat_id}\t{status}\n")
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(self._buffer))
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Broadcast:
+    """ارسال یک پیام به تعداد زیادی چت؛ با async for رویدادهای پیشرفت را می‌دهد"""
+
+    def __init__(
+        self,
+        client,
+        chat_ids: ChatIds,
+        method: str = "send_message",
+        params: Optional[Dict[str, Any]] = None,
+        concurrency: int = 20,
+        rate: Optional[float] = None,
+        checkpoint: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        self.client = client
+        self.chat_ids = chat_ids
+        self.method = method
+        self.params = params or {}
+        self.concurrency = concurrency
+        self.rate = rate
+        self.checkpoint = BroadcastCheckpoint(checkpoint) if checkpoint else None
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=30.0)
+        self.stats: Dict[str, int] = {SENT: 0, BLOCKED: 0, NOT_FOUND: 0, FAILED: 0, TRANSIENT: 0, UNKNOWN: 0, "skipped": 0}
+        self._bucket = TokenBucket(rate, max(1.0, rate)) if rate else None
+        self._bucket_lock: Optional[asyncio.Lock] = None
+        self._events: Optional[AsyncGenerator[BroadcastEvent, None]] = None
+
+    def __aiter__(self) -> AsyncIterator[BroadcastEvent]:
+        self._events = self._run()
+        return self._events
+
+    async def aclose(self):
+        """توقف ارسال بعد از خروج زودهنگام از async for؛ کارگرها لغو و checkpoint نوشته می‌شود"""
+        if self._events is not None:
+            await self._events.aclose()
+
+    async def run(self) -> Dict[str, int]:
+        """اجرای کامل بدون گرفتن رویدادها و برگرداندن آمار نهایی"""
+        async for _ in self:
+            pass
+        return dict(self.stats)
+
+    async def _iter_ids(self) -> AsyncIterator[int]:
+        if hasattr(self.chat_ids, "__aiter__"):
+            async for chat_id in self.chat_ids:
+                yield chat_id
+        else:
+            for chat_id in self.chat_ids:
+                yield chat_id
+
+    async def _throttle(self):
+        if self._bucket is None:
+            return
+        if self._bucket_lock is None:
+            self._bucket_lock = asyncio.Lock()
+        async with self._bucket_lock:
+            while True:
+                delay = self._bucket.delay()
+                if delay <= 0:
+                    self._bucket.consume()
+                    return
+                await asyncio.sleep(delay)
+
+    async def _deliver(self, chat_id: int) -> BroadcastEvent:
+        send = getattr(self.client, self.method)
+        attempt = 0
+        while True:
+            await self._throttle()
+            try:
+                result = await send(chat_id, **self.params)
+                return BroadcastEvent(chat_id, SENT, result=result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._should_retry(e, attempt):
+                    delay = getattr(e, "retry_after", None) or getattr(e, "retry_in", None) or self.retry_policy.delay(attempt)
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                return BroadcastEvent(chat_id, classify_error(e), error=str(e))
+
+    def _should_retry(self, error: BaseException, attempt: int) -> bool:
+        """فقط وقتی دوباره می‌فرستیم که پیام قطعاً نرسیده است؛ ارسال idempotent نیست"""
+        if isinstance(error, (RetryAfter, CircuitOpenError)):
+            return attempt + 1 < self.retry_policy.max_attempts
+        return self.retry_policy.should_retry(error, attempt, idempotent=False)
+
+    async def _run(self) -> AsyncIterator[BroadcastEvent]:
+        done = self.checkpoint.load() if self.checkpoint else set()
+        jobs: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        events: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        producer_error = []
+
+        async def produce():
+            try:
+                async for chat_id in self._iter_ids():
+                    if chat_id in done:
+                        self.stats["skipped"] += 1
+                        continue
+                    await jobs.put(chat_id)
+            except Exception as e:
+                producer_error.append(e)
+            for _ in range(self.concurrency):
+                await jobs.put(None)
+
+        async def work():
+            while True:
+                chat_id = await jobs.get()
+                if chat_id is None:
+                    return
+                await events.put(await self._deliver(chat_id))
+
+        async def finish():
+            await asyncio.gather(*workers)
+            await events.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        workers = [asyncio.ensure_future(work()) for _ in range(self.concurrency)]
+        finisher = asyncio.ensure_future(finish())
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                self.stats[event.status] += 1
+                # چت‌های با خطای موقت ثبت نمی‌شوند تا در اجرای بعدی دوباره امتحان شوند
+                if self.checkpoint and event.status != TRANSIENT:
+                    self.checkpoint.record(event.chat_id, event.status)
+                event.progress = dict(self.stats)
+                yield event
+            if producer_error:
+                raise producer_error[0]
+        finally:
+            for task in [producer, finisher, *workers]:
+                task.cancel()
+            await asyncio.gather(producer, finisher, *workers, return_exceptions=True)
+            if self.checkpoint:
+                self.checkpoint.close()
+            logger.info("ارسال گروهی تمام شد: %s", self.stats)
@@ -0,0 +1,170 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from .exceptions import BaleAPIError
+from .utils import helpers
+from .utils.helpers import TTLCache
+
+# وضعیت‌هایی که یعنی کاربر عضو چت نیست
+NOT_MEMBER_STATUSES = ("left", "kicked")
+ADMIN_STATUSES = ("creator", "administrator")
+
+
+def is_not_member_error(error: BaseException) -> bool:
+    """خطای 400 که یعنی کاربر در چت نیست یا پیدا نشد"""
+    if not isinstance(error, BaleAPIError) or error.error_code != 400:
+        return False
+    description = (error.description or "").lower()
+    return "not found" in description or "not a member" in description or "participant" in description
+
+
+class _CachedError:
+    """خطای «عضو نیست» کش‌شده؛ هر بار نمونه تازه raise می‌شود تا traceback روی نمونه مشترک جمع نشود"""
+
+    __slots__ = ("error_type", "description", "error_code", "parameters")
+
+    def __init__(self, error: BaleAPIError):
+        self.error_type = type(error)
+        self.description = error.description
+        self.error_code = error.error_code
+        self.parameters = error.parameters
+
+    def fresh(self) -> BaleAPIError:
+        return self.error_type(self.description, self.error_code, self.parameters)
+
+
+class ChatCache:
+    """کش LRU با انقضای زمانی برای getChat، getChatMember و getChatAdministrators
+
+    درخواست‌های هم‌زمان برای یک کلید یک درخواست مشترک دارند (single-flight). پاسخ «عضو نیست»
+    (وضعیت left/kicked یا خطای 400 مربوط) با negative_ttl جداگانه کش می‌شود. max_entries سقف
+    تعداد ورودی‌ها و در نتیجه سقف حافظه است. observe(update) کش را با آپدیت‌های عضویت
+    (chat_member، my_chat_member، new_chat_members، left_chat_member و تغییر عنوان/عکس) به‌روز می‌کند.
+    """
+
+    def __init__(self, ttl: float = 60.0, negative_ttl: float = 30.0, admins_ttl: Optional[float] = None, max_entries: int = 10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.admins_ttl = ttl if admins_ttl is None else admins_ttl
+        self._entries = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    async def member(self, chat_id: int, user_id: int, loader: Callable[[], Awaitable[dict]]) -> dict:
+        return await self._get(("member", chat_id, user_id), loader, self._member_ttl)
+
+    async def chat(self, chat_id: int, loader: Callable[[], Awaitable[dict]]) -> dict:
+        return await self._get(("chat", chat_id), loader, lambda result: self.ttl)
+
+    async def administrators(self, chat_id: int, loader: Callable[[], Awaitable[list]]) -> list:
+        return await self._get(("admins", chat_id), loader, lambda result: self.admins_ttl)
+
+    def _member_ttl(self, result: Any) -> float:
+        if isinstance(result, dict) and result.get("status") in NOT_MEMBER_STATUSES:
+            return self.negative_ttl
+        return self.ttl
+
+    async def _get(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl_for: Callable[[Any], float]) -> Any:
+        cached = self._entries.get(key, _MISSING)
+        if cached is not _MISSING:
+            self.hits += 1
+            if isinstance(cached, _CachedError):
+                raise cached.fresh()
+            return cached
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            inflight = helpers.shared_task(self._inflight, key, lambda: self._load(key, loader, ttl_for))
+        # لغو یک فراخواننده (مثلاً با wait_for) درخواست مشترک را برای بقیه لغو نمی‌کند
+        return await asyncio.shield(inflight)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl_for: Callable[[Any], float]) -> Any:
+        task = asyncio.current_task()
+        try:
+            result = await loader()
+        except Exception as e:
+            if is_not_member_error(e) and self._inflight.get(key) is task:
+                self._entries.set(key, _CachedError(e), self.negative_ttl)
+            raise
+        # اگر در حین درخواست invalidate شده باشد، نتیجه احتمالاً قدیمی است و کش نمی‌شود
+        if self._inflight.get(key) is task:
+            self._entries.set(key, result, ttl_for(result))
+        return result
+
+    # ---- invalidation ----
+
+    def _drop(self, key: Hashable):
+        removed = self._entries.pop(key, _MISSING) is not _MISSING
+        if self._inflight.pop(key, None) is not None or removed:
+            self.invalidations += 1
+
+    def invalidate_member(self, chat_id: int, user_id: int):
+        self._drop(("member", chat_id, user_id))
+
+    def invalidate_chat(self, chat_id: int, members: bool = False):
+        """حذف اطلاعات چت و فهرست مدیران؛ با members=True عضویت‌های کش‌شده این چت هم حذف می‌شوند"""
+        self._drop(("chat", chat_id))
+        self._drop(("admins", chat_id))
+        if members:
+            for key in [key for key in self._entries.keys() if key[0] == "member" and key[1] == chat_id]:
+                self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+
+    def observe(self, update: dict):
+        """به‌روزرسانی کش از روی یک آپدیت خام (برای همه آپدیت‌ها ارزان است)"""
+        for kind in ("chat_member", "my_chat_member"):
+            changed = update.get(kind)
+            if changed:
+                self._member_changed(changed)
+        message = update.get("message")
+        if not message:
+            return
+        if "new_chat_members" in message or "left_chat_member" in message:
+            chat_id = (message.get("chat") or {}).get("id")
+            for user in message.get("new_chat_members") or ():
+                self.invalidate_member(chat_id, user.get("id"))
+            left = message.get("left_chat_member")
+            if left:
+                self.invalidate_member(chat_id, left.get("id"))
+                self._drop(("admins", chat_id))
+        elif "new_chat_title" in message or "new_chat_photo" in message or "delete_chat_photo" in message:
+            self._drop(("chat", (message.get("chat") or {}).get("id")))
+
+    def _member_changed(self, changed: dict):
+        chat_id = (changed.get("chat") or {}).get("id")
+        new = changed.get("new_chat_member") or {}
+        old = changed.get("old_chat_member") or {}
+        user_id = (new.get("user") or old.get("user") or {}).get("id")
+        if chat_id is None or user_id is None:
+            return
+        key = ("member", chat_id, user_id)
+        self._drop(key)
+        if new:
+            # آپدیت خودش وضعیت تازه را دارد؛ درخواست بعدی لازم نیست به شبکه برود
+            self._entries.set(key, new, self._member_ttl(new))
+        if new.get("status") in ADMIN_STATUSES or old.get("status") in ADMIN_STATUSES:
+            self._drop(("admins", chat_id))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "inflight": len(self._inflight),
+        }
+
+
+_MISSING = object()
@@ -2,543 +2,1119 @@ import aiohttp
 import asyncio
 import logging
 import time
-import json
 import os
-import subprocess
-from typing import Optional, Callable, Any, List
+import tempfile
+from typing import Optional, Callable, Any, AsyncIterator, Awaitable, Iterable, List, Union
 from .objects.chat import Chat
+from .objects.media import File
 from .objects.message import Message
+from .objects.update import Update
+from .router import Router
+from .metrics import Instrumentation, Metrics, MultiInstrumentation
 from .utils import helpers
-from PIL import Image  # اضافه کردن Pillow
+from .dispatcher import Dispatcher
+from .webhook import WebhookServer
+from .uploads import FileInput, InputFile, InputMedia, InputMediaPhoto, UploadBudget
+from .file_cache import FileIdCache, extract_file_id, is_stale_file_id_error
+from .converter import MediaConverter
+from .exceptions import BaleAPIError, RetryAfter
+from .ratelimit import RateLimiter
+from .retry import CircuitBreakers, RetryPolicy
+from .broadcast import Broadcast, ChatIds
+from .scheduler import JobStore, Scheduler
+from .codec import JSONCodec, PreparedMarkup, get_codec
+from .connection import ConnectionConfig, poll_lane, send_lane
+from .images import ImageProcessor
+from .chat_cache import ChatCache
+from .offsets import MAX_UPDATES_LIMIT, OffsetStore
 
-# تنظیم لاگ داخلی
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# کتابخانه لاگ را پیکربندی نمی‌کند؛ برای خروجی از baleh.setup_logging یا پیکربندی برنامه استفاده کنید
 logger = logging.getLogger(__name__)
 
+# متدهایی که تکرارشان پیام تکراری می‌سازد و فقط در خطاهای امن دوباره فرستاده می‌شوند
+NON_IDEMPOTENT_PREFIXES = ("send", "forward", "copy")
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _fields(endpoint: str, chat_id: Optional[int] = None, error: Optional[BaseException] = None, **extra) -> dict:
+    """فیلدهای ساخت‌یافته لاگ (بدون بدنه درخواست)"""
+    extra["endpoint"] = endpoint
+    extra["chat_id"] = chat_id
+    extra["error_code"] = getattr(error, "error_code", None)
+    return extra
+
+DEFAULT_API_URL = "https://tapi.bale.ai"
+
+# مقدار پیش‌فرض پارامترهایی که None در آن‌ها یعنی «غیرفعال»
+_DEFAULT: Any = object()
+
 class BaleClient:
-    def __init__(self, token: str, proxy: Optional[str] = None, timeout: int = 30):
-        """ایجاد کلاینت با توکن، پروکسی، و زمان‌بندی"""
+    def __init__(self, token: str, proxy: Optional[str] = None, timeout: int = 30, workers: int = 8, max_pending: int = 1000, poll_timeout: Optional[int] = None, upload_memory_limit: int = 64 * 1024 * 1024, upload_chunk_size: int = 64 * 1024, file_cache: Optional[FileIdCache] = None, converter: Optional[MediaConverter] = None, rate_limiter: Optional[RateLimiter] = _DEFAULT, retry_policy: Optional[RetryPolicy] = None, circuit_breakers: Optional[CircuitBreakers] = None, job_store: Optional[JobStore] = None, codec: Optional[JSONCodec] = None, send_connection: Optional[ConnectionConfig] = None, poll_connection: Optional[ConnectionConfig] = None, connector: Optional[aiohttp.BaseConnector] = None, poll_connector: Optional[aiohttp.BaseConnector] = None, instrumentation: Optional[Union[Instrumentation, List[Instrumentation]]] = None, api_url: str = DEFAULT_API_URL, image_processor: Optional[ImageProcessor] = None, chat_cache: Optional[ChatCache] = _DEFAULT, offset_store: Optional[OffsetStore] = None):
+        """ایجاد کلاینت با توکن، پروکسی، و زمان‌بندی
+
+        workers تعداد هندلرهای هم‌زمان و max_pending سقف آپدیت‌های در صف است.
+        poll_timeout مدت long poll است و اگر داده نشود برابر timeout خواهد بود.
+        upload_memory_limit سقف حافظه همه آپلودهای هم‌زمان و upload_chunk_size اندازه هر تکه خواندن از دیسک است.
+        file_cache (مثلاً MemoryFileIdCache) از آپلود دوباره فایل‌های تکراری جلوگیری می‌کند.
+        converter تبدیل TGS به WebM را انجام می‌دهد (پیش‌فرض: MediaConverter با کش در پوشه temp).
+        rate_limiter نرخ همه درخواست‌ها را کنترل می‌کند (پیش‌فرض: RateLimiter با محدودیت‌های پیش‌فرض بله)؛
+        None آن را غیرفعال می‌کند.
+        retry_policy و circuit_breakers رفتار تلاش دوباره و قطع مدار هر endpoint را تعیین می‌کنند.
+        job_store (مثلاً SQLiteJobStore) کارهای زمان‌بندی‌شده را ماندگار می‌کند.
+        codec کدک JSON درخواست‌ها و پاسخ‌هاست (پیش‌فرض: orjson در صورت نصب، وگرنه json استاندارد).
+        send_connection و poll_connection استخر اتصال و timeoutهای مسیر ارسال و مسیر getUpdates هستند؛
+        long poll روی استخر جدای خودش اجرا می‌شود تا با ارسال‌ها رقابت نکند.
+        connector و poll_connector اتصال‌دهنده‌های مشترک (مثلاً از BotManager) هستند؛ در این صورت
+        کلاینت آن‌ها را نمی‌بندد و فقط timeoutهای send_connection/poll_connection استفاده می‌شود.
+        instrumentation (مثلاً Metrics یا OpenTelemetryInstrumentation یا فهرستی از آن‌ها) هوک‌های
+        متریک را دریافت می‌کند؛ بدون آن هیچ هزینه‌ای برای اندازه‌گیری پرداخت نمی‌شود.
+        api_url نشانی سرور API است (مثلاً MockBaleServer.url برای تست و بنچمارک).
+        image_processor (ImageProcessor) عکس‌ها و استیکرها را قبل از آپلود در استخر جدا کوچک،
+        فشرده و بدون متادیتا می‌کند؛ بدون آن فایل‌ها همان‌طور که هستند فرستاده می‌شوند.
+        chat_cache کش get_chat، get_chat_member و get_chat_administrators است (پیش‌فرض: ChatCache
+        با ۶۰ ثانیه اعتبار)؛ None آن را غیرفعال می‌کند.
+        offset_store (FileOffsetStore یا SQLiteOffsetStore) offset پولینگ و آپدیت‌های در حال پردازش را
+        ماندگار می‌کند تا ری‌استارت نه آپدیتی را گم کند و نه آپدیت‌های پردازش‌شده را دوباره اجرا کند.
+        """
         self.token = token
-        self.base_url = f"https://tapi.bale.ai/bot{token}"
+        self.api_url = api_url.rstrip("/")
+        self.base_url = f"{self.api_url}/bot{token}"
+        self.file_url = f"{self.api_url}/file/bot{token}"
         self.proxy = proxy
         self.timeout = timeout
+        self.poll_timeout = timeout if poll_timeout is None else poll_timeout
+        self.poll_read_margin = 10  # ثانیه اضافه روی long poll برای تأخیر شبکه
+        self.max_poll_backoff = 30
+        self._pending_fetch: Optional[asyncio.Task] = None
+        self._recent_updates = helpers.RecentIds()
+        self.upload_chunk_size = upload_chunk_size
+        self.upload_budget = UploadBudget(upload_memory_limit)
+        self.file_cache = file_cache
+        self.converter = converter or MediaConverter()
+        self.image_processor = image_processor
+        # یک حافظه هش برای همه اجزا تا هر فایل فقط یک بار خوانده و هش شود
+        self.hasher = self.converter.hasher
+        for component in (file_cache, image_processor):
+            if component is not None:
+                component.hasher = self.hasher
+        self.download_chunk_size = upload_chunk_size
+        # file_id -> file_path تا هر دانلود یک getFile اضافه نداشته باشد
+        self.file_paths = helpers.TTLCache(maxsize=1024, ttl=3000)
+        # ChatCache خالی falsy است؛ فقط مقدار پیش‌فرض جایگزین می‌شود
+        self.chat_cache: Optional[ChatCache] = ChatCache() if chat_cache is _DEFAULT else chat_cache
+        self.rate_limiter: Optional[RateLimiter] = RateLimiter() if rate_limiter is _DEFAULT else rate_limiter
+        self.max_flood_retries = 3
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breakers = circuit_breakers or CircuitBreakers()
+        self.codec = codec or get_codec()
+        self.send_connection = send_connection or send_lane(timeout)
+        self.poll_connection = poll_connection or poll_lane()
         self.session: Optional[aiohttp.ClientSession] = None
-        self.handlers: List[Callable] = []
+        self.poll_session: Optional[aiohttp.ClientSession] = None
+        self._connector = connector
+        self._poll_connector = poll_connector
+        self.router = Router()
+        self.instrumentation: Optional[Instrumentation] = None
+        self.metrics: Optional[Metrics] = None
+        if instrumentation is not None:
+            self.instrument(instrumentation)
         self.is_running = False
         self.last_update_id = 0
-        self.scheduled_tasks: List[dict] = []  # برای زمان‌بندی پیام‌ها
+        self.offset_store = offset_store or OffsetStore()
+        self._offsets_restored = False
+        self._commit_task: Optional[asyncio.Task] = None
+        self.scheduler = Scheduler(self, store=job_store)  # برای زمان‌بندی پیام‌ها
+        self.dispatcher = Dispatcher(self._process_update, workers=workers, max_pending=max_pending)
 
     async def connect(self):
         """اتصال به API بله با تنظیمات پروکسی و لاگ"""
         if not self.session:
             try:
-                connector = aiohttp.TCPConnector(verify_ssl=True)
-                self.session = aiohttp.ClientSession(
-                    connector=connector,
-                    timeout=aiohttp.ClientTimeout(total=self.timeout),
-                    proxy=self.proxy
-                )
+                self.session = self._build_session(self.send_connection, self._connector)
                 logger.info("اتصال به API بله با موفقیت برقرار شد.")
             except Exception as e:
-                logger.error(f"خطا در اتصال به API: {str(e)}")
+                logger.error("خطا در اتصال به API: %s", e)
                 raise
+        self.scheduler.start()
         return self
 
+    def _build_session(self, config: ConnectionConfig, connector: Optional[aiohttp.BaseConnector] = None) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            connector=connector or config.connector(),
+            connector_owner=connector is None,
+            timeout=config.timeout(),
+            proxy=self.proxy
+        )
+
     async def disconnect(self):
         """قطع اتصال با مدیریت صحیح منابع"""
+        self.is_running = False
+        await self.scheduler.stop()
+        await self.dispatcher.stop()
+        await self._stop_commits()
+        if self.file_cache is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.file_cache.flush)
+        if self.poll_session:
+            await self.poll_session.close()
+            self.poll_session = None
         if self.session:
             await self.session.close()
             self.session = None
             self.is_running = False
             logger.info("اتصال به API بله قطع شد.")
-        for task in self.scheduled_tasks:
-            task["task"].cancel()
 
-    async def send_message(self, chat_id: int, text: str, parse_mode: Optional[str] = None, reply_markup: Optional[dict] = None) -> Message:
-        """ارسال پیام متنی با پارامترهای پیشرفته"""
-        if not self.session:
-            await self.connect()
+    async def send_message(self, chat_id: int, text: str, parse_mode: Optional[str] = None, reply_markup: Optional[Union[dict, PreparedMarkup]] = None, reply_to_message_id: Optional[int] = None) -> Message:
+        """ارسال پیام متنی با پارامترهای پیشرفته
+
+        برای کیبوردهای پرتکرار، reply_markup را یک بار با prepare_markup آماده کنید.
+        """
         data = {"chat_id": chat_id, "text": helpers.format_message(text)}
         if parse_mode:
             data["parse_mode"] = parse_mode
         if reply_markup:
-            data["reply_markup"] = json.dumps(reply_markup)
+            data["reply_markup"] = self.codec.prepare_markup(reply_markup)
+        if reply_to_message_id:
+            data["reply_to_message_id"] = reply_to_message_id
         try:
-            async with self.session.post(
-                f"{self.base_url}/sendMessage",
-                json=data
-            ) as resp:
-                data = await helpers.handle_response(resp)
-                if data and data.get("ok"):
-                    result = data["result"]
-                    chat = Chat(id=result.get("chat", {}).get("id"), type="unknown")
-                    message = Message(
-                        message_id=result.get("message_id"),
-                        chat=chat,
-                        date=result.get("date", 0),
-                        text=result.get("text"),
-                        from_user=result.get("from", {})
-                    )
-                    logger.info(f"پیام به {chat_id} ارسال شد: {text}")
-                    return message
-                raise Exception(f"Error sending message: {data.get('description', 'Unknown error')}")
+            message = self._to_message(await self._call("sendMessage", chat_id, json=data))
+            logger.debug("پیام به %s ارسال شد", chat_id)
+            return message
         except Exception as e:
-            logger.error(f"خطا در ارسال پیام: {str(e)}")
+            logger.error("خطا در ارسال پیام به %s: %s", chat_id, e, extra=_fields("sendMessage", chat_id, e))
             raise
 
-    async def send_photo(self, chat_id: int, photo: str, caption: Optional[str] = None) -> Message:
+    async def send_photo(self, chat_id: int, photo: FileInput, caption: Optional[str] = None, reply_to_message_id: Optional[int] = None) -> Message:
         """ارسال عکس با کپشن"""
-        if not self.session:
-            await self.connect()
-        form = aiohttp.FormData()
-        form.add_field("chat_id", str(chat_id))
-        with open(photo, "rb") as f:
-            file_content = f.read()
-        form.add_field("photo", file_content, filename=photo.split("/")[-1])
-        if caption:
-            form.add_field("caption", caption)
         try:
-            async with self.session.post(
-                f"{self.base_url}/sendPhoto",
-                data=form
-            ) as resp:
-                data = await helpers.handle_response(resp)
-                if data and data.get("ok"):
-                    result = data["result"]
-                    chat = Chat(id=result.get("chat", {}).get("id"), type="unknown")
-                    message = Message(
-                        message_id=result.get("message_id"),
-                        chat=chat,
-                        date=result.get("date", 0),
-                        caption=result.get("caption"),
-                        from_user=result.get("from", {})
-                    )
-                    logger.info(f"عکس به {chat_id} ارسال شد")
-                    return message
-                raise Exception(f"Error sending photo: {data.get('description', 'Unknown error')}")
+            prepare = self.image_processor.photo if self.image_processor is not None else None
+            message = self._to_message(await self._send_media("sendPhoto", chat_id, "photo", photo, prepare=prepare, caption=caption, reply_to_message_id=reply_to_message_id))
+            logger.debug("عکس به %s ارسال شد", chat_id)
+            return message
         except Exception as e:
-            logger.error(f"خطا در ارسال عکس: {str(e)}")
+            logger.error("خطا در ارسال عکس به %s: %s", chat_id, e, extra=_fields("sendPhoto", chat_id, e))
             raise
 
-    async def send_video(self, chat_id: int, video: str, caption: Optional[str] = None, duration: Optional[int] = None) -> Message:
+    async def send_video(self, chat_id: int, video: FileInput, caption: Optional[str] = None, duration: Optional[int] = None) -> Message:
         """ارسال ویدیو با کپشن و مدت زمان"""
-        logger.info(f"در حال ارسال ویدیو به {chat_id} - مسیر فایل: {video}")
-        if not self.session:
-            await self.connect()
-        form = aiohttp.FormData()
-        form.add_field("chat_id", str(chat_id))
-        with open(video, "rb") as f:
-            file_content = f.read()
-        form.add_field("video", file_content, filename=video.split("/")[-1])
-        if caption:
-            form.add_field("caption", caption)
-        if duration:
-            form.add_field("duration", str(duration))
         try:
-            async with self.session.post(
-                f"{self.base_url}/sendVideo",
-                data=form
-            ) as resp:
-                data = await helpers.handle_response(resp)
-                if data and data.get("ok"):
-                    result = data["result"]
-                    chat = Chat(id=result.get("chat", {}).get("id"), type="unknown")
-                    message = Message(
-                        message_id=result.get("message_id"),
-                        chat=chat,
-                        date=result.get("date", 0),
-                        caption=result.get("caption"),
-                        from_user=result.get("from", {})
-                    )
-                    logger.info(f"ویدیو با موفقیت به {chat_id} ارسال شد")
-                    return message
-                logger.error(f"خطا در ارسال ویدیو: پاسخ API: {data}")
-                raise Exception(f"Error sending video: {data.get('description', 'Unknown error')}")
+            message = self._to_message(await self._send_media("sendVideo", chat_id, "video", video, caption=caption, duration=duration))
+            logger.debug("ویدیو به %s ارسال شد", chat_id)
+            return message
         except Exception as e:
-            logger.error(f"خطا در ارسال ویدیو: {str(e)}")
+            logger.error("خطا در ارسال ویدیو به %s: %s", chat_id, e, extra=_fields("sendVideo", chat_id, e))
             raise
 
-    async def send_voice(self, chat_id: int, voice: str, caption: Optional[str] = None) -> Message:
+    async def send_voice(self, chat_id: int, voice: FileInput, caption: Optional[str] = None) -> Message:
         """ارسال صوت با کپشن"""
-        if not self.session:
-            await self.connect()
-        form = aiohttp.FormData()
-        form.add_field("chat_id", str(chat_id))
-        with open(voice, "rb") as f:
-            file_content = f.read()
-        form.add_field("voice", file_content, filename=voice.split("/")[-1])
-        if caption:
-            form.add_field("caption", caption)
         try:
-            async with self.session.post(
-                f"{self.base_url}/sendVoice",
-                data=form
-            ) as resp:
-                data = await helpers.handle_response(resp)
-                if data and data.get("ok"):
-                    result = data["result"]
-                    chat = Chat(id=result.get("chat", {}).get("id"), type="unknown")
-                    message = Message(
-                        message_id=result.get("message_id"),
-                        chat=chat,
-                        date=result.get("date", 0),
-                        caption=result.get("caption"),
-                        from_user=result.get("from", {})
-                    )
-                    logger.info(f"صوت به {chat_id} ارسال شد")
-                    return message
-                raise Exception(f"Error sending voice: {data.get('description', 'Unknown error')}")
+            message = self._to_message(await self._send_media("sendVoice", chat_id, "voice", voice, caption=caption))
+            logger.debug("صوت به %s ارسال شد", chat_id)
+            return message
         except Exception as e:
-            logger.error(f"خطا در ارسال صوت: {str(e)}")
+            logger.error("خطا در ارسال صوت به %s: %s", chat_id, e, extra=_fields("sendVoice", chat_id, e))
             raise
 
-    async def send_audio(self, chat_id: int, audio: str, caption: Optional[str] = None, duration: Optional[int] = None) -> Message:
+    async def send_audio(self, chat_id: int, audio: FileInput, caption: Optional[str] = None, duration: Optional[int] = None) -> Message:
         """ارسال صدا با کیفیت بالا (مثل موسیقی)"""
-        if not self.session:
-            await self.connect()
-        form = aiohttp.FormData()
-        form.add_field("chat_id", str(chat_id))
-        with open(audio, "rb") as f:
-            file_content = f.read()
-        form.add_field("audio", file_content, filename=audio.split("/")[-1])
-        if caption:
-            form.add_field("caption", caption)
-        if duration:
-            form.add_field("duration", str(duration))
         try:
-            async with self.session.post(
-                f"{self.base_url}/sendAudio",
-                data=form
-            ) as resp:
-                data = await helpers.handle_response(resp)
-                if data and data.get("ok"):
-                    result = data["result"]
-                    chat = Chat(id=result.get("chat", {}).get("id"), type="unknown")
-                    message = Message(
-                        message_id=result.get("message_id"),
-                        chat=chat,
-                        date=result.get("date", 0),
-                        caption=result.get("caption"),
-                        from_user=result.get("from", {})
-                    )
-                    logger.info(f"صدا با کیفیت بالا به {chat_id} ارسال شد")
-                    return message
-                raise Exception(f"Error sending audio: {data.get('description', 'Unknown error')}")
+            message = self._to_message(await self._send_media("sendAudio", chat_id, "audio", audio, caption=caption, duration=duration))
+            logger.debug("صدا به %s ارسال شد", chat_id)
+            return message
         except Exception as e:
-            logger.error(f"خطا در ارسال صدا: {str(e)}")
+            logger.error("خطا در ارسال صدا به %s: %s", chat_id, e, extra=_fields("sendAudio", chat_id, e))
             raise
 
-    async def send_animation(self, chat_id: int, animation: str, caption: Optional[str] = None) -> Message:
+    async def send_animation(self, chat_id: int, animation: FileInput, caption: Optional[str] = None) -> Message:
         """ارسال انیمیشن (پشتیبانی از GIF، WebM، و تبدیل TGS به WebM)"""
-        if not self.session:
-            await self.connect()
-        form = aiohttp.FormData()
-        form.add_field("chat_id", str(chat_id))
-        
-        # بررسی فرمت فایل و تبدیل TGS به WebM اگر لازم باشه
-        file_extension = animation.lower().split(".")[-1]
-        temp_webm_path = None
+        file_extension = self._file_extension(animation)
+        prepare = None
         if file_extension == "tgs":
-            temp_webm_path = animation.replace(".tgs", "_temp.webm")
-            try:
-                subprocess.run(
-                    ["ffmpeg", "-i", animation, "-c:v", "libvpx-vp9", "-an", "-s", "512x512", "-r", "30", temp_webm_path],
-                    check=True,
-                    capture_output=True
-                )
-                animation = temp_webm_path
-                file_extension = "webm"
-            except subprocess.CalledProcessError as e:
-                logger.error(f"خطا در تبدیل TGS به WebM: {str(e)}")
-                raise Exception("تبدیل TGS به WebM ناموفق بود")
-        
-        with open(animation, "rb") as f:
-            file_content = f.read()
-        form.add_field("animation", file_content, filename=animation.split("/")[-1])
-        if caption:
-            form.add_field("caption", caption)
-        
-        for attempt in range(2):  # دو تلاش
-            try:
-                async with self.session.post(
-                    f"{self.base_url}/sendAnimation",
-                    data=form
-                ) as resp:
-                    data = await helpers.handle_response(resp)
-                    if data and data.get("ok"):
-                        result = data["result"]
-                        chat = Chat(id=result.get("chat", {}).get("id"), type="unknown")
-                        message = Message(
-                            message_id=result.get("message_id"),
-                            chat=chat,
-                            date=result.get("date", 0),
-                            caption=result.get("caption"),
-                            from_user=result.get("from", {})
-                        )
-                        logger.info(f"انیمیشن به {chat_id} ارسال شد - فرمت: {file_extension}")
-                        if temp_webm_path:
-                            os.remove(temp_webm_path)  # حذف فایل موقت
-                        return message
-                    logger.error(f"تلاش {attempt + 1} - خطا: {data.get('description', 'Unknown error')}")
-                    if attempt == 0:  # اگه اولین تلاش بود، صبر کن و دوباره تلاش کن
-                        await asyncio.sleep(1)
-                    else:
-                        raise Exception(f"Error sending animation after retries: {data.get('description', 'Unknown error')}")
-            except Exception as e:
-                logger.error(f"تلاش {attempt + 1} - خطا در ارسال انیمیشن: {str(e)}")
-                if attempt == 0:
-                    await asyncio.sleep(1)
-                else:
-                    if temp_webm_path:
-                        os.remove(temp_webm_path)  # حذف فایل موقت در صورت خطا
-                    raise
 
-    async def send_sticker(self, chat_id: int, sticker: str) -> Message:
-        """ارسال استیکر (پشتیبانی از PNG، WebP و GIF)"""
-        if not self.session:
-            await self.connect()
-        
-        file_extension = sticker.lower().split(".")[-1]
-        if file_extension not in ["png", "webp", "gif"]:
-            raise ValueError("فقط فرمت‌های PNG، WebP و GIF برای استیکر پشتیبانی می‌شوند")
+            async def prepare(file: InputFile) -> InputFile:
+                # فقط وقتی file_id کش‌شده‌ای برای فایل اصلی نباشد اجرا می‌شود
+                if file.kind != "path":
+                    return file
+                try:
+                    return self._input_file(await self.converter.tgs_to_webm(os.fspath(file.source)))
+                except Exception as e:
+                    logger.error("خطا در تبدیل TGS به WebM: %s", e)
+                    raise Exception("تبدیل TGS به WebM ناموفق بود")
 
-        form = aiohttp.FormData()
-        form.add_field("chat_id", str(chat_id))
-        with open(sticker, "rb") as f:
-            file_content = f.read()
-        form.add_field("sticker", file_content, filename=sticker.split("/")[-1])
-        
-        for attempt in range(2):  # دو تلاش
-            try:
-                async with self.session.post(
-                    f"{self.base_url}/sendSticker",
-                    data=form
-                ) as resp:
-                    data = await helpers.handle_response(resp)
-                    if data and data.get("ok"):
-                        result = data["result"]
-                        chat = Chat(id=result.get("chat", {}).get("id"), type="unknown")
-                        message = Message(
-                            message_id=result.get("message_id"),
-                            chat=chat,
-                            date=result.get("date", 0),
-                            from_user=result.get("from", {})
-                        )
-                        logger.info(f"استیکر به {chat_id} ارسال شد - فرمت: {file_extension}")
-                        return message
-                    logger.error(f"تلاش {attempt + 1} - خطا: {data.get('description', 'Unknown error')}")
-                    if attempt == 0:  # اگه اولین تلاش بود، صبر کن و دوباره تلاش کن
-                        await asyncio.sleep(1)
-                    else:
-                        raise Exception(f"Error sending sticker after retries: {data.get('description', 'Unknown error')}")
-            except Exception as e:
-                logger.error(f"تلاش {attempt + 1} - خطا در ارسال استیکر: {str(e)}")
-                if attempt == 0:
-                    await asyncio.sleep(1)
-                else:
-                    raise
+        try:
+            result = await self._send_media("sendAnimation", chat_id, "animation", animation, prepare=prepare, caption=caption)
+            message = self._to_message(result)
+            logger.debug("انیمیشن به %s ارسال شد - فرمت: %s", chat_id, file_extension)
+            return message
+        except Exception as e:
+            logger.error("خطا در ارسال انیمیشن به %s: %s", chat_id, e, extra=_fields("sendAnimation", chat_id, e))
+            raise
+
+    async def send_sticker(self, chat_id: int, sticker: FileInput) -> Message:
+        """ارسال استیکر (پشتیبانی از PNG، WebP و GIF؛ با image_processor به WebP تبدیل می‌شود)"""
+        file_extension = self._file_extension(sticker)
+        allowed = ["png", "webp", "gif"] if self.image_processor is None else ["png", "webp", "gif", "jpg", "jpeg"]
+        if file_extension and file_extension not in allowed:
+            raise ValueError("فقط فرمت‌های PNG، WebP و GIF برای استیکر پشتیبانی می‌شوند")
+        prepare = self.image_processor.sticker if self.image_processor is not None else None
+        try:
+            message = self._to_message(await self._send_media("sendSticker", chat_id, "sticker", sticker, prepare=prepare))
+            logger.debug("استیکر به %s ارسال شد - فرمت: %s", chat_id, file_extension)
+            return message
+        except Exception as e:
+            logger.error("خطا در ارسال استیکر به %s: %s", chat_id, e, extra=_fields("sendSticker", chat_id, e))
+            raise
 
     async def send_location(self, chat_id: int, latitude: float, longitude: float) -> Message:
         """ارسال موقعیت مکانی"""
-        if not self.session:
-            await self.connect()
         data = {
             "chat_id": chat_id,
             "latitude": latitude,
             "longitude": longitude
         }
         try:
-            async with self.session.post(
-                f"{self.base_url}/sendLocation",
-                json=data
-            ) as resp:
-                data = await helpers.handle_response(resp)
-                if data and data.get("ok"):
-                    result = data["result"]
-                    chat = Chat(id=result.get("chat", {}).get("id"), type="unknown")
-                    message = Message(
-                        message_id=result.get("message_id"),
-                        chat=chat,
-                        date=result.get("date", 0),
-                        from_user=result.get("from", {})
-                    )
-                    logger.info(f"موقعیت مکانی به {chat_id} ارسال شد")
-                    return message
-                raise Exception(f"Error sending location: {data.get('description', 'Unknown error')}")
+            message = self._to_message(await self._call("sendLocation", chat_id, json=data))
+            logger.debug("موقعیت مکانی به %s ارسال شد", chat_id)
+            return message
         except Exception as e:
-            logger.error(f"خطا در ارسال موقعیت مکانی: {str(e)}")
+            logger.error("خطا در ارسال موقعیت مکانی به %s: %s", chat_id, e, extra=_fields("sendLocation", chat_id, e))
             raise
 
-    async def send_video_note(self, chat_id: int, video_note: str, duration: Optional[int] = None) -> Message:
+    async def send_video_note(self, chat_id: int, video_note: FileInput, duration: Optional[int] = None) -> Message:
         """ارسال ویدیو دایره‌ای"""
-        if not self.session:
-            await self.connect()
-        form = aiohttp.FormData()
-        form.add_field("chat_id", str(chat_id))
-        with open(video_note, "rb") as f:
-            file_content = f.read()
-        form.add_field("video_note", file_content, filename=video_note.split("/")[-1])
-        if duration:
-            form.add_field("duration", str(duration))
         try:
-            async with self.session.post(
-                f"{self.base_url}/sendVideoNote",
-                data=form
-            ) as resp:
-                data = await helpers.handle_response(resp)
-                if data and data.get("ok"):
-                    result = data["result"]
-                    chat = Chat(id=result.get("chat", {}).get("id"), type="unknown")
-                    message = Message(
-                        message_id=result.get("message_id"),
-                        chat=chat,
-                        date=result.get("date", 0),
-                        from_user=result.get("from", {})
-                    )
-                    logger.info(f"ویدیو دایره‌ای به {chat_id} ارسال شد")
-                    return message
-                raise Exception(f"Error sending video note: {data.get('description', 'Unknown error')}")
+            message = self._to_message(await self._send_media("sendVideoNote", chat_id, "video_note", video_note, duration=duration))
+            logger.debug("ویدیو دایره‌ای به %s ارسال شد", chat_id)
+            return message
         except Exception as e:
-            logger.error(f"خطا در ارسال ویدیو دایره‌ای: {str(e)}")
+            logger.error("خطا در ارسال ویدیو دایره‌ای به %s: %s", chat_id, e, extra=_fields("sendVideoNote", chat_id, e))
             raise
 
-    async def send_document(self, chat_id: int, document: str, caption: Optional[str] = None) -> Message:
+    async def send_document(self, chat_id: int, document: FileInput, caption: Optional[str] = None, reply_to_message_id: Optional[int] = None) -> Message:
         """ارسال فایل (مثل PDF)"""
+        try:
+            message = self._to_message(await self._send_media("sendDocument", chat_id, "document", document, caption=caption, reply_to_message_id=reply_to_message_id))
+            logger.debug("فایل به %s ارسال شد", chat_id)
+            return message
+        except Exception as e:
+            logger.error("خطا در ارسال فایل به %s: %s", chat_id, e, extra=_fields("sendDocument", chat_id, e))
+            raise
+
+    async def send_media_group(self, chat_id: int, media: List[Union[InputMedia, FileInput]], reply_to_message_id: Optional[int] = None) -> List[Message]:
+        """ارسال آلبوم (۲ تا ۱۰ آیتم) در یک درخواست multipart
+
+        آیتم‌ها InputMediaPhoto/Video/Audio/Document هستند؛ ورودی ساده (مسیر، bytes یا file_id) عکس
+        حساب می‌شود. فایل‌های محلی جداگانه استریم می‌شوند و file_idهای کش‌شده به جای آپلود می‌روند.
+        """
+        items = [item if isinstance(item, InputMedia) else InputMediaPhoto(item) for item in media]
+        if not 2 <= len(items) <= 10:
+            raise ValueError("آلبوم باید بین ۲ تا ۱۰ آیتم داشته باشد")
+        try:
+            result = await self._send_media_group(chat_id, items, reply_to_message_id)
+            logger.debug("آلبوم %d تایی به %s ارسال شد", len(items), chat_id)
+            return [self._to_message(message) for message in result]
+        except Exception as e:
+            logger.error("خطا در ارسال آلبوم به %s: %s", chat_id, e, extra=_fields("sendMediaGroup", chat_id, e))
+            raise
+
+    async def _send_media_group(self, chat_id: int, items: List[InputMedia], reply_to_message_id: Optional[int]) -> List[dict]:
+        uploads = [item.media for item in items]
+        await asyncio.gather(*(upload.check() for upload in uploads))
+        cache_keys: List[Optional[str]] = [None] * len(items)
+        cached: List[Optional[str]] = [None] * len(items)
+        if self.file_cache is not None:
+            for i, item in enumerate(items):
+                cache_keys[i] = await self.file_cache.key_for(item.type, item.media)
+                if cache_keys[i]:
+                    cached[i] = await self.file_cache.lookup(cache_keys[i])
+
+        async def prepare_uploads():
+            if self.image_processor is None:
+                return
+            indexes = [i for i, item in enumerate(items) if item.type == "photo" and not cached[i] and not item.media.is_file_id]
+            processed = await asyncio.gather(*(self.image_processor.photo(items[i].media) for i in indexes))
+            for i, upload in zip(indexes, processed):
+                uploads[i] = upload
+
+        def build_form() -> aiohttp.FormData:
+            form = aiohttp.FormData()
+            form.add_field("chat_id", str(chat_id))
+            described, attachments = [], []
+            for i, (item, upload) in enumerate(zip(items, uploads)):
+                if cached[i] or upload.is_file_id:
+                    described.append(item.to_dict(cached[i] or upload.source))
+                else:
+                    name = f"file{i}"
+                    attachments.append((name, item.type, upload))
+                    described.append(item.to_dict(f"attach://{name}"))
+            form.add_field("media", self.codec.dumps(described).decode("utf-8"))
+            if reply_to_message_id:
+                form.add_field("reply_to_message_id", str(reply_to_message_id))
+            for name, field, upload in attachments:
+                self._add_file(form, field, upload, name=name)
+            return form
+
+        await prepare_uploads()
+        replayable = all(cached[i] or upload.replayable for i, upload in enumerate(uploads))
+        try:
+            result = await self._call("sendMediaGroup", chat_id, data=build_form, replayable=replayable)
+        except BaleAPIError as e:
+            if not any(cached) or not is_stale_file_id_error(e):
+                raise
+            logger.warning("file_id کش‌شده در آلبوم رد شد، آپلود دوباره", extra=_fields("sendMediaGroup", chat_id))
+            for i, key in enumerate(cache_keys):
+                if cached[i]:
+                    self.file_cache.invalidate(key)
+                    cached[i] = None
+            await prepare_uploads()
+            result = await self._call("sendMediaGroup", chat_id, data=build_form, replayable=all(upload.replayable for upload in uploads))
+        for i, item in enumerate(items):
+            if cache_keys[i] and not cached[i] and i < len(result):
+                file_id = extract_file_id(result[i], item.type)
+                if file_id:
+                    self.file_cache.set(cache_keys[i], file_id)
+        return result
+
+    async def forward_message(self, chat_id: int, from_chat_id: int, message_id: int) -> Message:
+        """فوروارد یک پیام از چت دیگر"""
+        data = {"chat_id": chat_id, "from_chat_id": from_chat_id, "message_id": message_id}
+        try:
+            message = self._to_message(await self._call("forwardMessage", chat_id, json=data))
+            logger.debug("پیام %s از %s به %s فوروارد شد", message_id, from_chat_id, chat_id)
+            return message
+        except Exception as e:
+            logger.error("خطا در فوروارد پیام به %s: %s", chat_id, e, extra=_fields("forwardMessage", chat_id, e))
+            raise
+
+    async def delete_message(self, chat_id: int, message_id: int) -> bool:
+        """حذف یک پیام"""
+        try:
+            await self._call("deleteMessage", chat_id, json={"chat_id": chat_id, "message_id": message_id})
+            logger.debug("پیام %s در %s حذف شد", message_id, chat_id)
+            return True
+        except Exception as e:
+            logger.error("خطا در حذف پیام در %s: %s", chat_id, e, extra=_fields("deleteMessage", chat_id, e))
+            raise
+
+    async def edit_message_text(self, chat_id: int, message_id: int, text: str, parse_mode: Optional[str] = None, reply_markup: Optional[Union[dict, PreparedMarkup]] = None) -> Message:
+        """ویرایش متن یک پیام ارسال‌شده"""
+        data = {"chat_id": chat_id, "message_id": message_id, "text": helpers.format_message(text)}
+        if parse_mode:
+            data["parse_mode"] = parse_mode
+        if reply_markup:
+            data["reply_markup"] = self.codec.prepare_markup(reply_markup)
+        try:
+            result = await self._call("editMessageText", chat_id, json=data)
+            logger.debug("پیام %s در %s ویرایش شد", message_id, chat_id)
+            # برای پیام‌های inline نتیجه فقط True است
+            return self._to_message(result) if isinstance(result, dict) else result
+        except Exception as e:
+            logger.error("خطا در ویرایش پیام در %s: %s", chat_id, e, extra=_fields("editMessageText", chat_id, e))
+            raise
+
+    def prepare_markup(self, markup: dict) -> PreparedMarkup:
+        """سریال‌سازی یک‌باره کیبورد؛ نتیجه را نگه دارید و در هر ارسال دوباره استفاده کنید"""
+        return self.codec.prepare_markup(markup)
+
+    def broadcast(
+        self,
+        chat_ids: ChatIds,
+        text: Optional[str] = None,
+        method: Optional[str] = None,
+        concurrency: int = 20,
+        rate: Optional[float] = None,
+        checkpoint: Optional[str] = None,
+        **params
+    ) -> Broadcast:
+        """ارسال گروهی به تعداد زیادی چت
+
+        method نام متد ارسال است (پیش‌فرض send_message) و params آرگومان‌های آن؛
+        مثلاً broadcast(ids, method="send_photo", photo="logo.png", caption="...").
+        خروجی را با async for بخوانید یا await broadcast(...).run() کنید.
+        با checkpoint (مسیر فایل) اجرای قطع‌شده از همان‌جا ادامه پیدا می‌کند؛ بعد از break از
+        async for، با await broadcast.aclose() ارسال را متوقف و checkpoint را ذخیره کنید.
+        """
+        if text is not None:
+            params["text"] = text
+        return Broadcast(
+            self,
+            chat_ids,
+            method=method or "send_message",
+            params=params,
+            concurrency=concurrency,
+            rate=rate,
+            checkpoint=checkpoint,
+        )
+
+    def _to_message(self, result: dict) -> Message:
+        """ساخت Message متصل به این کلاینت از نتیجه متدهای sendX"""
+        return Message.from_dict(result, self)
+
+    async def _send_media(self, endpoint: str, chat_id: int, field: str, file: FileInput, prepare: Optional[Callable[[InputFile], Awaitable[InputFile]]] = None, **fields) -> dict:
+        """ارسال یک فایل رسانه‌ای با استفاده از کش file_id (در صورت فعال بودن)
+
+        prepare (مثلاً ImageProcessor.photo یا تبدیل TGS) فقط وقتی اجرا می‌شود که فایل واقعاً آپلود شود؛
+        کلید کش file_id از فایل اصلی ساخته می‌شود.
+        """
+        input_file = self._input_file(file)
+        await input_file.check()
+        cache_key = None
+        cached_id = None
+        if self.file_cache is not None:
+            cache_key = await self.file_cache.key_for(field, input_file)
+            if cache_key:
+                cached_id = await self.file_cache.lookup(cache_key)
+
+        upload = input_file
+
+        async def prepare_upload():
+            nonlocal upload, prepare
+            if prepare is not None:
+                upload = await prepare(input_file)
+                prepare = None
+
+        def build_form(file_id: Optional[str]) -> aiohttp.FormData:
+            form = aiohttp.FormData()
+            form.add_field("chat_id", str(chat_id))
+            if file_id:
+                form.add_field(field, file_id)
+            else:
+                self._add_file(form, field, upload)
+            for name, value in fields.items():
+                if value:
+                    form.add_field(name, str(value))
+            return form
+
+        if not cached_id:
+            await prepare_upload()
+        try:
+            result = await self._call(endpoint, chat_id, data=lambda: build_form(cached_id), replayable=bool(cached_id) or upload.replayable)
+        except BaleAPIError as e:
+            if not cached_id or not is_stale_file_id_error(e):
+                raise
+            # file_id کش‌شده دیگر معتبر نیست؛ حذف و آپلود دوباره
+            logger.warning("file_id کش‌شده برای %s رد شد، آپلود دوباره", field, extra=_fields(endpoint, chat_id))
+            self.file_cache.invalidate(cache_key)
+            cached_id = None
+            await prepare_upload()
+            result = await self._call(endpoint, chat_id, data=lambda: build_form(None), replayable=upload.replayable)
+        if cache_key and not cached_id:
+            file_id = extract_file_id(result, field)
+            if file_id:
+                self.file_cache.set(cache_key, file_id)
+        return result
+
+    async def _call(self, endpoint: str, chat_id: Optional[int] = None, **kwargs) -> Any:
+        """فراخوانی API و برگرداندن فیلد result"""
+        data = await self._request(endpoint, chat_id, **kwargs)
+        if data and data.get("ok"):
+            return data.get("result")
+        raise BaleAPIError(f"Unexpected response from {endpoint}")
+
+    async def _request(self, endpoint: str, chat_id: Optional[int] = None, **kwargs) -> dict:
+        """موتور مشترک همه درخواست‌ها: محدودیت نرخ، قطع‌کننده مدار و تلاش دوباره
+
+        data باید تابعی باشد که بدنه را می‌سازد تا در هر تلاش از نو ساخته شود؛
+        اگر بدنه قابل ساخت دوباره نباشد (replayable=False) تلاش دوباره انجام نمی‌شود.
+        """
+        if self.instrumentation is None:
+            return await self._send_request(endpoint, chat_id, **kwargs)
+        return await self._measure(endpoint, self._send_request(endpoint, chat_id, **kwargs))
+
+    async def _measure(self, endpoint: str, request: Awaitable) -> Any:
+        """اجرای یک درخواست همراه با هوک‌های شروع و پایان instrumentation"""
+        instrumentation = self.instrumentation
+        context = instrumentation.on_request_start(endpoint)
+        started = time.perf_counter()
+        try:
+            result = await request
+        except BaseException as e:
+            instrumentation.on_request_end(endpoint, context, time.perf_counter() - started, e)
+            raise
+        instrumentation.on_request_end(endpoint, context, time.perf_counter() - started, None)
+        return result
+
+    async def _send_request(
+        self,
+        endpoint: str,
+        chat_id: Optional[int] = None,
+        json: Optional[dict] = None,
+        data: Optional[Callable[[], Any]] = None,
+        idempotent: Optional[bool] = None,
+        replayable: bool = True,
+    ) -> dict:
         if not self.session:
             await self.connect()
-        form = aiohttp.FormData()
-        form.add_field("chat_id", str(chat_id))
-        with open(document, "rb") as f:
-            file_content = f.read()
-        form.add_field("document", file_content, filename=document.split("/")[-1])
-        if caption:
-            form.add_field("caption", caption)
+        if idempotent is None:
+            idempotent = not endpoint.startswith(NON_IDEMPOTENT_PREFIXES)
+        breaker = self.circuit_breakers.get(endpoint)
+        # بدنه JSON یک بار سریال می‌شود و در تلاش‌های دوباره همان bytes فرستاده می‌شود
+        body = self.codec.dumps(json) if json is not None else None
+        attempt = 0
+        flood_retries = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
+        # خواندن‌ها با chat_id سطل پیام‌های آن چت را مصرف نمی‌کنند
+        lane = chat_id if chat_id is not None and RateLimiter.limits_chat(endpoint) else None
+        while True:
+            breaker.before_call()
+            try:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(lane)
+                started = time.perf_counter() if debug else 0.0
+                async with self.session.post(
+                    f"{self.base_url}/{endpoint}",
+                    data=body if body is not None else (data() if data is not None else None),
+                    headers=JSON_HEADERS if body is not None else None
+                ) as resp:
+                    result = await helpers.handle_response(resp, self.codec.loads)
+                breaker.record_success()
+                if debug:
+                    latency = time.perf_counter() - started
+                    logger.debug("%s در %.1f میلی‌ثانیه", endpoint, latency * 1000, extra=_fields(endpoint, chat_id, latency=round(latency, 4), attempt=attempt))
+                return result
+            except RetryAfter as e:
+                breaker.release()
+                # 429 یک خواندن نباید ارسال‌های آن چت یا کل ربات را متوقف کند
+                paused = self.rate_limiter is not None and (lane is not None or chat_id is None)
+                if paused:
+                    self.rate_limiter.pause(e.retry_after, lane)
+                if flood_retries >= self.max_flood_retries or not replayable:
+                    raise
+                flood_retries += 1
+                logger.warning("محدودیت نرخ در %s؛ توقف %s ثانیه", endpoint, e.retry_after, extra=_fields(endpoint, chat_id, e, retry_after=e.retry_after))
+                if not paused:
+                    await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                if not self.retry_policy.is_transient(e):
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                if not replayable or not self.retry_policy.should_retry(e, attempt, idempotent):
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                attempt += 1
+                logger.warning("تلاش %d برای %s ناموفق بود (%s)؛ تلاش دوباره در %.2f ثانیه", attempt, endpoint, e, delay, extra=_fields(endpoint, chat_id, e, attempt=attempt))
+                await asyncio.sleep(delay)
+            except BaseException:
+                # لغو (timeout هندلر یا توقف) نباید مدار نیمه‌باز را برای همیشه در حالت آزمایش نگه دارد
+                breaker.abandon()
+                raise
+
+    def _input_file(self, file: FileInput) -> InputFile:
+        return file if isinstance(file, InputFile) else InputFile(file, chunk_size=self.upload_chunk_size)
+
+    def _add_file(self, form: aiohttp.FormData, field: str, file: FileInput, name: Optional[str] = None):
+        """افزودن فایل به فرم به صورت استریم (یا file_id اگر فایل محلی نباشد)
+
+        name نام فیلد فرم است (پیش‌فرض field)؛ مثلاً file0 برای attach://file0 در آلبوم.
+        """
+        name = name or field
+        input_file = self._input_file(file)
+        if input_file.is_file_id:
+            form.add_field(name, input_file.source)
+            return
+        payload = input_file.payload(self.upload_budget)
+        if self.instrumentation is not None:
+            payload = self._count_upload(field, payload)
+        form.add_field(name, payload, filename=input_file.filename or field)
+
+    def _count_upload(self, field: str, payload: Any) -> Any:
+        """شمارش بایت‌های آپلودشده برای متریک‌ها"""
+        instrumentation = self.instrumentation
+        if isinstance(payload, (bytes, bytearray, memoryview)):
+            instrumentation.on_upload(field, len(payload))
+            return payload
+
+        async def counted():
+            async for chunk in payload:
+                instrumentation.on_upload(field, len(chunk))
+                yield chunk
+        return counted()
+
+    @staticmethod
+    def _file_extension(file: FileInput) -> Optional[str]:
+        """پسوند فایل بر اساس مسیر یا نام فایل (در صورت وجود)"""
+        name = file.filename if isinstance(file, InputFile) else InputFile(file).filename
+        if not name or "." not in name:
+            return None
+        return name.lower().rsplit(".", 1)[-1]
+
+    def instrument(self, instrumentation: Union[Instrumentation, List[Instrumentation]]):
+        """فعال کردن هوک‌های متریک/ردیابی برای درخواست‌ها، آپدیت‌ها و هندلرها"""
+        instruments = list(instrumentation) if isinstance(instrumentation, (list, tuple)) else [instrumentation]
+        for instrument in instruments:
+            if isinstance(instrument, Metrics):
+                self.metrics = instrument.bind(self)
+        self.instrumentation = instruments[0] if len(instruments) == 1 else MultiInstrumentation(instruments)
+        self.router.instrumentation = self.instrumentation
+
+    def on_message(self, raw: bool = False, **filters):
+        """دکوراتور برای هندل کردن پیام‌ها با فیلترهای پیشرفته
+
+        فیلترها: commands، regex، content_types، chat_types، user_ids، chat_ids، func،
+        به همراه priority و stop (توقف اجرای هندلرهای بعدی). بدون content_types فقط
+        پیام‌های متنی به هندلر می‌رسند؛ برای همه انواع content_types=["any"] بدهید.
+        با raw=True هندلر دیکشنری خام پیام را می‌گیرد و هیچ شیئی ساخته نمی‌شود.
+        """
+        filters.setdefault("content_types", ["text"])
+        return self.router.message(raw=raw, **filters)
+
+    def on_edited_message(self, **filters):
+        """دکوراتور هندلر پیام‌های ویرایش‌شده"""
+        return self.router.edited_message(**filters)
+
+    def on_callback_query(self, data: Optional[Union[str, List[str]]] = None, **filters):
+        """دکوراتور هندلر فشردن دکمه‌های شیشه‌ای (فیلتر data یا regex روی callback_data)"""
+        return self.router.callback_query(data=data, **filters)
+
+    async def answer_callback_query(self, callback_query_id: str, text: Optional[str] = None, show_alert: bool = False) -> bool:
+        """پاسخ به callback_query"""
+        data = {"callback_query_id": callback_query_id}
+        if text:
+            data["text"] = text
+        if show_alert:
+            data["show_alert"] = True
         try:
-            async with self.session.post(
-                f"{self.base_url}/sendDocument",
-                data=form
-            ) as resp:
-                data = await helpers.handle_response(resp)
-                if data and data.get("ok"):
-                    result = data["result"]
-                    chat = Chat(id=result.get("chat", {}).get("id"), type="unknown")
-                    message = Message(
-                        message_id=result.get("message_id"),
-                        chat=chat,
-                        date=result.get("date", 0),
-                        caption=result.get("caption"),
-                        from_user=result.get("from", {})
-                    )
-                    logger.info(f"فایل به {chat_id} ارسال شد")
-                    return message
-                raise Exception(f"Error sending document: {data.get('description', 'Unknown error')}")
+            await self._call("answerCallbackQuery", json=data)
+            return True
         except Exception as e:
-            logger.error(f"خطا در ارسال فایل: {str(e)}")
+            logger.error("خطا در پاسخ به callback: %s", e, extra=_fields("answerCallbackQuery", None, e))
             raise
 
-    def on_message(self):
-        """دکوراتور برای هندل کردن پیام‌ها با فیلترهای پیشرفته"""
-        def decorator(handler: Callable):
-            def wrapper(message: Message):
-                if hasattr(message, "text") and message.text:
-                    asyncio.create_task(handler(message))
-            self.handlers.append(wrapper)
-            return wrapper
-        return decorator
-
-    async def get_updates(self, offset: int, timeout: int) -> List[Message]:
-        """دریافت آپدیت‌ها از API بله"""
+    async def _fetch_updates(self, offset: int, timeout: int, limit: Optional[int] = None, allowed_updates: Optional[List[str]] = None) -> List[dict]:
+        """دریافت آپدیت‌های خام؛ برخلاف get_updates خطاها را بالا می‌فرستد"""
+        if self.instrumentation is None:
+            return await self._get_updates_request(offset, timeout, limit, allowed_updates)
+        return await self._measure("getUpdates", self._get_updates_request(offset, timeout, limit, allowed_updates))
+
+    async def _get_updates_request(self, offset: int, timeout: int, limit: Optional[int], allowed_updates: Optional[List[str]]) -> List[dict]:
         if not self.session:
             await self.connect()
-        params = {"offset": offset, "timeout": timeout}
+        if not self.poll_session:
+            self.poll_session = self._build_session(self.poll_connection, self._poll_connector)
+        params = {"offset": str(offset), "timeout": str(timeout)}
+        if limit:
+            params["limit"] = str(limit)
+        if allowed_updates is not None:
+            params["allowed_updates"] = self.codec.dumps(allowed_updates).decode("utf-8")
+        # زمان انتظار long poll جدا از timeout ارسال‌ها حساب می‌شود
+        request_timeout = aiohttp.ClientTimeout(
+            total=self.poll_connection.total_timeout,
+            connect=self.poll_connection.connect_timeout,
+            sock_read=timeout + self.poll_read_margin
+        )
+        async with self.poll_session.get(
+            f"{self.base_url}/getUpdates",
+            params=params,
+            timeout=request_timeout
+        ) as resp:
+            data = await helpers.handle_response(resp, self.codec.loads)
+            if not data or not data.get("ok"):
+                raise Exception("پاسخ نادرست از سرور بله")
+            return data.get("result") or []
+
+    @staticmethod
+    def _next_offset(updates: List[dict], offset: int) -> int:
+        return max(update["update_id"] for update in updates) + 1 if updates else offset
+
+    def _parse_update(self, update: dict) -> Optional[Message]:
+        """ساخت Message متصل به این کلاینت از یک آپدیت خام"""
+        message_data = update.get("message")
+        if not message_data:
+            return None
+        message = Message.from_dict(message_data, self)
+        if not message.chat_id:
+            return None
+        return message
+
+    async def get_updates(self, offset: int, timeout: int, limit: Optional[int] = None, allowed_updates: Optional[List[str]] = None) -> List[Message]:
+        """دریافت آپدیت‌ها از API بله"""
         try:
-            async with self.session.get(
-                f"{self.base_url}/getUpdates",
-                params=params
-            ) as resp:
-                data = await helpers.handle_response(resp)
-                if not data or not data.get("ok"):
-                    logger.warning("پاسخ نادرست از سرور بله")
-                    return []
-                updates = data.get("result", [])
-                messages = []
-                for update in updates:
-                    message_data = update.get("message")
-                    if message_data:
-                        chat_id = message_data.get("chat", {}).get("id")
-                        if chat_id:
-                            chat = Chat(id=chat_id, type="unknown")
-                            from_data = message_data.get("from", {})
-                            message = Message(
-                                message_id=message_data.get("message_id"),
-                                chat=chat,
-                                date=message_data.get("date", 0),
-                                text=message_data.get("text"),
-                                from_user=from_data
-                            )
-                            messages.append(message)
-                if updates:
-                    self.last_update_id = max(update["update_id"] for update in updates) + 1
-                return messages
+            updates = await self._fetch_updates(offset, timeout, limit, allowed_updates)
         except Exception as e:
-            logger.error(f"خطا در دریافت آپدیت‌ها: {str(e)}")
+            logger.error("خطا در دریافت آپدیت‌ها: %s", e, extra=_fields("getUpdates", None, e))
             return []
+        self.last_update_id = max(self.last_update_id, self._next_offset(updates, offset))
+        messages = []
+        for update in updates:
+            message = self._parse_update(update)
+            if message:
+                messages.append(message)
+        return messages
 
-    async def start_polling(self, allowed_updates: Optional[List[str]] = None):
-        """شروع پولینگ با آپدیت‌های فیلترشده و مدیریت قطع ارتباط"""
+    async def start_polling(self, allowed_updates: Optional[List[str]] = None, limit: int = 100, catch_up: bool = False, catch_up_workers: Optional[int] = None):
+        """شروع پولینگ با آپدیت‌های فیلترشده و مدیریت قطع ارتباط
+
+        دسته بعدی همزمان با تحویل دسته فعلی به dispatcher گرفته می‌شود و
+        فقط بعد از خطا یا پاسخ خالیِ زودهنگام مکث می‌کنیم.
+        با catch_up=True ابتدا آپدیت‌های انباشته روی سرور بدون long poll و در دسته‌های کامل
+        خوانده می‌شوند و dispatcher تا آن موقع با catch_up_workers worker (پیش‌فرض چهار برابر)
+        کار می‌کند؛ با اولین دسته ناقص پولینگ عادی ادامه پیدا می‌کند.
+        """
         await self.connect()  # اطمینان از اتصال قبل از شروع
         self.is_running = True
-        offset = self.last_update_id
-        while self.is_running:
-            try:
-                messages = await self.get_updates(offset, self.timeout)
-                for message in messages:
-                    if message:
-                        offset = self.last_update_id
-                        for handler in self.handlers:
-                            await handler(message)
-                await self._check_scheduled_tasks()
-            except Exception as e:
-                logger.error(f"خطا در پولینگ: {str(e)}")
-            await asyncio.sleep(1)  # تأخیر 1 ثانیه
-
-    async def _check_scheduled_tasks(self):
-        """بررسی و اجرای وظایف زمان‌بندی‌شده"""
-        current_time = time.time()
-        tasks_to_remove = []
-        for task in self.scheduled_tasks:
-            if current_time >= task["time"]:
-                await self.send_message(task["chat_id"], task["text"])
-                tasks_to_remove.append(task)
-        for task in tasks_to_remove:
-            self.scheduled_tasks.remove(task)
-
-    def schedule_message(self, chat_id: int, text: str, delay_seconds: int):
-        """زمان‌بندی ارسال پیام"""
-        task_time = time.time() + delay_seconds
-        task = {"chat_id": chat_id, "text": text, "time": task_time, "task": None}
-        self.scheduled_tasks.append(task)
-        logger.info(f"پیام برای {chat_id} در {delay_seconds} ثانیه زمان‌بندی شد")
-
-    async def get_chat_member(self, chat_id: int, user_id: int) -> dict:
-        """دریافت اطلاعات عضویت کاربر در چت"""
+        self.dispatcher.start()
+        poll_timeout = self.poll_timeout
+        workers = self.dispatcher.workers
+        catching_up = catch_up
+        caught_up = 0
+        catch_up_started = time.monotonic()
+        if catching_up:
+            self.dispatcher.resize(catch_up_workers or workers * 4)
+
+        async def fetch(offset: int):
+            timeout, batch = (0, MAX_UPDATES_LIMIT) if catching_up else (poll_timeout, limit)
+            started = time.monotonic()
+            updates = await self._fetch_updates(offset, timeout, batch, allowed_updates)
+            elapsed = time.monotonic() - started
+            if self.instrumentation is not None:
+                self.instrumentation.on_poll(len(updates), elapsed)
+            next_offset = self._next_offset(updates, offset)
+            if updates and self.offset_store.persistent:
+                await self._journal(updates, next_offset)
+            return updates, next_offset, elapsed, timeout, batch
+
+        error_delay = 0.0
+        empty_delay = 0.0
+        pending: Optional[asyncio.Task] = None
+        try:
+            for update in await self._restore_offsets():
+                await self._feed_update(update)
+            pending = asyncio.ensure_future(fetch(self.last_update_id))
+            while self.is_running:
+                self._pending_fetch = pending
+                try:
+                    updates, next_offset, elapsed, timeout, batch = await pending
+                except asyncio.CancelledError:
+                    if self.is_running:
+                        raise
+                    break  # stop_polling درخواست در جریان را لغو کرده است
+                except Exception as e:
+                    error_delay = min(max(error_delay * 2, 1.0), self.max_poll_backoff)
+                    logger.error("خطا در پولینگ: %s - تلاش دوباره در %.1f ثانیه", e, error_delay, extra=_fields("getUpdates", None, e))
+                    pending = None
+                    await asyncio.sleep(error_delay)
+                    if self.is_running:
+                        pending = asyncio.ensure_future(fetch(self.last_update_id))
+                    continue
+                error_delay = 0.0
+                # offset فقط بعد از رسیدن و ثبت دسته جلو می‌رود؛ لغو fetch در هر لحظه دسته را گم نمی‌کند
+                self.last_update_id = max(self.last_update_id, next_offset)
+                if catching_up:
+                    caught_up += len(updates)
+                    if len(updates) < batch:
+                        catching_up = False
+                        self.dispatcher.resize(workers)
+                        logger.info("%d آپدیت انباشته در %.1f ثانیه دریافت شد؛ ادامه با پولینگ عادی", caught_up, time.monotonic() - catch_up_started)
+                # offset بعدی معلوم است؛ دسته بعدی را قبل از تحویل این دسته درخواست می‌کنیم
+                pending = asyncio.ensure_future(fetch(self.last_update_id)) if self.is_running else None
+                for update in updates:
+                    # اگر صف پر باشد همین‌جا صبر می‌کنیم (backpressure)
+                    await self._feed_update(update)
+                if updates:
+                    empty_delay = 0.0
+                elif elapsed < timeout / 2 and pending:
+                    # سرور بدون صبر کردن پاسخ خالی داد؛ برای جلوگیری از حلقه داغ کمی صبر می‌کنیم
+                    empty_delay = min(max(empty_delay * 2, 0.1), 1.0)
+                    pending.cancel()
+                    await asyncio.sleep(empty_delay)
+                    pending = asyncio.ensure_future(fetch(self.last_update_id)) if self.is_running else None
+        finally:
+            self._pending_fetch = None
+            if pending and not pending.done():
+                pending.cancel()
+            await self.dispatcher.stop()
+            self.dispatcher.workers = workers
+            await self._stop_commits()
+
+    async def _journal(self, updates: List[dict], next_offset: int):
+        """ثبت ماندگار دسته دریافتی قبل از این‌که getUpdates بعدی آن را برای سرور تأیید کند
+
+        اگر ثبت ناموفق باشد خطا بالا می‌رود و offset جلو نمی‌رود تا همین دسته دوباره گرفته شود.
+        """
+        self.offset_store.append(updates, next_offset)
+        await asyncio.get_running_loop().run_in_executor(None, self.offset_store.flush)
+
+    async def _restore_offsets(self) -> List[dict]:
+        """بارگذاری offset و شناسه‌های اخیر از offset_store (یک بار) و شروع commit دوره‌ای"""
+        if not self.offset_store.persistent:
+            return []
+        if self._commit_task is None:
+            self._commit_task = asyncio.ensure_future(self._commit_loop())
+        if self._offsets_restored:
+            return []
+        self._offsets_restored = True
+        state = await asyncio.get_running_loop().run_in_executor(None, self.offset_store.load)
+        self.last_update_id = max(self.last_update_id, state.offset)
+        for update_id in state.recent:
+            self._recent_updates.add(update_id)
+        if state.pending:
+            logger.info("%d آپدیت تأییدنشده از اجرای قبلی دوباره پردازش می‌شود", len(state.pending))
+        return state.pending
+
+    async def _commit_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.offset_store.commit_interval)
+            if self.offset_store.dirty:
+                try:
+                    await loop.run_in_executor(None, self.offset_store.flush)
+                except Exception as e:
+                    logger.error("خطا در ذخیره offset: %s", e)
+
+    async def _stop_commits(self):
+        """توقف commit دوره‌ای و نوشتن ackهای باقی‌مانده"""
+        if self._commit_task is not None:
+            self._commit_task.cancel()
+            await asyncio.gather(self._commit_task, return_exceptions=True)
+            self._commit_task = None
+        if self.offset_store.dirty:
+            await asyncio.get_running_loop().run_in_executor(None, self.offset_store.flush)
+
+    async def _feed_update(self, update: dict) -> bool:
+        """تحویل یک آپدیت خام (از پولینگ یا وب‌هوک) به dispatcher با حذف تکراری‌ها"""
+        update_id = update.get("update_id")
+        if update_id is not None and not self._recent_updates.add(update_id):
+            return False
+        try:
+            if self.chat_cache is not None:
+                # آپدیت‌های عضویت حتی اگر هندلری نداشته باشند کش را به‌روز می‌کنند
+                self.chat_cache.observe(update)
+            parsed = Update.from_dict(update, self)
+            # آپدیت‌هایی که هندلری برایشان ثبت نشده وارد صف نمی‌شوند
+            if not self.router.handles(parsed.type):
+                if update_id is not None:
+                    self.offset_store.ack(update_id)
+                return False
+            await self.dispatcher.put(parsed.chat_id, parsed)
+        except BaseException:
+            # آپدیت وارد صف نشد؛ تحویل دوباره (مثلاً تکرار وب‌هوک) نباید تکراری حساب شود
+            if update_id is not None:
+                self._recent_updates.discard(update_id)
+            raise
+        return True
+
+    async def set_webhook(self, url: str, secret_token: Optional[str] = None, allowed_updates: Optional[List[str]] = None) -> bool:
+        """ثبت آدرس وب‌هوک در بله"""
+        data = {"url": url}
+        if secret_token:
+            data["secret_token"] = secret_token
+        if allowed_updates is not None:
+            data["allowed_updates"] = allowed_updates
+        try:
+            await self._call("setWebhook", json=data)
+            logger.info("وب‌هوک روی %s تنظیم شد", url)
+            return True
+        except Exception as e:
+            logger.error("خطا در تنظیم وب‌هوک: %s", e, extra=_fields("setWebhook", None, e))
+            raise
+
+    async def delete_webhook(self, drop_pending_updates: bool = False) -> bool:
+        """حذف وب‌هوک تا بتوان دوباره از پولینگ استفاده کرد"""
+        try:
+            await self._call("deleteWebhook", json={"drop_pending_updates": drop_pending_updates})
+            logger.info("وب‌هوک حذف شد")
+            return True
+        except Exception as e:
+            logger.error("خطا در حذف وب‌هوک: %s", e, extra=_fields("deleteWebhook", None, e))
+            raise
+
+    def webhook_server(self, path: str = "/webhook", secret: Optional[str] = None) -> WebhookServer:
+        """ساخت سرور وب‌هوک بدون اجرای آن (مثلاً برای تست با کلاینت HTTP محلی)"""
+        return WebhookServer(self, path=path, secret=secret)
+
+    async def run_webhook(self, host: str = "0.0.0.0", port: int = 8080, path: str = "/webhook", secret: Optional[str] = None, webhook_url: Optional[str] = None):
+        """اجرای سرور وب‌هوک؛ اگر webhook_url داده شود ابتدا در بله ثبت می‌شود"""
+        await self.connect()
+        if webhook_url:
+            await self.set_webhook(webhook_url, secret_token=secret)
+        self.is_running = True
+        for update in await self._restore_offsets():
+            await self._feed_update(update)
+        try:
+            await self.webhook_server(path, secret).serve_forever(host, port)
+        finally:
+            await self._stop_commits()
+
+    async def _process_update(self, update: Update):
+        """اجرای هندلرهای منطبق با آپدیت از طریق router"""
+        if self.instrumentation is not None:
+            update_type = update.type
+            date = (update.raw.get(update_type) or {}).get("date") if update_type != "callback_query" else None
+            self.instrumentation.on_update(update_type, time.time() - date if date else None)
+        # لغو (توقف بدون drain) ack نمی‌شود تا آپدیت بعد از ری‌استارت دوباره پردازش شود
+        await self.router.dispatch(update)
+        if update.update_id is not None:
+            self.offset_store.ack(update.update_id)
+
+    def schedule_message(self, chat_id: int, text: str, delay_seconds: float) -> str:
+        """زمان‌بندی ارسال پیام؛ شناسه کار را برمی‌گرداند"""
+        job_id = self.scheduler.add("send_message", {"chat_id": chat_id, "text": text}, delay=delay_seconds)
+        logger.debug("پیام برای %s در %s ثانیه زمان‌بندی شد", chat_id, delay_seconds)
+        return job_id
+
+    def schedule(
+        self,
+        method: Union[str, Callable],
+        delay: Optional[float] = None,
+        at: Optional[float] = None,
+        interval: Optional[float] = None,
+        cron: Optional[str] = None,
+        job_id: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """زمان‌بندی هر متد کلاینت (مثلاً "send_photo") یا تابع async
+
+        interval برای تکرار هر چند ثانیه و cron برای عبارت پنج‌بخشی cron است.
+        کارهای با نام متد در job_store ذخیره می‌شوند و بعد از ری‌استارت برمی‌گردند؛
+        کارهای با تابع async فقط در حافظه می‌مانند.
+        """
+        return self.scheduler.add(method, kwargs, delay=delay, at=at, interval=interval, cron=cron, job_id=job_id)
+
+    def cancel_scheduled(self, job_id: str) -> bool:
+        """لغو کار زمان‌بندی‌شده"""
+        return self.scheduler.cancel(job_id)
+
+    async def get_chat_member(self, chat_id: int, user_id: int, fresh: bool = False) -> dict:
+        """دریافت اطلاعات عضویت کاربر در چت (از chat_cache در صورت وجود؛ fresh=True یعنی از شبکه)
+
+        دیکشنری برگشتی بین فراخوانی‌ها مشترک است و نباید تغییر داده شود.
+        """
+        def load():
+            return self._call("getChatMember", chat_id, json={"chat_id": chat_id, "user_id": user_id})
+        try:
+            if self.chat_cache is None or fresh:
+                if self.chat_cache is not None:
+                    self.chat_cache.invalidate_member(chat_id, user_id)
+                return await load()
+            return await self.chat_cache.member(chat_id, user_id, load)
+        except Exception as e:
+            logger.error("خطا در دریافت اطلاعات عضویت: %s", e, extra=_fields("getChatMember", chat_id, e))
+            raise
+
+    async def get_chat(self, chat_id: int, fresh: bool = False) -> Chat:
+        """دریافت اطلاعات چت (از chat_cache در صورت وجود)"""
+        def load():
+            return self._call("getChat", chat_id, json={"chat_id": chat_id})
+        try:
+            if self.chat_cache is None or fresh:
+                result = await load()
+            else:
+                result = await self.chat_cache.chat(chat_id, load)
+        except Exception as e:
+            logger.error("خطا در دریافت اطلاعات چت: %s", e, extra=_fields("getChat", chat_id, e))
+            raise
+        return Chat.from_dict(result, self)
+
+    async def get_chat_administrators(self, chat_id: int, fresh: bool = False) -> List[dict]:
+        """فهرست مدیران چت (از chat_cache در صورت وجود)"""
+        def load():
+            return self._call("getChatAdministrators", chat_id, json={"chat_id": chat_id})
+        try:
+            if self.chat_cache is None or fresh:
+                return await load()
+            return await self.chat_cache.administrators(chat_id, load)
+        except Exception as e:
+            logger.error("خطا در دریافت مدیران چت: %s", e, extra=_fields("getChatAdministrators", chat_id, e))
+            raise
+
+    async def get_file(self, file_id: str) -> File:
+        """اطلاعات فایل برای دانلود (file_path)"""
+        try:
+            result = await self._call("getFile", json={"file_id": file_id})
+        except Exception as e:
+            logger.error("خطا در دریافت اطلاعات فایل: %s", e, extra=_fields("getFile", None, e))
+            raise
+        file = File.from_dict(result, self)
+        if file.file_path:
+            self.file_paths.set(file_id, file.file_path)
+        return file
+
+    async def _file_path(self, file: Union[str, Any], refresh: bool = False) -> str:
+        """file_path از کش، از خود شیء File یا با getFile"""
+        file_id = file if isinstance(file, str) else file.file_id
+        if not refresh:
+            if isinstance(file, File) and file.file_path:
+                return file.file_path
+            path = self.file_paths.get(file_id)
+            if path is not None:
+                return path
+        else:
+            self.file_paths.pop(file_id)
+        path = (await self.get_file(file_id)).file_path
+        if not path:
+            raise BaleAPIError(f"file_path for {file_id} is not available")
+        return path
+
+    async def download_stream(self, file: Union[str, Any], chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """خواندن تکه‌تکه فایل (file_id یا هر شیء دارای file_id مثل PhotoSize و Document)
+
+        حافظه مصرفی به اندازه فایل بستگی ندارد؛ فقط یک تکه chunk_size بایتی در هر لحظه نگه داشته می‌شود.
+        """
+        chunk_size = chunk_size or self.download_chunk_size
         if not self.session:
             await self.connect()
+        # timeout کل برای فایل‌های بزرگ معنی ندارد؛ فقط فاصله بین خواندن‌ها محدود است
+        timeout = aiohttp.ClientTimeout(total=None, connect=self.send_connection.connect_timeout, sock_read=self.timeout)
+        for refresh in (False, True):
+            path = await self._file_path(file, refresh=refresh)
+            async with self.session.get(f"{self.file_url}/{path}", timeout=timeout) as resp:
+                if resp.status == 404 and not refresh:
+                    continue  # file_path منقضی شده است؛ یک بار دیگر با getFile
+                if resp.status != 200:
+                    raise BaleAPIError(f"Download failed with HTTP {resp.status}", error_code=resp.status)
+                async for chunk in resp.content.iter_chunked(chunk_size):
+                    if self.instrumentation is not None:
+                        self.instrumentation.on_download(len(chunk))
+                    yield chunk
+                return
+
+    async def download(self, file: Union[str, Any], dest: Any = None, chunk_size: Optional[int] = None) -> Any:
+        """دانلود فایل در dest: مسیر فایل، پوشه (با نام فایل در سرور) یا فایل باز باینری
+
+        مسیری که با جداکننده تمام شود (مثل «downloads/») پوشه حساب و در صورت نیاز ساخته می‌شود.
+        بدون dest در پوشه جاری ذخیره می‌شود. برای مسیرها ابتدا در یک فایل موقت .part نوشته و بعد جابه‌جا
+        می‌شود تا دانلود نیمه‌کاره جای فایل کامل را نگیرد. مسیر نهایی (یا همان فایل باز) برگردانده می‌شود.
+        """
+        loop = asyncio.get_running_loop()
+        if dest is not None and hasattr(dest, "write"):
+            async for chunk in self.download_stream(file, chunk_size):
+                await loop.run_in_executor(None, dest.write, chunk)
+            return dest
+        dest = os.fspath(dest) if dest is not None else "."
+        if dest.endswith((os.sep, os.altsep or os.sep)):
+            # «downloads/» یعنی پوشه، حتی اگر هنوز وجود نداشته باشد
+            await loop.run_in_executor(None, lambda: os.makedirs(dest, exist_ok=True))
+        if os.path.isdir(dest):
+            dest = os.path.join(dest, os.path.basename(await self._file_path(file)))
+        # نام یکتا تا دانلودهای هم‌زمان یک فایل روی هم ننویسند
+        fd, partial = tempfile.mkstemp(dir=os.path.dirname(dest) or ".", prefix=os.path.basename(dest) + ".", suffix=".part")
+        f = os.fdopen(fd, "wb")
         try:
-            async with self.session.post(
-                f"{self.base_url}/getChatMember",
-                json={"chat_id": chat_id, "user_id": user_id}
-            ) as resp:
-                data = await helpers.handle_response(resp)
-                if data and data.get("ok"):
-                    return data["result"]
-                raise Exception(f"Error getting chat member: {data.get('description', 'Unknown error')}")
-        except Exception as e:
-            logger.error(f"خطا در دریافت اطلاعات عضویت: {str(e)}")
+            async for chunk in self.download_stream(file, chunk_size):
+                await loop.run_in_executor(None, f.write, chunk)
+        except BaseException:
+            await loop.run_in_executor(None, f.close)
+            await loop.run_in_executor(None, os.remove, partial)
             raise
+        await loop.run_in_executor(None, f.close)
+        await loop.run_in_executor(None, os.replace, partial, dest)
+        logger.debug("فایل در %s ذخیره شد", dest)
+        return dest
+
+    async def download_many(self, files: Iterable[Union[str, Any]], dest_dir: str = ".", concurrency: int = 4, return_exceptions: bool = False) -> List[Any]:
+        """دانلود هم‌زمان چند فایل در dest_dir با حداکثر concurrency دانلود در جریان
+
+        نتیجه‌ها به ترتیب ورودی هستند؛ با return_exceptions=True خطای هر فایل به جای مسیرش برمی‌گردد.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        os.makedirs(dest_dir, exist_ok=True)
+
+        async def fetch(file):
+            async with semaphore:
+                return await self.download(file, dest_dir)
+
+        return await asyncio.gather(*(fetch(file) for file in files), return_exceptions=return_exceptions)
 
     async def __aenter__(self):
         await self.connect()
@@ -547,12 +1123,31 @@ class BaleClient:
     async def __aexit__(self, exc_type, exc, tb):
         await self.disconnect()
 
+    def stats(self) -> dict:
+        """وضعیت صف هندلرها، محدودکننده نرخ، قطع‌کننده‌ها و زمان‌بند این کلاینت"""
+        return {
+            "running": self.is_running,
+            "last_update_id": self.last_update_id,
+            "dispatcher": self.dispatcher.stats(),
+            "rate_limiter": self.rate_limiter.stats() if self.rate_limiter is not None else None,
+            "circuit_breakers": self.circuit_breakers.states(),
+            "scheduler": self.scheduler.stats(),
+            "file_cache": self.file_cache.stats() if self.file_cache is not None else None,
+            "image_processor": self.image_processor.stats() if self.image_processor is not None else None,
+            "chat_cache": self.chat_cache.stats() if self.chat_cache is not None else None,
+            "offsets": self.offset_store.stats(),
+        }
+
     def stop_polling(self):
         """توقف پولینگ"""
         self.is_running = False
+        if self._pending_fetch and not self._pending_fetch.done():
+            self._pending_fetch.cancel()
         logger.info("پولینگ متوقف شد.")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     async def handle_message(message):
         await message.reply_text(f"دریافت شد: {message.text}")
 
@@ -0,0 +1,93 @@
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson اختیاری است (pip install baleh[speed])
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONCodec:
+    """کدک JSON مبتنی بر کتابخانه استاندارد؛ پایه کدک‌های سریع‌تر"""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+    def prepare_markup(self, markup: Union[dict, str, "PreparedMarkup"]) -> "PreparedMarkup":
+        """سریال‌سازی یک‌باره کیبورد برای استفاده مکرر در reply_markup"""
+        if isinstance(markup, PreparedMarkup):
+            return markup
+        if isinstance(markup, str):
+            return PreparedMarkup(markup)
+        return PreparedMarkup(self.dumps(markup).decode("utf-8"))
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class OrjsonCodec(JSONCodec):
+    """کدک orjson؛ مستقیم bytes تولید می‌کند و از bytes می‌خواند"""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson نصب نیست")
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    name = "ujson"
+
+    def __init__(self):
+        if ujson is None:
+            raise ImportError("ujson نصب نیست")
+
+    def dumps(self, obj: Any) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return ujson.loads(data)
+
+
+class PreparedMarkup(str):
+    """reply_markup از پیش سریال‌شده؛ در هر ارسال دوباره به JSON تبدیل نمی‌شود"""
+
+    __slots__ = ()
+
+
+CODECS = {"orjson": OrjsonCodec, "ujson": UjsonCodec, "json": JSONCodec}
+
+
+def get_codec(name: Optional[str] = None) -> JSONCodec:
+    """کدک با نام داده‌شده، یا سریع‌ترین کدک نصب‌شده اگر نامی داده نشود"""
+    if name is not None:
+        try:
+            return CODECS[name]()
+        except KeyError:
+            raise ValueError(f"کدک ناشناخته: {name}") from None
+    if orjson is not None:
+        return OrjsonCodec()
+    if ujson is not None:
+        return UjsonCodec()
+    return JSONCodec()
+
+
+def prepare_markup(markup: Union[dict, str], codec: Optional[JSONCodec] = None) -> PreparedMarkup:
+    """سریال‌سازی یک کیبورد برای استفاده مکرر (مثلاً در سطح ماژول ربات)"""
+    return (codec or get_codec()).prepare_markup(markup)
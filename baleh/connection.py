@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import aiohttp
+
+
+@dataclass
+class ConnectionConfig:
+    """تنظیمات استخر اتصال و timeoutهای یک مسیر (lane) ارتباطی
+
+    limit سقف کل اتصال‌های باز و limit_per_host سقف اتصال به هر میزبان است (0 یعنی بدون سقف).
+    keepalive_timeout مدت نگه داشتن اتصال بیکار برای استفاده دوباره و dns_cache_ttl مدت کش DNS است.
+    connect_timeout، read_timeout و total_timeout به ترتیب برای برقراری اتصال، فاصله بین خواندن‌ها
+    و کل درخواست هستند (None یعنی بدون محدودیت).
+    """
+
+    limit: int = 100
+    limit_per_host: int = 0
+    keepalive_timeout: float = 30.0
+    dns_cache_ttl: Optional[int] = 300
+    connect_timeout: Optional[float] = 10.0
+    read_timeout: Optional[float] = None
+    total_timeout: Optional[float] = None
+    ssl: Any = None
+
+    def connector(self) -> aiohttp.TCPConnector:
+        kwargs = {}
+        if self.ssl is not None:
+            kwargs["ssl"] = self.ssl  # پیش‌فرض aiohttp: بررسی کامل گواهی
+        # force_close خاموش می‌ماند تا اتصال‌های keep-alive بین درخواست‌ها دوباره استفاده شوند
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=self.dns_cache_ttl is not None,
+            ttl_dns_cache=self.dns_cache_ttl,
+            **kwargs,
+        )
+
+    def timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=self.total_timeout,
+            connect=self.connect_timeout,
+            sock_read=self.read_timeout,
+        )
+
+
+def send_lane(timeout: Optional[float] = 30) -> ConnectionConfig:
+    """تنظیمات پیش‌فرض مسیر ارسال: استخر بزرگ برای بیشترین توان خروجی"""
+    return ConnectionConfig(limit=100, limit_per_host=100, total_timeout=timeout)
+
+
+def poll_lane() -> ConnectionConfig:
+    """تنظیمات پیش‌فرض مسیر getUpdates
+
+    دو اتصال کافی است: یک long poll در جریان و یکی برای دسته بعدی که زودتر گرفته می‌شود.
+    read_timeout هر درخواست از روی مدت long poll تعیین می‌شود.
+    """
+    return ConnectionConfig(limit=2, limit_per_host=2, keepalive_timeout=60.0)
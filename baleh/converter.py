@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+from .utils import helpers
+
+logger = logging.getLogger(__name__)
+
+
+class MediaConverter:
+    """تبدیل غیرمسدودکننده رسانه با ffmpeg، همراه با کش روی دیسک و ادغام درخواست‌های هم‌زمان"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_concurrency: int = 2, ffmpeg: str = "ffmpeg", timeout: Optional[float] = 120, hasher: Optional[helpers.ContentHasher] = None):
+        """hasher هش محتوای فایل‌ها را به خاطر می‌سپارد؛ کلاینت آن را با کش file_id و ImageProcessor شریک می‌کند"""
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "baleh-media-cache")
+        self.ffmpeg = ffmpeg
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.hasher = hasher or helpers.ContentHasher()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.conversions = 0
+
+    async def tgs_to_webm(self, source: str, size: int = 512, fps: int = 30) -> str:
+        """تبدیل TGS به WebM و برگرداندن مسیر خروجی در کش"""
+        args = ["-c:v", "libvpx-vp9", "-an", "-s", f"{size}x{size}", "-r", str(fps)]
+        return await self.convert(source, args, suffix=".webm")
+
+    async def convert(self, source: str, args: List[str], suffix: str) -> str:
+        """اجرای ffmpeg -i source args روی فایل و کش کردن خروجی بر اساس هش محتوا و پارامترها"""
+        digest = await self.hasher.digest(source)
+        params = hashlib.sha256(json.dumps([args, suffix]).encode()).hexdigest()[:16]
+        key = f"{digest}-{params}"
+        target = os.path.join(self.cache_dir, key + suffix)
+        if os.path.exists(target):
+            self.hits += 1
+            return target
+
+        # اگر همین فایل در حال تبدیل است، منتظر همان نتیجه می‌مانیم
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+        else:
+            inflight = helpers.shared_task(self._inflight, key, lambda: self._run(source, args, target, suffix))
+        await asyncio.shield(inflight)
+        return target
+
+    async def _run(self, source: str, args: List[str], target: str, suffix: str):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # نام یکتا برای خروجی موقت تا تبدیل‌های هم‌زمان روی هم ننویسند
+        fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=self.cache_dir)
+        os.close(fd)
+        try:
+            async with self._semaphore:
+                process = await asyncio.create_subprocess_exec(
+                    self.ffmpeg, "-y", "-i", source, *args, temp_path,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                try:
+                    _, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    process.kill()
+                    await process.wait()
+                    raise
+            if process.returncode != 0:
+                detail = stderr.decode(errors="replace").strip().splitlines()[-1:] if stderr else []
+                logger.error("خطا در تبدیل %s: %s", source, " ".join(detail))
+                raise Exception(f"تبدیل {os.path.basename(source)} ناموفق بود")
+            os.replace(temp_path, target)
+            self.conversions += 1
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "conversions": self.conversions, "inflight": len(self._inflight)}
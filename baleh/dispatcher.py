@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# علامتی که یک worker را بعد از تمام کردن کار فعلی‌اش خارج می‌کند
+_RETIRE = object()
+
+
+class Dispatcher:
+    """اجرای هم‌زمان آپدیت‌ها با حفظ ترتیب برای هر چت"""
+
+    def __init__(self, process: Callable[[Any], Awaitable[Any]], workers: int = 8, max_pending: int = 1000):
+        """process برای هر آپدیت صدا زده می‌شود؛ max_pending سقف آپدیت‌های در صف است"""
+        if workers < 1:
+            raise ValueError("تعداد workerها باید حداقل ۱ باشد")
+        if max_pending < 1:
+            raise ValueError("max_pending باید حداقل ۱ باشد")
+        self.process = process
+        self.workers = workers
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._active: Dict[Any, Deque[Any]] = {}
+        self._unfinished = 0
+        self._retiring = 0
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def pending(self) -> int:
+        """تعداد آپدیت‌هایی که هنوز پردازششان تمام نشده"""
+        return self._unfinished
+
+    def start(self):
+        """راه‌اندازی workerها (باید داخل event loop صدا زده شود)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closing = False
+        self._retiring = 0
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    def resize(self, workers: int):
+        """تغییر تعداد workerها در حین اجرا؛ workerهای اضافه بعد از کارهای از قبل در صف خارج می‌شوند"""
+        if workers < 1:
+            raise ValueError("تعداد workerها باید حداقل ۱ باشد")
+        self.workers = workers
+        if not self._tasks:
+            return
+        self._tasks = [task for task in self._tasks if not task.done()]
+        current = len(self._tasks) - self._retiring
+        if workers > current:
+            self._tasks.extend(asyncio.ensure_future(self._worker()) for _ in range(workers - current))
+        for _ in range(current - workers):
+            self._retiring += 1
+            self._queue.put_nowait((_RETIRE, None))
+
+    async def put(self, key: Any, item: Any):
+        """قرار دادن آپدیت در صف؛ اگر صف پر باشد تا آزاد شدن جا صبر می‌کند"""
+        if self._closing:
+            raise RuntimeError("Dispatcher در حال توقف است")
+        if not self._tasks:
+            self.start()
+        await self._slots.acquire()
+        self._unfinished += 1
+        self._idle.clear()
+        self._queue.put_nowait((key, item))
+
+    async def _worker(self):
+        while True:
+            key, item = await self._queue.get()
+            if key is _RETIRE:
+                self._retiring -= 1
+                return
+            pending = self._active.get(key)
+            if pending is not None:
+                # یک worker دیگر در حال پردازش همین چت است؛ ترتیب حفظ می‌شود
+                pending.append(item)
+                continue
+            pending = self._active[key] = deque()
+            try:
+                await self._run(item)
+                while pending:
+                    await self._run(pending.popleft())
+            finally:
+                del self._active[key]
+
+    async def _run(self, item: Any):
+        try:
+            await self.process(item)
+        except asyncio.CancelledError:
+            # لغو خود worker (stop، task.cancel یا بسته شدن loop) همیشه منتقل می‌شود؛ فقط CancelledError
+            # که از داخل هندلر آمده worker را زنده نگه می‌دارد. بدون Task.cancelling (قبل از 3.11) این
+            # دو قابل تشخیص نیستند و لغو همیشه منتقل می‌شود.
+            cancelling = getattr(asyncio.current_task(), "cancelling", None)
+            if cancelling is None or cancelling():
+                raise
+            logger.error("هندلر با CancelledError پایان یافت")
+        except Exception as e:
+            logger.error("خطا در اجرای هندلر: %s", e)
+        finally:
+            self._unfinished -= 1
+            self._slots.release()
+            if self._unfinished == 0:
+                self._idle.set()
+
+    async def join(self, timeout: Optional[float] = None) -> bool:
+        """صبر تا پردازش همه آپدیت‌های در صف؛ در صورت تمام شدن زمان False برمی‌گرداند"""
+        if not self._tasks:
+            return True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self, drain: bool = True, timeout: Optional[float] = 10):
+        """توقف workerها؛ با drain=True ابتدا صف خالی می‌شود و بعد باقی‌مانده‌ها لغو می‌شوند"""
+        if not self._tasks:
+            return
+        self._closing = True
+        if drain and not await self.join(timeout):
+            logger.warning("%d آپدیت در زمان توقف پردازش نشد و لغو شد", self._unfinished)
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._active.clear()
+        self._unfinished = 0
+        self._closing = False
+
+    def stats(self) -> Dict[str, int]:
+        """وضعیت فعلی صف برای مانیتورینگ"""
+        return {
+            "workers": self.workers if self._tasks else 0,
+            "pending": self._unfinished,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "active_chats": len(self._active),
+        }
@@ -0,0 +1,33 @@
+from typing import Optional
+
+
+class BaleAPIError(Exception):
+    """خطای برگشتی از API بله (پاسخ با ok=false)"""
+
+    def __init__(self, description: str, error_code: Optional[int] = None, parameters: Optional[dict] = None):
+        super().__init__(description)
+        self.description = description
+        self.error_code = error_code
+        self.parameters = parameters or {}
+
+    def __str__(self):
+        if self.error_code is not None:
+            return f"[{self.error_code}] {self.description}"
+        return self.description
+
+
+class RetryAfter(BaleAPIError):
+    """خطای 429؛ باید retry_after ثانیه قبل از درخواست بعدی صبر کرد"""
+
+    def __init__(self, description: str, error_code: Optional[int] = 429, parameters: Optional[dict] = None):
+        super().__init__(description, error_code, parameters)
+        self.retry_after = float(self.parameters.get("retry_after") or 1)
+
+
+class CircuitOpenError(Exception):
+    """درخواست به خاطر باز بودن مدار endpoint فوراً رد شد"""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit open for {endpoint}; retry in {retry_in:.1f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import inspect
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .uploads import InputFile
+from .utils import helpers
+
+logger = logging.getLogger(__name__)
+
+
+class FileIdCache:
+    """پایه کش file_id بر اساس هش محتوا و نوع رسانه"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.hasher = helpers.ContentHasher()
+
+    def _get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def _set(self, key: str, file_id: str):
+        raise NotImplementedError
+
+    def _delete(self, key: str):
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[str]:
+        file_id = self._get(key)
+        if file_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return file_id
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """مثل get برای استفاده داخل event loop؛ ذخیره‌سازهای دیسکی خواندن را در executor انجام می‌دهند"""
+        file_id = await self._lookup(key)
+        if file_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return file_id
+
+    async def _lookup(self, key: str) -> Optional[str]:
+        return self._get(key)
+
+    def set(self, key: str, file_id: str):
+        self._set(key, file_id)
+
+    def invalidate(self, key: str):
+        """حذف file_id که API دیگر قبولش نمی‌کند"""
+        self.invalidations += 1
+        self._delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def key_for(self, media_type: str, input_file: InputFile) -> Optional[str]:
+        """کلید کش برای فایل؛ برای file_id و استریم‌های غیرقابل تکرار None برمی‌گرداند"""
+        digest = await self._content_hash(input_file)
+        if digest is None:
+            return None
+        return f"{media_type}:{digest}"
+
+    async def _content_hash(self, input_file: InputFile) -> Optional[str]:
+        kind = input_file.kind
+        loop = asyncio.get_running_loop()
+        if kind in ("bytes", "path"):
+            return await self.hasher.digest(input_file.source)
+        if kind == "fileobj" and input_file.replayable and not inspect.iscoroutinefunction(input_file.source.read):
+            return await loop.run_in_executor(None, _hash_fileobj, input_file.source)
+        return None
+
+
+def _hash_fileobj(f) -> str:
+    h = hashlib.sha256()
+    start = f.tell()
+    try:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    finally:
+        f.seek(start)
+    return h.hexdigest()
+
+
+class MemoryFileIdCache(FileIdCache):
+    """کش LRU در حافظه"""
+
+    def __init__(self, maxsize: int = 10000):
+        super().__init__()
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+
+    def _get(self, key: str) -> Optional[str]:
+        file_id = self._data.get(key)
+        if file_id is not None:
+            self._data.move_to_end(key)
+        return file_id
+
+    def _set(self, key: str, file_id: str):
+        self._data[key] = file_id
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def _delete(self, key: str):
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteFileIdCache(FileIdCache):
+    """کش ماندگار در فایل SQLite که بعد از ری‌استارت هم باقی می‌ماند
+
+    نوشتن‌ها در حافظه جمع می‌شوند و حداکثر بعد از flush_interval ثانیه در یک تراکنش و در
+    executor نوشته می‌شوند؛ خواندن‌های lookup هم در executor انجام می‌شوند.
+    """
+
+    def __init__(self, path: str = "baleh_file_ids.sqlite3", flush_interval: float = 1.0):
+        super().__init__()
+        self.path = path
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_ids (key TEXT PRIMARY KEY, file_id TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.commit()
+        # key -> (file_id، زمان) یا None برای حذف؛ تا flush بعدی منبع معتبر همین است
+        self._pending: Dict[str, Optional[Tuple[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._pending:
+                entry = self._pending[key]
+                return entry[0] if entry is not None else None
+        with self._db_lock:
+            row = self._conn.execute("SELECT file_id FROM file_ids WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    async def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._pending:
+                entry = self._pending[key]
+                return entry[0] if entry is not None else None
+        return await asyncio.get_running_loop().run_in_executor(None, self._get, key)
+
+    def _set(self, key: str, file_id: str):
+        with self._lock:
+            self._pending[key] = (file_id, time.time())
+        self._schedule_flush()
+
+    def _delete(self, key: str):
+        with self._lock:
+            self._pending[key] = None
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()  # بیرون از event loop نوشتن مستقیم مشکلی ندارد
+            return
+        self._flush_handle = loop.call_later(self.flush_interval, self._flush_in_executor, loop)
+
+    def _flush_in_executor(self, loop: asyncio.AbstractEventLoop):
+        self._flush_handle = None
+        loop.run_in_executor(None, self.flush).add_done_callback(_log_flush_error)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    def flush(self):
+        """نوشتن تغییرات جمع‌شده در یک تراکنش"""
+        with self._db_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, {}
+            upserts = [(key, entry[0], entry[1]) for key, entry in pending.items() if entry is not None]
+            deletes = [(key,) for key, entry in pending.items() if entry is None]
+            try:
+                with self._conn:
+                    if upserts:
+                        self._conn.executemany("INSERT OR REPLACE INTO file_ids (key, file_id, updated) VALUES (?, ?, ?)", upserts)
+                    if deletes:
+                        self._conn.executemany("DELETE FROM file_ids WHERE key = ?", deletes)
+            except BaseException:
+                # تغییرات تازه‌تر از همین کلیدها نباید با مقدار قدیمی جایگزین شوند
+                with self._lock:
+                    for key, entry in pending.items():
+                        self._pending.setdefault(key, entry)
+                raise
+
+    def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+
+def _log_flush_error(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("خطا در ذخیره file_idها: %s", future.exception())
+
+
+def extract_file_id(result: dict, field: str) -> Optional[str]:
+    """بیرون کشیدن file_id از پیام برگشتی sendX"""
+    for name in (field, "animation", "video", "document", "audio", "voice", "sticker", "video_note"):
+        media = result.get(name)
+        if isinstance(media, list) and media:
+            # برای عکس بزرگ‌ترین سایز در انتهای لیست است
+            media = media[-1]
+        if isinstance(media, dict) and media.get("file_id"):
+            return media["file_id"]
+    return None
+
+
+def is_stale_file_id_error(error: Exception) -> bool:
+    """آیا خطای API به خاطر file_id نامعتبر یا منقضی است"""
+    description = str(getattr(error, "description", "") or "").lower()
+    return getattr(error, "error_code", None) == 400 and "file" in description
@@ -0,0 +1,205 @@
+import asyncio
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+
+from PIL import Image, ImageOps
+
+from .uploads import InputFile
+from .utils import helpers
+
+_EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp", "PNG": "png"}
+
+
+def _open(source: Union[bytes, str]) -> Image.Image:
+    # بارگذاری پیکسل‌ها تا اولین عملیات عقب می‌افتد تا draft برای JPEG اثر کند
+    return Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def _has_metadata(image: Image.Image) -> bool:
+    return any(key in image.info for key in ("exif", "icc_profile", "xmp", "XML:com.adobe.xmp")) or bool(getattr(image, "text", None))
+
+
+def _flatten(image: Image.Image, mode: str) -> Image.Image:
+    """تبدیل به RGB (با زمینه سفید برای شفافیت) یا RGBA"""
+    if mode == "RGBA":
+        return image if image.mode == "RGBA" else image.convert("RGBA")
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def process_photo(source: Union[bytes, str], max_size: Tuple[int, int], fmt: str, quality: int) -> Optional[bytes]:
+    """کوچک‌کردن و کدگذاری دوباره عکس بدون متادیتا؛ None یعنی فایل اصلی بهتر است
+
+    در worker (نخ یا فرایند) اجرا می‌شود و باید تابعی در سطح ماژول بماند.
+    """
+    image = _open(source)
+    original_size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+    fits = image.width <= max_size[0] and image.height <= max_size[1]
+    already_compact = image.format in ("JPEG", "WEBP") and not _has_metadata(image) and fits
+    if not fits and image.format == "JPEG":
+        # کدگشایی مستقیم در مقیاس کوچک‌تر (DCT scaling)؛ چند برابر سریع‌تر از کدگشایی کامل
+        image.draft("RGB", max_size)
+    # جهت EXIF قبل از حذف متادیتا روی پیکسل‌ها اعمال می‌شود
+    image = ImageOps.exif_transpose(image)
+    if not fits:
+        image.thumbnail(max_size, Image.LANCZOS)
+    image = _flatten(image, "RGBA" if fmt == "WEBP" and image.mode in ("RGBA", "LA", "P") else "RGB")
+    output = io.BytesIO()
+    # بدون exif و icc_profile ذخیره می‌شود تا متادیتا (مثل موقعیت GPS) حذف شود
+    image.save(output, fmt, quality=quality, optimize=True)
+    data = output.getvalue()
+    if already_compact and len(data) >= original_size:
+        return None
+    return data
+
+
+def process_sticker(source: Union[bytes, str], size: int, quality: int) -> Optional[bytes]:
+    """تبدیل استیکر به WebP با ضلع بزرگ‌تر size پیکسل؛ برای استیکر متحرک None برمی‌گرداند"""
+    image = _open(source)
+    if getattr(image, "is_animated", False):
+        return None
+    image = ImageOps.exif_transpose(image)
+    image = _flatten(image, "RGBA")
+    scale = size / max(image.width, image.height)
+    if scale != 1:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, "WEBP", quality=quality, method=4)
+    return output.getvalue()
+
+
+class ImageProcessor:
+    """پیش‌پردازش اختیاری عکس و استیکر قبل از آپلود، در استخر نخ یا فرایند
+
+    عکس‌ها تا max_size کوچک و با photo_format (JPEG یا WEBP) و quality دوباره کدگذاری می‌شوند؛
+    استیکرها به WebP با ضلع sticker_size تبدیل می‌شوند. متادیتا (EXIF، ICC، XMP) همیشه حذف می‌شود.
+    نتیجه بر اساس هش محتوا و پارامترها در حافظه کش می‌شود (تا cache_bytes بایت) و درخواست‌های
+    هم‌زمان برای یک فایل فقط یک بار پردازش می‌شوند. با processes=True کار در ProcessPoolExecutor
+    انجام می‌شود (برای تصاویر خیلی بزرگ یا هسته‌های زیاد)؛ می‌توان executor دلخواه هم داد.
+    """
+
+    def __init__(
+        self,
+        max_size: Tuple[int, int] = (1280, 1280),
+        photo_format: str = "JPEG",
+        quality: int = 85,
+        sticker_size: int = 512,
+        sticker_quality: int = 90,
+        max_workers: Optional[int] = None,
+        processes: bool = False,
+        executor: Optional[Executor] = None,
+        cache_bytes: int = 64 * 1024 * 1024,
+    ):
+        photo_format = photo_format.upper()
+        if photo_format not in ("JPEG", "WEBP"):
+            raise ValueError("photo_format باید JPEG یا WEBP باشد")
+        self.max_size = tuple(max_size)
+        self.photo_format = photo_format
+        self.quality = quality
+        self.sticker_size = sticker_size
+        self.sticker_quality = sticker_quality
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.processes = processes
+        self.cache_bytes = cache_bytes
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._cache: "OrderedDict[str, Optional[bytes]]" = OrderedDict()
+        self._cached_bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hasher = helpers.ContentHasher()
+        self.hits = 0
+        self.processed = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.max_workers)
+        return self._executor
+
+    async def photo(self, file: InputFile) -> InputFile:
+        """نسخه پیش‌پردازش‌شده عکس (یا همان ورودی اگر قابل پردازش یا کوچک‌تر نباشد)"""
+        params = ("photo", self.max_size, self.photo_format, self.quality)
+        ext = _EXTENSIONS[self.photo_format]
+        return await self._process(file, params, ext, process_photo, self.max_size, self.photo_format, self.quality)
+
+    async def sticker(self, file: InputFile) -> InputFile:
+        """استیکر WebP با ضلع sticker_size"""
+        params = ("sticker", self.sticker_size, self.sticker_quality)
+        return await self._process(file, params, "webp", process_sticker, self.sticker_size, self.sticker_quality)
+
+    async def _process(self, file: InputFile, params: tuple, ext: str, func, *args) -> InputFile:
+        # فقط مسیر و bytes پردازش می‌شوند؛ file_id و استریم‌ها همان‌طور فرستاده می‌شوند
+        if file.kind not in ("path", "bytes"):
+            return file
+        if file.kind == "bytes":
+            source = file.source if isinstance(file.source, bytes) else bytes(file.source)
+        else:
+            source = os.fspath(file.source)
+        digest = await self.hasher.digest(source)
+        key = f"{digest}:{params!r}"
+
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            data = self._cache[key]
+        else:
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self.hits += 1
+            else:
+                inflight = helpers.shared_task(self._inflight, key, lambda: self._run(key, source, func, args))
+            data = await asyncio.shield(inflight)
+        if data is None:
+            return file
+        stem = os.path.splitext(file.filename)[0] if file.filename else "image"
+        return InputFile(data, filename=f"{stem}.{ext}", chunk_size=file.chunk_size)
+
+    async def _run(self, key: str, source: Union[bytes, str], func, args: tuple) -> Optional[bytes]:
+        data = await asyncio.get_running_loop().run_in_executor(self._pool(), func, source, *args)
+        self._remember(key, data)
+        original_size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+        self.bytes_in += original_size
+        if data is None:
+            self.skipped += 1
+            self.bytes_out += original_size
+        else:
+            self.processed += 1
+            self.bytes_out += len(data)
+        return data
+
+    def _remember(self, key: str, data: Optional[bytes]):
+        size = len(data) if data is not None else 0
+        if size > self.cache_bytes:
+            return
+        self._cache[key] = data
+        self._cached_bytes += size
+        while self._cached_bytes > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted) if evicted is not None else 0
+
+    def close(self):
+        """بستن استخر ساخته‌شده توسط خود پردازشگر"""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "hits": self.hits,
+            "inflight": len(self._inflight),
+            "cached": len(self._cache),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
@@ -0,0 +1,136 @@
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# فیلدهای ساخت‌یافته‌ای که کتابخانه در extra لاگ‌ها می‌گذارد؛ متن پیام‌ها هیچ‌وقت لاگ نمی‌شود
+STRUCTURED_FIELDS = ("endpoint", "chat_id", "latency", "attempt", "error_code", "retry_after", "update_id", "handler", "job_id", "bot")
+
+LOGGER_NAME = "baleh"
+
+
+class RateLimitFilter(logging.Filter):
+    """محدودکننده لاگ‌های تکراری (مثلاً هنگام قطعی API)
+
+    رکوردهایی با سطح level یا بالاتر بر اساس (logger، قالب پیام، سطح) گروه‌بندی می‌شوند: در هر
+    interval ثانیه فقط burst رکورد اول عبور می‌کند و بعد از آن از هر sample_every رکورد یکی
+    (0 یعنی هیچ‌کدام). تعداد رکوردهای حذف‌شده در فیلد suppressed اولین رکورد عبوری بعدی می‌آید.
+    """
+
+    def __init__(self, burst: int = 10, interval: float = 60.0, sample_every: int = 100, level: int = logging.WARNING, max_keys: int = 1000):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.sample_every = sample_every
+        self.level = level
+        self.max_keys = max_keys
+        self.suppressed = 0
+        self._windows: Dict[Tuple[str, str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level:
+            return True
+        key = (record.name, str(record.msg), record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if window is None and len(self._windows) >= self.max_keys:
+                    self._windows.clear()
+                dropped = window[2] if window is not None else 0
+                window = self._windows[key] = [now, 0, dropped]
+            window[1] += 1
+            seen = window[1]
+            if seen > self.burst and not (self.sample_every and (seen - self.burst) % self.sample_every == 0):
+                window[2] += 1
+                self.suppressed += 1
+                return False
+            dropped, window[2] = window[2], 0
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """قالب JSON یک‌خطی با فیلدهای ساخت‌یافته (endpoint، chat_id، latency و ...)"""
+
+    def __init__(self, fields: Iterable[str] = STRUCTURED_FIELDS + ("suppressed",)):
+        super().__init__()
+        self.fields = tuple(fields)
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in self.fields:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LogPipeline:
+    """هندلر صف روی logger کتابخانه و QueueListener که I/O لاگ را به یک نخ جدا می‌برد"""
+
+    def __init__(self, logger: logging.Logger, queue_handler: logging.Handler, listener: Optional[logging.handlers.QueueListener]):
+        self.logger = logger
+        self.handler = queue_handler
+        self.listener = listener
+
+    def stop(self):
+        """خالی کردن صف و برداشتن هندلر"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.logger.removeHandler(self.handler)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def setup_logging(
+    level: int = logging.INFO,
+    handler: Optional[logging.Handler] = None,
+    use_queue: bool = True,
+    rate_limit: Optional[RateLimitFilter] = None,
+    structured: bool = False,
+    logger_name: str = LOGGER_NAME,
+) -> LogPipeline:
+    """پیکربندی اختیاری لاگ‌های baleh (کتابخانه خودش هیچ پیکربندی سراسری انجام نمی‌دهد)
+
+    handler مقصد نهایی است (پیش‌فرض StreamHandler). با use_queue=True رکوردها فقط در یک صف
+    گذاشته می‌شوند و نوشتن در handler در نخ QueueListener انجام می‌شود تا event loop منتظر I/O
+    نماند. rate_limit (پیش‌فرض RateLimitFilter()) قبل از صف اعمال می‌شود تا لاگ‌های حذف‌شده هیچ
+    هزینه‌ای نداشته باشند. structured=True قالب JSONFormatter را روی handler می‌گذارد.
+    لاگ‌های baleh دیگر به logger ریشه نمی‌رسند؛ pipeline.stop() را هنگام خروج صدا بزنید.
+    """
+    logger = logging.getLogger(logger_name)
+    handler = handler or logging.StreamHandler()
+    if structured:
+        handler.setFormatter(JSONFormatter())
+    elif handler.formatter is None:
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    listener = None
+    if use_queue:
+        entry: logging.Handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+        listener = logging.handlers.QueueListener(entry.queue, handler, respect_handler_level=True)
+        listener.start()
+    else:
+        entry = handler
+    entry.addFilter(rate_limit or RateLimitFilter())
+    logger.addHandler(entry)
+    logger.setLevel(level)
+    logger.propagate = False
+    return LogPipeline(logger, entry, listener)
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+import aiohttp
+
+from .client import BaleClient
+from .connection import ConnectionConfig, send_lane
+from .converter import MediaConverter
+
+logger = logging.getLogger(__name__)
+
+
+def shared_poll_lane() -> ConnectionConfig:
+    """مسیر getUpdates مشترک: هر ربات یک long poll باز دارد، پس سقف اتصال نمی‌گذاریم"""
+    return ConnectionConfig(limit=0, limit_per_host=0, keepalive_timeout=60.0)
+
+
+class BotManager:
+    """میزبانی چند ربات در یک فرایند با استخر اتصال مشترک
+
+    هر ربات BaleClient خودش را دارد (هندلرها، offset، محدودکننده نرخ و زمان‌بند جدا)
+    اما همه روی دو اتصال‌دهنده مشترک (ارسال و getUpdates) و یک MediaConverter کار می‌کنند.
+    """
+
+    def __init__(
+        self,
+        send_connection: Optional[ConnectionConfig] = None,
+        poll_connection: Optional[ConnectionConfig] = None,
+        converter: Optional[MediaConverter] = None,
+        **client_defaults: Any,
+    ):
+        self.send_connection = send_connection or send_lane(client_defaults.get("timeout", 30))
+        self.poll_connection = poll_connection or shared_poll_lane()
+        self.converter = converter or MediaConverter()
+        self.client_defaults = client_defaults
+        self.bots: Dict[str, BaleClient] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._connector: Optional[aiohttp.BaseConnector] = None
+        self._poll_connector: Optional[aiohttp.BaseConnector] = None
+        self._running = False
+        self._stopped: Optional[asyncio.Event] = None
+
+    def add_bot(self, token: str, name: Optional[str] = None, **kwargs: Any) -> BaleClient:
+        """افزودن ربات (در حین اجرا هم ممکن است)؛ name کلید ربات است و پیش‌فرض آن خود توکن است"""
+        name = name or token
+        if name in self.bots:
+            raise ValueError(f"ربات {name} قبلاً اضافه شده است")
+        options = dict(self.client_defaults)
+        options.update(kwargs)
+        options.setdefault("converter", self.converter)
+        options.setdefault("send_connection", self.send_connection)
+        options.setdefault("poll_connection", self.poll_connection)
+        client = BaleClient(token, **options)
+        self.bots[name] = client
+        if self._running:
+            self._attach(name, client)
+        return client
+
+    async def remove_bot(self, name: str):
+        """توقف پولینگ و بستن نشست‌های یک ربات؛ اتصال‌دهنده‌های مشترک باز می‌مانند"""
+        client = self.bots.pop(name)
+        await self._stop_bot(name, client)
+        logger.info("ربات %s حذف شد", name)
+
+    async def _stop_bot(self, name: str, client: BaleClient):
+        """توقف پولینگ و بستن نشست‌های ربات بدون حذف آن از فهرست"""
+        task = self._tasks.pop(name, None)
+        client.stop_polling()
+        if task is not None:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + 10
+            while not task.done():
+                await asyncio.wait({task}, timeout=0.1)
+                if client.is_running:
+                    # start_polling که هنوز شروع نشده بود is_running را دوباره True کرده است
+                    client.stop_polling()
+                if loop.time() >= deadline:
+                    task.cancel()
+                    break
+            # خطای پولینگ قبلاً در _on_done لاگ شده است
+            await asyncio.gather(task, return_exceptions=True)
+        await client.disconnect()
+
+    def _attach(self, name: str, client: BaleClient):
+        client._connector = self._connector
+        client._poll_connector = self._poll_connector
+        task = asyncio.ensure_future(client.start_polling())
+        task.add_done_callback(lambda t, name=name: self._on_done(name, t))
+        self._tasks[name] = task
+
+    def _on_done(self, name: str, task: asyncio.Task):
+        if self._tasks.get(name) is task:
+            del self._tasks[name]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("پولینگ ربات %s با خطا متوقف شد: %s", name, task.exception(), extra={"bot": name})
+
+    async def start(self):
+        """ساخت اتصال‌دهنده‌های مشترک و شروع پولینگ همه ربات‌ها"""
+        if self._running:
+            return
+        self._connector = self.send_connection.connector()
+        self._poll_connector = self.poll_connection.connector()
+        self._stopped = asyncio.Event()
+        self._running = True
+        for name, client in self.bots.items():
+            self._attach(name, client)
+        logger.info("%d ربات شروع به کار کردند", len(self.bots))
+
+    async def stop(self):
+        """توقف همه ربات‌ها و بستن اتصال‌دهنده‌های مشترک؛ ربات‌ها ثبت‌شده می‌مانند و start دوباره آن‌ها را اجرا می‌کند"""
+        if not self._running:
+            return
+        self._running = False
+        await asyncio.gather(*(self._stop_bot(name, client) for name, client in list(self.bots.items())), return_exceptions=True)
+        await self._connector.close()
+        await self._poll_connector.close()
+        self._connector = self._poll_connector = None
+        self._stopped.set()
+
+    async def run(self):
+        """اجرا تا زمان فراخوانی stop"""
+        await self.start()
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.stop()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """آمار هر ربات به تفکیک نام"""
+        return {name: dict(client.stats(), polling=name in self._tasks) for name, client in self.bots.items()}
+
+    def __getitem__(self, name: str) -> BaleClient:
+        return self.bots[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.bots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.bots))
+
+    def __len__(self) -> int:
+        return len(self.bots)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.bots)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+
+# نام جایگزین برای کسانی که آن را استخر کلاینت می‌دانند
+BaleClientPool = BotManager
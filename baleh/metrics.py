@@ -0,0 +1,309 @@
+import asyncio
+import bisect
+import logging
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LAG_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+BATCH_BUCKETS = (0, 1, 5, 10, 25, 50, 100)
+
+
+class Instrumentation:
+    """هوک‌های ابزارگذاری کلاینت؛ همه متدها به‌صورت پیش‌فرض کاری انجام نمی‌دهند
+
+    مقدار برگشتی on_request_start و on_handler_start به متد پایانی متناظر داده می‌شود.
+    وقتی کلاینت instrumentation نداشته باشد هیچ‌کدام صدا زده نمی‌شوند.
+    """
+
+    def on_request_start(self, endpoint: str) -> Any:
+        return None
+
+    def on_request_end(self, endpoint: str, context: Any, duration: float, error: Optional[BaseException]):
+        pass
+
+    def on_upload(self, field: str, size: int):
+        pass
+
+    def on_download(self, size: int):
+        pass
+
+    def on_poll(self, batch_size: int, duration: float):
+        pass
+
+    def on_update(self, update_type: Optional[str], lag: Optional[float]):
+        pass
+
+    def on_handler_start(self, handler: str) -> Any:
+        return None
+
+    def on_handler_done(self, handler: str, context: Any, duration: float, error: Optional[BaseException]):
+        pass
+
+    def on_job(self, func: str, lateness: float):
+        pass
+
+
+class MultiInstrumentation(Instrumentation):
+    """ارسال هر رویداد به چند ابزار (مثلاً Metrics و OpenTelemetry با هم)"""
+
+    def __init__(self, instruments: Iterable[Instrumentation]):
+        self.instruments = list(instruments)
+
+    def on_request_start(self, endpoint):
+        return [instrument.on_request_start(endpoint) for instrument in self.instruments]
+
+    def on_request_end(self, endpoint, context, duration, error):
+        for instrument, ctx in zip(self.instruments, context):
+            instrument.on_request_end(endpoint, ctx, duration, error)
+
+    def on_upload(self, field, size):
+        for instrument in self.instruments:
+            instrument.on_upload(field, size)
+
+    def on_download(self, size):
+        for instrument in self.instruments:
+            instrument.on_download(size)
+
+    def on_poll(self, batch_size, duration):
+        for instrument in self.instruments:
+            instrument.on_poll(batch_size, duration)
+
+    def on_update(self, update_type, lag):
+        for instrument in self.instruments:
+            instrument.on_update(update_type, lag)
+
+    def on_handler_start(self, handler):
+        return [instrument.on_handler_start(handler) for instrument in self.instruments]
+
+    def on_handler_done(self, handler, context, duration, error):
+        for instrument, ctx in zip(self.instruments, context):
+            instrument.on_handler_done(handler, ctx, duration, error)
+
+    def on_job(self, func, lateness):
+        for instrument in self.instruments:
+            instrument.on_job(func, lateness)
+
+
+class Histogram:
+    """هیستوگرام تجمعی با مرزهای ثابت (سازگار با Prometheus)"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((_format_number(bound), total))
+        result.append(("+Inf", self.count))
+        return result
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value)) + ".0"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Metrics(Instrumentation):
+    """جمع‌آوری متریک‌ها در حافظه و خروجی متنی Prometheus
+
+    متریک‌های لحظه‌ای (عمق صف‌ها، تأخیر زمان‌بند و ...) هنگام خواندن از کلاینت‌های متصل گرفته می‌شوند.
+    """
+
+    def __init__(self, latency_buckets: Sequence[float] = LATENCY_BUCKETS, prefix: str = "baleh"):
+        self.prefix = prefix
+        self.latency_buckets = latency_buckets
+        self.requests: Dict[str, int] = {}
+        self.request_errors: Dict[Tuple[str, str], int] = {}
+        self.request_latency: Dict[str, Histogram] = {}
+        self.upload_bytes: Dict[str, int] = {}
+        self.download_bytes = 0
+        self.poll_batch = Histogram(BATCH_BUCKETS)
+        self.poll_duration = Histogram(latency_buckets)
+        self.updates: Dict[str, int] = {}
+        self.update_lag = Histogram(LAG_BUCKETS)
+        self.handler_time: Dict[str, Histogram] = {}
+        self.handler_errors: Dict[str, int] = {}
+        self.job_lateness = Histogram(latency_buckets)
+        self._clients = weakref.WeakSet()
+        self._runner: Optional[web.AppRunner] = None
+
+    def bind(self, client):
+        """ثبت کلاینت برای خواندن متریک‌های لحظه‌ای"""
+        self._clients.add(client)
+        return self
+
+    def on_request_end(self, endpoint, context, duration, error):
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        histogram = self.request_latency.get(endpoint)
+        if histogram is None:
+            histogram = self.request_latency[endpoint] = Histogram(self.latency_buckets)
+        histogram.observe(duration)
+        # لغو درخواست (مثلاً long poll هنگام توقف) خطا حساب نمی‌شود
+        if error is not None and not isinstance(error, asyncio.CancelledError):
+            key = (endpoint, type(error).__name__)
+            self.request_errors[key] = self.request_errors.get(key, 0) + 1
+
+    def on_upload(self, field, size):
+        self.upload_bytes[field] = self.upload_bytes.get(field, 0) + size
+
+    def on_download(self, size):
+        self.download_bytes += size
+
+    def on_poll(self, batch_size, duration):
+        self.poll_batch.observe(batch_size)
+        self.poll_duration.observe(duration)
+
+    def on_update(self, update_type, lag):
+        update_type = update_type or "unknown"
+        self.updates[update_type] = self.updates.get(update_type, 0) + 1
+        if lag is not None:
+            self.update_lag.observe(max(0.0, lag))
+
+    def on_handler_done(self, handler, context, duration, error):
+        histogram = self.handler_time.get(handler)
+        if histogram is None:
+            histogram = self.handler_time[handler] = Histogram(self.latency_buckets)
+        histogram.observe(duration)
+        if error is not None:
+            self.handler_errors[handler] = self.handler_errors.get(handler, 0) + 1
+
+    def on_job(self, func, lateness):
+        self.job_lateness.observe(max(0.0, lateness))
+
+    def _gauges(self) -> Dict[str, float]:
+        gauges = {
+            "dispatcher_pending": 0, "dispatcher_active_chats": 0, "rate_limiter_waiting": 0,
+            "scheduler_jobs": 0, "scheduler_running": 0, "upload_budget_used_bytes": 0,
+        }
+        for client in list(self._clients):
+            dispatcher = client.dispatcher.stats()
+            gauges["dispatcher_pending"] += dispatcher["pending"]
+            gauges["dispatcher_active_chats"] += dispatcher["active_chats"]
+            if client.rate_limiter is not None:
+                gauges["rate_limiter_waiting"] += client.rate_limiter.stats()["waiting"]
+            scheduler = client.scheduler.stats()
+            gauges["scheduler_jobs"] += scheduler["pending"]
+            gauges["scheduler_running"] += scheduler["running"]
+            gauges["upload_budget_used_bytes"] += client.upload_budget.in_use
+        return gauges
+
+    def render(self) -> str:
+        """متریک‌ها در قالب متنی Prometheus (نسخه 0.0.4)"""
+        p = self.prefix
+        lines: List[str] = []
+
+        def counter(name: str, help_text: str, samples: Iterable[Tuple[Dict[str, Any], float]]):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} counter")
+            for labels, value in samples:
+                lines.append(f"{p}_{name}{_labels(labels)} {value}")
+
+        def histogram(name: str, help_text: str, samples: Iterable[Tuple[Dict[str, Any], Histogram]]):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} histogram")
+            for labels, hist in samples:
+                for bound, count in hist.cumulative():
+                    lines.append(f"{p}_{name}_bucket{_labels(dict(labels, le=bound))} {count}")
+                lines.append(f"{p}_{name}_sum{_labels(labels)} {hist.sum}")
+                lines.append(f"{p}_{name}_count{_labels(labels)} {hist.count}")
+
+        counter("requests_total", "API calls by endpoint", (({"endpoint": e}, v) for e, v in sorted(self.requests.items())))
+        counter("request_errors_total", "Failed API calls by endpoint and error type",
+                (({"endpoint": e, "error": t}, v) for (e, t), v in sorted(self.request_errors.items())))
+        histogram("request_duration_seconds", "API call latency including retries",
+                  (({"endpoint": e}, h) for e, h in sorted(self.request_latency.items())))
+        counter("upload_bytes_total", "Uploaded bytes by media field", (({"field": f}, v) for f, v in sorted(self.upload_bytes.items())))
+        counter("download_bytes_total", "Downloaded file bytes", [({}, self.download_bytes)])
+        histogram("poll_batch_size", "Updates per getUpdates response", [({}, self.poll_batch)])
+        histogram("poll_duration_seconds", "getUpdates round trip", [({}, self.poll_duration)])
+        counter("updates_total", "Updates dispatched by type", (({"type": t}, v) for t, v in sorted(self.updates.items())))
+        histogram("update_lag_seconds", "Delay from message date to handler dispatch", [({}, self.update_lag)])
+        histogram("handler_duration_seconds", "Handler execution time",
+                  (({"handler": n}, h) for n, h in sorted(self.handler_time.items())))
+        counter("handler_errors_total", "Handler exceptions", (({"handler": n}, v) for n, v in sorted(self.handler_errors.items())))
+        histogram("scheduler_lateness_seconds", "Delay between a job's due time and its start", [({}, self.job_lateness)])
+        for name, value in self._gauges().items():
+            lines.append(f"# TYPE {p}_{name} gauge")
+            lines.append(f"{p}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """هندلر aiohttp برای مسیر /metrics"""
+        return web.Response(text=self.render(), content_type="text/plain", charset="utf-8", headers={"X-Content-Type-Version": "0.0.4"})
+
+    def add_route(self, app: web.Application, path: str = "/metrics"):
+        app.router.add_get(path, self.handle)
+
+    async def serve(self, host: str = "0.0.0.0", port: int = 9100, path: str = "/metrics"):
+        """اجرای سرور جدای متریک‌ها"""
+        if self._runner:
+            return
+        app = web.Application()
+        self.add_route(app, path)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info("متریک‌ها روی %s:%s%s در دسترس است", host, port, path)
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class OpenTelemetryInstrumentation(Instrumentation):
+    """span برای هر فراخوانی API و هر اجرای هندلر (نیاز به opentelemetry-api)"""
+
+    def __init__(self, tracer: Any = None):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("برای OpenTelemetryInstrumentation بسته opentelemetry-api را نصب کنید") from None
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("baleh")
+
+    def on_request_start(self, endpoint):
+        return self.tracer.start_span(f"bale {endpoint}", kind=self._trace.SpanKind.CLIENT, attributes={"bale.endpoint": endpoint})
+
+    def on_request_end(self, endpoint, context, duration, error):
+        self._finish(context, error)
+
+    def on_handler_start(self, handler):
+        return self.tracer.start_span(f"handler {handler}", attributes={"bale.handler": handler})
+
+    def on_handler_done(self, handler, context, duration, error):
+        self._finish(context, error)
+
+    def _finish(self, span, error: Optional[BaseException]):
+        if span is None:
+            return
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(error)))
+        span.end()
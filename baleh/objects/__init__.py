@@ -1,3 +1,6 @@
-from .message import Message
-from .chat import Chat
-from .user import User
\ No newline at end of file
+from .base import BaleObject
+from .message import Message, MessageEntity
+from .chat import Chat, ChatPhoto
+from .user import User
+from .media import Animation, Audio, Contact, Document, File, Location, PhotoSize, Sticker, Video, VideoNote, Voice
+from .update import CallbackQuery, Update, update_chat_id
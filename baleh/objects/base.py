@@ -0,0 +1,156 @@
+import weakref
+from typing import Any, Dict, Optional
+
+
+class Field:
+    """فیلد ساده که مستقیم از دیکشنری خام خوانده می‌شود (بدون هزینه در ساخت شیء)"""
+
+    __slots__ = ("key", "default")
+
+    def __init__(self, key: Optional[str] = None, default: Any = None):
+        self.key = key
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        if self.key is None:
+            self.key = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return obj._raw.get(self.key, self.default)
+
+    def __set__(self, obj, value):
+        obj._raw[self.key] = value
+
+
+class Nested:
+    """فیلد تو در تو که فقط در اولین دسترسی به شیء تبدیل و سپس نگه داشته می‌شود"""
+
+    __slots__ = ("key", "name", "type_name", "many")
+
+    def __init__(self, type_name: str, key: Optional[str] = None, many: bool = False):
+        self.type_name = type_name
+        self.key = key
+        self.many = many
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        if self.key is None:
+            self.key = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        cache = obj._cache
+        if cache is None:
+            cache = obj._cache = {}
+        try:
+            return cache[self.name]
+        except KeyError:
+            pass
+        value = obj._raw.get(self.key)
+        if value is not None:
+            cls = BaleObject._types[self.type_name]
+            client = obj._client
+            if self.many:
+                value = [cls._wrap(item, client) for item in value]
+            else:
+                value = cls._wrap(value, client)
+        cache[self.name] = value
+        return value
+
+    def __set__(self, obj, value):
+        if obj._cache is None:
+            obj._cache = {}
+        obj._cache[self.name] = value
+        obj._raw.pop(self.key, None)
+
+
+class BaleObject:
+    """پایه اشیای API بله: فقط دیکشنری خام نگه داشته می‌شود و فیلدها هنگام دسترسی خوانده می‌شوند"""
+
+    # _client ارجاع ضعیف به کلاینتی است که شیء را ساخته (برای reply و ...)
+    __slots__ = ("_raw", "_cache", "_client")
+
+    # نام کلاس -> کلاس، برای ارجاع‌های رو به جلو در Nested (مثل reply_to_message)
+    _types: Dict[str, type] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        BaleObject._types[cls.__name__] = cls
+
+    def __init__(self, **kwargs):
+        self._raw = {}
+        self._cache = None
+        self._client = None
+        for key, value in kwargs.items():
+            if value is not None:
+                setattr(self, key, value)
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict], client=None):
+        """ساخت شیء از JSON خام بدون کپی و بدون پردازش فیلدها
+
+        اگر client داده شود، شیء و اشیای تو در توی آن به آن کلاینت متصل می‌شوند.
+        """
+        return cls._wrap(data, weakref.ref(client) if client is not None else None)
+
+    @classmethod
+    def _wrap(cls, data: Optional[dict], client_ref: Optional[weakref.ref]):
+        if data is None:
+            return None
+        obj = cls.__new__(cls)
+        obj._raw = data
+        obj._cache = None
+        obj._client = client_ref
+        return obj
+
+    def bind(self, client):
+        """اتصال شیء به یک کلاینت تا متدهای میان‌بر (reply_text و ...) از نشست آن استفاده کنند"""
+        self._client = weakref.ref(client)
+        return self
+
+    @property
+    def client(self):
+        """کلاینت سازنده شیء؛ اگر شیء متصل نباشد یا کلاینت از بین رفته باشد خطا می‌دهد"""
+        client = self._client() if self._client is not None else None
+        if client is None:
+            raise RuntimeError(f"{type(self).__name__} به هیچ BaleClient فعالی متصل نیست")
+        return client
+
+    @property
+    def raw(self) -> dict:
+        """دیکشنری خام دریافتی از API (شامل فیلدهایی که مدل نشده‌اند)"""
+        return self._raw
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """خواندن مستقیم یک کلید از JSON خام"""
+        return self._raw.get(key, default)
+
+    def to_dict(self) -> dict:
+        """تبدیل به دیکشنری قابل ارسال به API"""
+        data = dict(self._raw)
+        if self._cache:
+            cls = type(self)
+            for name, value in self._cache.items():
+                key = getattr(cls, name).key
+                if key in data or value is None:
+                    continue
+                if isinstance(value, list):
+                    data[key] = [item.to_dict() if isinstance(item, BaleObject) else item for item in value]
+                else:
+                    data[key] = value.to_dict() if isinstance(value, BaleObject) else value
+        return data
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={value!r}" for key, value in self.to_dict().items())
+        return f"{type(self).__name__}({fields})"
@@ -1,15 +1,26 @@
-from dataclasses import dataclass
-from typing import Optional
-
-@dataclass
-class Chat:
-    id: int
-    type: str
-    title: Optional[str] = None
-    username: Optional[str] = None
-    first_name: Optional[str] = None
-    last_name: Optional[str] = None
-
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
\ No newline at end of file
+from .base import BaleObject, Field, Nested
+
+
+class ChatPhoto(BaleObject):
+    """عکس پروفایل چت"""
+
+    __slots__ = ()
+
+    small_file_id = Field()
+    small_file_unique_id = Field()
+    big_file_id = Field()
+    big_file_unique_id = Field()
+
+
+class Chat(BaleObject):
+    """چت خصوصی، گروه یا کانال"""
+
+    __slots__ = ()
+
+    id = Field()
+    type = Field()
+    title = Field()
+    username = Field()
+    first_name = Field()
+    last_name = Field()
+    photo = Nested("ChatPhoto")
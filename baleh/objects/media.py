@@ -0,0 +1,123 @@
+from .base import BaleObject, Field, Nested
+
+
+class PhotoSize(BaleObject):
+    """یکی از اندازه‌های یک عکس"""
+
+    __slots__ = ()
+
+    file_id = Field()
+    file_unique_id = Field()
+    width = Field()
+    height = Field()
+    file_size = Field()
+
+
+class Document(BaleObject):
+    __slots__ = ()
+
+    file_id = Field()
+    file_unique_id = Field()
+    thumbnail = Nested("PhotoSize", key="thumb")
+    file_name = Field()
+    mime_type = Field()
+    file_size = Field()
+
+
+class Audio(BaleObject):
+    __slots__ = ()
+
+    file_id = Field()
+    file_unique_id = Field()
+    duration = Field()
+    performer = Field()
+    title = Field()
+    file_name = Field()
+    mime_type = Field()
+    file_size = Field()
+
+
+class Video(BaleObject):
+    __slots__ = ()
+
+    file_id = Field()
+    file_unique_id = Field()
+    width = Field()
+    height = Field()
+    duration = Field()
+    thumbnail = Nested("PhotoSize", key="thumb")
+    file_name = Field()
+    mime_type = Field()
+    file_size = Field()
+
+
+class Animation(Video):
+    __slots__ = ()
+
+
+class Voice(BaleObject):
+    __slots__ = ()
+
+    file_id = Field()
+    file_unique_id = Field()
+    duration = Field()
+    mime_type = Field()
+    file_size = Field()
+
+
+class VideoNote(BaleObject):
+    __slots__ = ()
+
+    file_id = Field()
+    file_unique_id = Field()
+    length = Field()
+    duration = Field()
+    thumbnail = Nested("PhotoSize", key="thumb")
+    file_size = Field()
+
+
+class Sticker(BaleObject):
+    __slots__ = ()
+
+    file_id = Field()
+    file_unique_id = Field()
+    type = Field()
+    width = Field()
+    height = Field()
+    is_animated = Field(default=False)
+    is_video = Field(default=False)
+    thumbnail = Nested("PhotoSize", key="thumb")
+    emoji = Field()
+    set_name = Field()
+    file_size = Field()
+
+
+class File(BaleObject):
+    """فایل آماده دانلود (نتیجه getFile)"""
+
+    __slots__ = ()
+
+    file_id = Field()
+    file_unique_id = Field()
+    file_size = Field()
+    file_path = Field()
+
+    async def download(self, dest=None, chunk_size=None):
+        """دانلود با کلاینت همین شیء؛ مثل BaleClient.download"""
+        return await self.client.download(self, dest, chunk_size=chunk_size)
+
+
+class Contact(BaleObject):
+    __slots__ = ()
+
+    phone_number = Field()
+    first_name = Field()
+    last_name = Field()
+    user_id = Field()
+
+
+class Location(BaleObject):
+    __slots__ = ()
+
+    longitude = Field()
+    latitude = Field()
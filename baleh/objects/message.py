@@ -1,31 +1,111 @@
-from dataclasses import dataclass
-from typing import Optional, Any
-from .chat import Chat
-
-@dataclass
-class Message:
-    message_id: int
-    chat: Chat
-    date: int
-    text: Optional[str] = None
-    photo: Optional[list] = None
-    video: Optional[dict] = None
-    audio: Optional[dict] = None
-    document: Optional[dict] = None
-    sticker: Optional[dict] = None
-    voice: Optional[dict] = None
-    caption: Optional[str] = None
-    from_user: Optional[dict] = None
-
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
-    async def reply_text(self, text: str, parse_mode: Optional[str] = None):
-        """ارسال پاسخ متنی به چت"""
-        from ..client import BaleClient
-        client = BaleClient("")  # توکن باید از محیط خوانده شود
-        if hasattr(self, 'chat') and hasattr(self.chat, 'id'):
-            return await client.send_message(self.chat.id, text, parse_mode)
-        else:
-            raise ValueError("Chat ID not available for reply")
\ No newline at end of file
+from typing import Any, Optional
+
+from .base import BaleObject, Field, Nested
+# این import‌ها فقط کلاس‌ها را در BaleObject._types ثبت می‌کنند تا Nested("...") بتواند آن‌ها را
+# هنگام دسترسی تنبل بسازد؛ حذفشان خطای KeyError در اولین دسترسی به فیلد می‌دهد.
+from .chat import Chat  # noqa: F401
+from .user import User  # noqa: F401
+from .media import Animation, Audio, Contact, Document, Location, PhotoSize, Sticker, Video, VideoNote, Voice  # noqa: F401
+
+
+# ترتیب مهم است: پیام عکس‌دار کپشن دارد ولی نوعش photo است
+CONTENT_TYPES = (
+    "text", "photo", "video", "animation", "audio", "document", "sticker", "voice", "video_note",
+    "location", "contact", "new_chat_members", "left_chat_member",
+)
+
+
+class MessageEntity(BaleObject):
+    """بخش قالب‌بندی‌شده متن (لینک، منشن، دستور و ...)"""
+
+    __slots__ = ()
+
+    type = Field()
+    offset = Field()
+    length = Field()
+    url = Field()
+    user = Nested("User")
+
+
+class Message(BaleObject):
+    """پیام بله؛ فیلدهای تو در تو فقط در اولین دسترسی ساخته می‌شوند"""
+
+    __slots__ = ()
+
+    message_id = Field()
+    date = Field(default=0)
+    edit_date = Field()
+    text = Field()
+    caption = Field()
+    media_group_id = Field()
+    forward_from_message_id = Field()
+    forward_date = Field()
+    chat = Nested("Chat")
+    from_user = Nested("User", key="from")
+    forward_from = Nested("User")
+    forward_from_chat = Nested("Chat")
+    reply_to_message = Nested("Message")
+    entities = Nested("MessageEntity", many=True)
+    caption_entities = Nested("MessageEntity", many=True)
+    photo = Nested("PhotoSize", many=True)
+    video = Nested("Video")
+    audio = Nested("Audio")
+    document = Nested("Document")
+    animation = Nested("Animation")
+    sticker = Nested("Sticker")
+    voice = Nested("Voice")
+    video_note = Nested("VideoNote")
+    contact = Nested("Contact")
+    location = Nested("Location")
+    new_chat_members = Nested("User", many=True)
+    left_chat_member = Nested("User")
+    reply_markup = Field()
+
+    @property
+    def content_type(self) -> Optional[str]:
+        """نوع محتوای پیام (text، photo، document، ...) بدون ساختن اشیای تو در تو"""
+        raw = self._raw
+        for content_type in CONTENT_TYPES:
+            if content_type in raw:
+                return content_type
+        cache = self._cache
+        if cache:
+            for content_type in CONTENT_TYPES:
+                if cache.get(content_type) is not None:
+                    return content_type
+        return None
+
+    @property
+    def chat_id(self) -> Optional[int]:
+        """شناسه چت بدون ساختن شیء Chat"""
+        chat = self._raw.get("chat")
+        if chat is not None:
+            return chat.get("id")
+        return self.chat.id if self.chat is not None else None
+
+    def _reply_to(self, quote: bool) -> Optional[int]:
+        return self.message_id if quote else None
+
+    async def reply_text(self, text: str, parse_mode: Optional[str] = None, reply_markup: Optional[Any] = None, quote: bool = False) -> "Message":
+        """ارسال پاسخ متنی به همین چت با نشست کلاینت سازنده پیام"""
+        return await self.client.send_message(self.chat_id, text, parse_mode, reply_markup=reply_markup, reply_to_message_id=self._reply_to(quote))
+
+    async def reply_photo(self, photo: Any, caption: Optional[str] = None, quote: bool = False) -> "Message":
+        """ارسال عکس به همین چت"""
+        return await self.client.send_photo(self.chat_id, photo, caption, reply_to_message_id=self._reply_to(quote))
+
+    async def reply_document(self, document: Any, caption: Optional[str] = None, quote: bool = False) -> "Message":
+        """ارسال فایل به همین چت"""
+        return await self.client.send_document(self.chat_id, document, caption, reply_to_message_id=self._reply_to(quote))
+
+    async def forward(self, chat_id: int) -> "Message":
+        """فوروارد این پیام به چت دیگر"""
+        return await self.client.forward_message(chat_id, self.chat_id, self.message_id)
+
+    async def delete(self) -> bool:
+        """حذف این پیام"""
+        return await self.client.delete_message(self.chat_id, self.message_id)
+
+    async def edit_text(self, text: str, parse_mode: Optional[str] = None, reply_markup: Optional[Any] = None) -> "Message":
+        """ویرایش متن این پیام"""
+        return await self.client.edit_message_text(self.chat_id, self.message_id, text, parse_mode, reply_markup=reply_markup)
@@ -0,0 +1,75 @@
+from typing import Optional
+
+from .base import BaleObject, Field, Nested
+# فقط برای ثبت نوع‌ها در BaleObject._types که Nested("Message") و Nested("User") به آن نیاز دارند
+from .message import Message  # noqa: F401
+from .user import User  # noqa: F401
+
+
+UPDATE_TYPES = ("message", "edited_message", "channel_post", "edited_channel_post", "callback_query")
+
+
+def update_chat_id(update: dict) -> Optional[int]:
+    """شناسه چت یک آپدیت خام بدون ساختن شیء (برای حفظ ترتیب هر چت)"""
+    for key in ("message", "edited_message", "channel_post", "edited_channel_post"):
+        message = update.get(key)
+        if message:
+            return (message.get("chat") or {}).get("id")
+    query = update.get("callback_query")
+    if query:
+        message = query.get("message") or {}
+        chat_id = (message.get("chat") or {}).get("id")
+        if chat_id is not None:
+            return chat_id
+        return (query.get("from") or {}).get("id")
+    return None
+
+
+class CallbackQuery(BaleObject):
+    """فشردن دکمه کیبورد شیشه‌ای"""
+
+    __slots__ = ()
+
+    id = Field()
+    from_user = Nested("User", key="from")
+    message = Nested("Message")
+    inline_message_id = Field()
+    chat_instance = Field()
+    data = Field()
+
+    @property
+    def chat_id(self) -> Optional[int]:
+        message = self._raw.get("message")
+        if message:
+            return (message.get("chat") or {}).get("id")
+        return (self._raw.get("from") or {}).get("id")
+
+    async def answer(self, text: Optional[str] = None, show_alert: bool = False) -> bool:
+        """پاسخ به فشردن دکمه (بستن حالت بارگذاری دکمه در کلاینت کاربر)"""
+        return await self.client.answer_callback_query(self.id, text, show_alert)
+
+
+class Update(BaleObject):
+    """یک آپدیت دریافتی از getUpdates یا وب‌هوک"""
+
+    __slots__ = ()
+
+    update_id = Field()
+    message = Nested("Message")
+    edited_message = Nested("Message")
+    channel_post = Nested("Message")
+    edited_channel_post = Nested("Message")
+    callback_query = Nested("CallbackQuery")
+
+    @property
+    def type(self) -> Optional[str]:
+        """نوع آپدیت (message، callback_query، ...)"""
+        raw = self._raw
+        for update_type in UPDATE_TYPES:
+            if raw.get(update_type) is not None:
+                return update_type
+        return None
+
+    @property
+    def chat_id(self) -> Optional[int]:
+        return update_chat_id(self._raw)
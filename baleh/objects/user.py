@@ -1,9 +1,22 @@
-class User:
-      def __init__(self, id: int, username: str = None, first_name: str = None, last_name: str = None):
-          self.id = id
-          self.username = username
-          self.first_name = first_name
-          self.last_name = last_name
-
-      def __str__(self):
-          return f"User(id={self.id}, username={self.username}, first_name={self.first_name}, last_name={self.last_name})"
\ No newline at end of file
+from typing import Optional
+
+from .base import BaleObject, Field
+
+
+class User(BaleObject):
+    """کاربر یا ربات بله"""
+
+    __slots__ = ()
+
+    id = Field()
+    is_bot = Field(default=False)
+    first_name = Field()
+    last_name = Field()
+    username = Field()
+    language_code = Field()
+
+    def __init__(self, id: Optional[int] = None, username: Optional[str] = None, first_name: Optional[str] = None, last_name: Optional[str] = None, **kwargs):
+        super().__init__(id=id, username=username, first_name=first_name, last_name=last_name, **kwargs)
+
+    def __str__(self):
+        return f"User(id={self.id}, username={self.username}, first_name={self.first_name}, last_name={self.last_name})"
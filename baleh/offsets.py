@@ -0,0 +1,239 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import deque
+from typing import Dict, List, NamedTuple
+
+# حداکثر limit مجاز getUpdates؛ در حالت catch-up دسته‌ها با همین اندازه گرفته می‌شوند
+MAX_UPDATES_LIMIT = 100
+
+
+class OffsetState(NamedTuple):
+    """وضعیت ذخیره‌شده: offset بعدی، آپدیت‌های دریافت‌شده‌ی تأییدنشده و شناسه‌های پردازش‌شده اخیر"""
+
+    offset: int
+    pending: List[dict]
+    recent: List[int]
+
+
+class OffsetStore:
+    """ذخیره‌ساز offset پولینگ؛ پیش‌فرض هیچ چیزی را ذخیره نمی‌کند
+
+    کلاینت هر دسته را قبل از تأیید آن به سرور (درخواست getUpdates بعدی) با append ثبت و flush
+    می‌کند و هر آپدیت را بعد از پایان هندلرها با ack علامت می‌زند. ackها جمع می‌شوند و هر
+    commit_interval ثانیه یک‌جا نوشته می‌شوند. بعد از ری‌استارت، آپدیت‌های تأییدنشده دوباره
+    پردازش می‌شوند و شناسه‌های اخیر جلوی اجرای دوباره آپدیت‌های تکراری را می‌گیرند.
+    """
+
+    commit_interval = 1.0
+    # False یعنی کلاینت مرحله ثبت دسته قبل از تأیید را کلاً رد می‌کند
+    persistent = False
+
+    def load(self) -> OffsetState:
+        return OffsetState(0, [], [])
+
+    def append(self, updates: List[dict], offset: int):
+        pass
+
+    def ack(self, update_id: int):
+        pass
+
+    @property
+    def dirty(self) -> bool:
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class FileOffsetStore(OffsetStore):
+    """ذخیره وضعیت در یک فایل JSON که در هر flush به‌صورت اتمیک بازنویسی می‌شود
+
+    برای ربات‌های کم‌ترافیک مناسب است؛ هر flush کل وضعیت را می‌نویسد (با fsync=True روی دیسک).
+    """
+
+    persistent = True
+
+    def __init__(self, path: str = "baleh_offset.json", recent_size: int = 1000, commit_interval: float = 1.0, fsync: bool = True):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.fsync = fsync
+        self._offset = 0
+        self._pending: Dict[int, dict] = {}
+        self._recent: deque = deque(maxlen=recent_size)
+        self._dirty = False
+        self.commits = 0
+        # append/ack روی event loop و flush در executor اجرا می‌شوند
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def load(self) -> OffsetState:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return OffsetState(0, [], [])
+        with self._lock:
+            self._offset = data.get("offset", 0)
+            self._pending = {update["update_id"]: update for update in data.get("pending", [])}
+            self._recent.extend(data.get("recent", []))
+            return OffsetState(self._offset, sorted(self._pending.values(), key=_update_id), list(self._recent))
+
+    def append(self, updates: List[dict], offset: int):
+        with self._lock:
+            for update in updates:
+                self._pending[update["update_id"]] = update
+            self._offset = max(self._offset, offset)
+            self._dirty = True
+
+    def ack(self, update_id: int):
+        with self._lock:
+            self._pending.pop(update_id, None)
+            self._recent.append(update_id)
+            self._dirty = True
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = {"offset": self._offset, "pending": list(self._pending.values()), "recent": list(self._recent)}
+                self._dirty = False
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".offset-", suffix=".part", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                with self._lock:
+                    self._dirty = True
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self.commits += 1
+
+    def close(self):
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {"offset": self._offset, "pending": len(self._pending), "recent": len(self._recent), "commits": self.commits}
+
+
+class SQLiteOffsetStore(OffsetStore):
+    """ذخیره وضعیت در SQLite (WAL)؛ هر flush فقط تغییرات را در یک تراکنش می‌نویسد
+
+    name اجازه می‌دهد چند ربات (مثلاً در BotManager) از یک فایل مشترک استفاده کنند.
+    """
+
+    persistent = True
+
+    def __init__(self, path: str = "baleh_offsets.sqlite3", name: str = "default", recent_size: int = 1000, commit_interval: float = 1.0):
+        self.path = path
+        self.name = name
+        self.commit_interval = commit_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS offsets (name TEXT PRIMARY KEY, next_offset INTEGER NOT NULL, recent TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending_updates (name TEXT NOT NULL, update_id INTEGER NOT NULL, "
+            "payload TEXT NOT NULL, PRIMARY KEY (name, update_id))"
+        )
+        self._conn.commit()
+        self._offset = 0
+        self._recent: deque = deque(maxlen=recent_size)
+        self._journaled: set = set()
+        self._inserts: List[tuple] = []
+        self._deletes: List[tuple] = []
+        self._dirty = False
+        self.commits = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def load(self) -> OffsetState:
+        row = self._conn.execute("SELECT next_offset, recent FROM offsets WHERE name = ?", (self.name,)).fetchone()
+        rows = self._conn.execute(
+            "SELECT payload FROM pending_updates WHERE name = ? ORDER BY update_id", (self.name,)
+        ).fetchall()
+        pending = [json.loads(payload) for payload, in rows]
+        with self._lock:
+            if row is not None:
+                self._offset = row[0]
+                self._recent.extend(json.loads(row[1]))
+            self._journaled.update(update["update_id"] for update in pending)
+            return OffsetState(self._offset, pending, list(self._recent))
+
+    def append(self, updates: List[dict], offset: int):
+        with self._lock:
+            for update in updates:
+                update_id = update["update_id"]
+                self._journaled.add(update_id)
+                self._inserts.append((self.name, update_id, json.dumps(update, ensure_ascii=False)))
+            self._offset = max(self._offset, offset)
+            self._dirty = True
+
+    def ack(self, update_id: int):
+        with self._lock:
+            if update_id in self._journaled:
+                self._journaled.discard(update_id)
+                self._deletes.append((self.name, update_id))
+            self._recent.append(update_id)
+            self._dirty = True
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                inserts, self._inserts = self._inserts, []
+                deletes, self._deletes = self._deletes, []
+                state = (self.name, self._offset, json.dumps(list(self._recent)))
+                self._dirty = False
+            try:
+                with self._conn:
+                    if inserts:
+                        self._conn.executemany("INSERT OR REPLACE INTO pending_updates VALUES (?, ?, ?)", inserts)
+                    if deletes:
+                        self._conn.executemany("DELETE FROM pending_updates WHERE name = ? AND update_id = ?", deletes)
+                    self._conn.execute("INSERT OR REPLACE INTO offsets VALUES (?, ?, ?)", state)
+            except BaseException:
+                # تغییرات از دست نمی‌روند و در flush بعدی دوباره نوشته می‌شوند
+                with self._lock:
+                    self._inserts[:0] = inserts
+                    self._deletes[:0] = deletes
+                    self._dirty = True
+                raise
+            self.commits += 1
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"offset": self._offset, "pending": len(self._journaled), "recent": len(self._recent), "commits": self.commits}
+
+
+def _update_id(update: dict) -> int:
+    return update["update_id"]
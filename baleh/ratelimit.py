@@ -0,0 +1,169 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+# فقط متدهایی که در چت پیام می‌سازند یا تغییر می‌دهند از سطل همان چت مصرف می‌کنند؛
+# خواندن‌ها (getChat، getChatMember و ...) فقط از سطل سراسری رد می‌شوند
+CHAT_LIMITED_PREFIXES = ("send", "forward", "copy", "edit")
+
+
+class TokenBucket:
+    """سطل توکن ساده: rate توکن در ثانیه با ظرفیت capacity"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate باید مثبت و capacity حداقل ۱ باشد")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """زمان لازم تا در دسترس بودن یک توکن (صفر یعنی همین حالا)"""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    @property
+    def full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class _ChatLane:
+    __slots__ = ("lock", "bucket", "paused_until")
+
+    def __init__(self, bucket: TokenBucket):
+        self.lock = asyncio.Lock()
+        self.bucket = bucket
+        self.paused_until = 0.0
+
+
+class RateLimiter:
+    """محدودکننده نرخ درخواست‌ها با سطل سراسری، سطل جدا برای هر چت و توقف بعد از 429
+
+    درخواست‌های هر چت ابتدا پشت سطل همان چت صف می‌شوند و بعد به ترتیب ورود
+    از سطل سراسری رد می‌شوند؛ بنابراین یک چت پرترافیک نوبت بقیه را نمی‌گیرد.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        private_rate: float = 1,
+        group_rate: float = 20 / 60,
+        global_burst: Optional[float] = None,
+        private_burst: float = 3,
+        group_burst: float = 5,
+        max_idle_chats: int = 10000,
+    ):
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.private_burst = private_burst
+        self.group_burst = group_burst
+        self.max_idle_chats = max_idle_chats
+        self._global = TokenBucket(global_rate, global_burst or global_rate)
+        self._global_lock: Optional[asyncio.Lock] = None
+        self._global_paused_until = 0.0
+        self._lanes: Dict[int, _ChatLane] = {}
+        self.waiting = 0
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.pauses = 0
+
+    @staticmethod
+    def limits_chat(endpoint: str) -> bool:
+        """آیا این endpoint مشمول محدودیت نرخ هر چت است"""
+        return endpoint.startswith(CHAT_LIMITED_PREFIXES)
+
+    @staticmethod
+    def is_group(chat_id: int) -> bool:
+        """شناسه منفی مربوط به گروه‌ها و کانال‌هاست"""
+        return chat_id < 0
+
+    def _lane(self, chat_id: int) -> _ChatLane:
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            if len(self._lanes) >= self.max_idle_chats:
+                self._prune()
+            if self.is_group(chat_id):
+                bucket = TokenBucket(self.group_rate, self.group_burst)
+            else:
+                bucket = TokenBucket(self.private_rate, self.private_burst)
+            lane = self._lanes[chat_id] = _ChatLane(bucket)
+        return lane
+
+    def _prune(self):
+        """حذف چت‌هایی که درخواست در صف ندارند و سطلشان پر است"""
+        now = time.monotonic()
+        idle = [
+            chat_id for chat_id, lane in self._lanes.items()
+            if not lane.lock.locked() and lane.bucket.full and lane.paused_until <= now
+        ]
+        for chat_id in idle:
+            del self._lanes[chat_id]
+
+    @staticmethod
+    async def _take(bucket: TokenBucket, paused_until):
+        while True:
+            pause = paused_until() - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            delay = bucket.delay()
+            if delay <= 0:
+                bucket.consume()
+                return
+            await asyncio.sleep(delay)
+
+    async def acquire(self, chat_id: Optional[int] = None):
+        """صبر تا مجاز شدن یک درخواست برای chat_id (یا فقط سطل سراسری اگر None باشد)"""
+        if self._global_lock is None:
+            self._global_lock = asyncio.Lock()
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            if chat_id is not None:
+                lane = self._lane(chat_id)
+                async with lane.lock:
+                    await self._take(lane.bucket, lambda: lane.paused_until)
+            async with self._global_lock:
+                await self._take(self._global, lambda: self._global_paused_until)
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def pause(self, retry_after: float, chat_id: Optional[int] = None):
+        """توقف ارسال‌ها (برای یک چت یا همه) به مدت retry_after ثانیه"""
+        until = time.monotonic() + max(retry_after, 0)
+        self.pauses += 1
+        if chat_id is None:
+            self._global_paused_until = max(self._global_paused_until, until)
+        else:
+            lane = self._lane(chat_id)
+            lane.paused_until = max(lane.paused_until, until)
+
+    def stats(self) -> Dict[str, float]:
+        """آمار صف و زمان انتظار برای تنظیم نرخ‌ها"""
+        return {
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "avg_wait": self.total_wait / self.admitted if self.admitted else 0.0,
+            "max_wait": self.max_wait,
+            "pauses": self.pauses,
+            "tracked_chats": len(self._lanes),
+            "global_paused_for": max(0.0, self._global_paused_until - time.monotonic()),
+        }
@@ -0,0 +1,120 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+import aiohttp
+
+from .exceptions import BaleAPIError, CircuitOpenError, RetryAfter
+
+# کدهای gateway که یعنی درخواست احتمالاً به سرور اصلی نرسیده است
+_GATEWAY_ERRORS = (502, 503, 504)
+
+
+@dataclass
+class RetryPolicy:
+    """سیاست تلاش دوباره با backoff نمایی و jitter کامل"""
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    jitter: bool = True
+
+    def delay(self, attempt: int) -> float:
+        """مدت انتظار قبل از تلاش شماره attempt+1 (attempt از صفر)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+    def is_transient(self, error: BaseException) -> bool:
+        """خطاهای شبکه، timeout و 5xx موقتی حساب می‌شوند"""
+        if isinstance(error, RetryAfter):
+            return False  # توسط محدودکننده نرخ جدا مدیریت می‌شود
+        if isinstance(error, BaleAPIError):
+            return (error.error_code or 0) >= 500
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    def should_retry(self, error: BaseException, attempt: int, idempotent: bool) -> bool:
+        """آیا بعد از این خطا تلاش دوباره مجاز است
+
+        برای متدهای غیر idempotent (مثل sendX) فقط وقتی دوباره می‌فرستیم که
+        مطمئنیم درخواست پردازش نشده: خطای اتصال یا پاسخ gateway.
+        """
+        if attempt + 1 >= self.max_attempts or not self.is_transient(error):
+            return False
+        if idempotent:
+            return True
+        if isinstance(error, aiohttp.ClientConnectorError):
+            return True
+        return isinstance(error, BaleAPIError) and error.error_code in _GATEWAY_ERRORS
+
+
+class CircuitBreaker:
+    """قطع‌کننده مدار برای یک endpoint: بعد از چند خطای پیاپی، درخواست‌ها فوراً رد می‌شوند"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def before_call(self):
+        """قبل از هر درخواست؛ اگر مدار باز باشد CircuitOpenError می‌دهد"""
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(self.name, remaining)
+            self.state = self.HALF_OPEN
+            self._probing = False
+        # در حالت نیمه‌باز فقط یک درخواست آزمایشی اجازه دارد
+        if self._probing:
+            raise CircuitOpenError(self.name, self.reset_timeout)
+        self._probing = True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self._probing = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """پایان درخواست آزمایشی بدون نتیجه قطعی (مثلاً خطای 4xx)"""
+        if self.state == self.HALF_OPEN:
+            self.record_success()
+
+    def abandon(self):
+        """درخواست بدون هیچ نتیجه‌ای تمام شد (مثلاً لغو شد)؛ درخواست بعدی دوباره آزمایش می‌کند"""
+        self._probing = False
+
+
+class CircuitBreakers:
+    """نگهداری یک CircuitBreaker برای هر endpoint"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker(endpoint, self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        return {name: breaker.state for name, breaker in self._breakers.items()}
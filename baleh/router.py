@@ -0,0 +1,302 @@
+import inspect
+import itertools
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Set, Tuple, Union
+
+from .objects.update import Update
+
+logger = logging.getLogger(__name__)
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # پایتون قدیمی‌تر از 3.11
+    import sre_parse
+    import sre_constants
+
+RegexFilter = Union[str, Pattern]
+
+
+def _as_set(values: Optional[Iterable]) -> Optional[Set]:
+    if values is None:
+        return None
+    if isinstance(values, (str, int)):
+        return {values}
+    return set(values)
+
+
+def parse_command(text: Optional[str]) -> Optional[str]:
+    """نام دستور از متنی مثل «/start@bot arg» (بدون اسلش و نام ربات)"""
+    if not text or text[0] != "/":
+        return None
+    command = text[1:].split(None, 1)[0] if len(text) > 1 else ""
+    return command.split("@", 1)[0].lower() or None
+
+
+class Handler:
+    """یک هندلر ثبت‌شده همراه با فیلترهایش"""
+
+    __slots__ = (
+        "callback", "update_type", "commands", "regex", "content_types", "chat_types",
+        "user_ids", "chat_ids", "func", "priority", "stop", "raw", "order", "name",
+    )
+
+    def __init__(
+        self,
+        callback: Callable,
+        update_type: str = "message",
+        commands: Optional[Iterable[str]] = None,
+        regex: Optional[RegexFilter] = None,
+        content_types: Optional[Iterable[str]] = None,
+        chat_types: Optional[Iterable[str]] = None,
+        user_ids: Optional[Iterable[int]] = None,
+        chat_ids: Optional[Iterable[int]] = None,
+        func: Optional[Callable[[Any], bool]] = None,
+        priority: int = 0,
+        stop: bool = False,
+        raw: bool = False,
+        order: int = 0,
+    ):
+        self.callback = callback
+        self.update_type = update_type
+        commands = _as_set(commands)
+        self.commands = {command.lstrip("/").lower() for command in commands} if commands else None
+        self.regex = re.compile(regex) if isinstance(regex, str) else regex
+        self.content_types = _as_set(content_types)
+        self.chat_types = _as_set(chat_types)
+        self.user_ids = _as_set(user_ids)
+        self.chat_ids = _as_set(chat_ids)
+        self.func = func
+        self.priority = priority
+        self.stop = stop
+        self.raw = raw
+        self.order = order
+        self.name = getattr(callback, "__qualname__", None) or repr(callback)
+
+    def check(self, event: Any, content_type: Optional[str]) -> bool:
+        """فیلترهایی که در ایندکس‌ها پوشش داده نشده‌اند"""
+        if self.content_types is not None and content_type not in self.content_types and "any" not in self.content_types:
+            return False
+        raw = event.raw
+        if self.commands and self.regex is not None:
+            # هندلر فقط با دستور ایندکس شده است؛ regex همین‌جا روی متن بررسی می‌شود
+            text = raw.get("data") if self.update_type == "callback_query" else (raw.get("text") or raw.get("caption"))
+            if not text or not self.regex.search(text):
+                return False
+        if self.chat_types is not None or self.chat_ids is not None:
+            message = raw if self.update_type != "callback_query" else (raw.get("message") or {})
+            chat = message.get("chat") or {}
+            if self.chat_types is not None and chat.get("type") not in self.chat_types:
+                return False
+            if self.chat_ids is not None and chat.get("id") not in self.chat_ids:
+                return False
+        if self.user_ids is not None and (raw.get("from") or {}).get("id") not in self.user_ids:
+            return False
+        if self.func is not None and not self.func(event):
+            return False
+        return True
+
+    def __repr__(self):
+        return f"<Handler {getattr(self.callback, '__name__', self.callback)} {self.update_type} priority={self.priority}>"
+
+
+def _literal_hints(pattern: Pattern) -> Tuple[Optional[str], Optional[str]]:
+    """(پیشوند ثابت الگوهای لنگرشده به ابتدای متن، طولانی‌ترین رشته ثابت الزامی)"""
+    if not isinstance(pattern.pattern, str) or pattern.flags & re.IGNORECASE:
+        return None, None
+    try:
+        items = list(sre_parse.parse(pattern.pattern, pattern.flags))
+    except Exception:
+        return None, None
+    anchored = False
+    if items and items[0][0] is sre_constants.AT:
+        at = items[0][1]
+        anchored = at is sre_constants.AT_BEGINNING_STRING or (at is sre_constants.AT_BEGINNING and not pattern.flags & re.MULTILINE)
+        items = items[1:]
+    runs, current = [], []
+    for op, value in items:
+        if op is sre_constants.LITERAL:
+            current.append(chr(value))
+        else:
+            runs.append("".join(current))
+            current = []
+    runs.append("".join(current))
+    prefix = runs[0] if anchored and runs[0] else None
+    longest = max(runs, key=len) or None
+    return prefix, longest
+
+
+class _Index:
+    """ایندکس‌های یک نوع آپدیت: دیکشنری دستورها، جدول نوع محتوا و جدول پیشوند regexها
+
+    regexهای لنگرشده با پیشوند ثابت (مثل ^/buy_) با جستجوی دیکشنری روی ابتدای متن پیدا می‌شوند؛
+    بقیه ابتدا با رشته ثابت الزامی‌شان (in، در C) غربال و فقط در صورت نیاز اجرا می‌شوند.
+    """
+
+    def __init__(self, handlers: List[Handler]):
+        self.commands: Dict[str, List[Handler]] = {}
+        self.content: Dict[str, List[Handler]] = {}
+        self.generic: List[Handler] = []
+        self.prefixed: Dict[int, Dict[str, List[Handler]]] = {}
+        self.literal: List[Tuple[str, Handler]] = []
+        self.scan: List[Handler] = []
+        for handler in handlers:
+            if handler.commands:
+                for command in handler.commands:
+                    self.commands.setdefault(command, []).append(handler)
+            elif handler.regex is not None:
+                prefix, literal = _literal_hints(handler.regex)
+                if prefix:
+                    self.prefixed.setdefault(len(prefix), {}).setdefault(prefix, []).append(handler)
+                elif literal:
+                    self.literal.append((literal, handler))
+                else:
+                    self.scan.append(handler)
+            elif handler.content_types and "any" not in handler.content_types:
+                for content_type in handler.content_types:
+                    self.content.setdefault(content_type, []).append(handler)
+            else:
+                self.generic.append(handler)
+
+    def _regex_matches(self, text: str) -> List[Handler]:
+        matched = []
+        for length, table in self.prefixed.items():
+            handlers = table.get(text[:length])
+            if handlers:
+                matched.extend(handler for handler in handlers if handler.regex.search(text))
+        for literal, handler in self.literal:
+            if literal in text and handler.regex.search(text):
+                matched.append(handler)
+        for handler in self.scan:
+            if handler.regex.search(text):
+                matched.append(handler)
+        if len(matched) > 1:
+            matched.sort(key=_sort_key)
+        return matched
+
+    def candidates(self, text: Optional[str], content_type: Optional[str]) -> List[Handler]:
+        groups = []
+        if self.generic:
+            groups.append(self.generic)
+        if text:
+            command = parse_command(text)
+            if command is not None and command in self.commands:
+                groups.append(self.commands[command])
+            if self.prefixed or self.literal or self.scan:
+                matched = self._regex_matches(text)
+                if matched:
+                    groups.append(matched)
+        if content_type is not None and content_type in self.content:
+            groups.append(self.content[content_type])
+        if not groups:
+            return []
+        if len(groups) == 1:
+            return groups[0]
+        return sorted(itertools.chain.from_iterable(groups), key=_sort_key)
+
+
+def _sort_key(handler: Handler):
+    return (-handler.priority, handler.order)
+
+
+class Router:
+    """مسیریاب هندلرها با ایندکس دستورها، نوع محتوا و پیشوند regexها
+
+    هندلرها به ترتیب اولویت (بیشتر اول) و سپس ترتیب ثبت اجرا می‌شوند؛ هندلر با stop=True
+    اجرای هندلرهای بعدی همان آپدیت را متوقف می‌کند.
+    """
+
+    def __init__(self):
+        self.instrumentation = None  # توسط کلاینت تنظیم می‌شود
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._indexes: Dict[str, _Index] = {}
+        self._order = itertools.count()
+
+    def add(self, callback: Callable, update_type: str = "message", **filters) -> Handler:
+        """ثبت هندلر؛ filters همان پارامترهای Handler است"""
+        handler = Handler(callback, update_type=update_type, order=next(self._order), **filters)
+        handlers = self._handlers.setdefault(update_type, [])
+        handlers.append(handler)
+        handlers.sort(key=_sort_key)
+        # ایندکس همان لحظه دوباره ساخته می‌شود تا هزینه‌اش در مسیر آپدیت‌ها نباشد
+        self._indexes[update_type] = _Index(handlers)
+        return handler
+
+    def remove(self, handler: Handler):
+        handlers = self._handlers.get(handler.update_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+            self._indexes[handler.update_type] = _Index(handlers)
+
+    def message(self, **filters) -> Callable:
+        """دکوراتور هندلر پیام؛ فیلترها: commands، regex، content_types، chat_types، user_ids، chat_ids، func، priority، stop"""
+        return self._decorator("message", filters)
+
+    def edited_message(self, **filters) -> Callable:
+        return self._decorator("edited_message", filters)
+
+    def channel_post(self, **filters) -> Callable:
+        return self._decorator("channel_post", filters)
+
+    def callback_query(self, data: Optional[Union[str, Iterable[str]]] = None, **filters) -> Callable:
+        """دکوراتور هندلر دکمه‌های شیشه‌ای؛ data فیلتر دقیق و regex فیلتر الگوی callback_data است"""
+        if data is not None:
+            values = _as_set(data)
+            previous = filters.get("func")
+            filters["func"] = lambda query: query.data in values and (previous is None or previous(query))
+        return self._decorator("callback_query", filters)
+
+    def _decorator(self, update_type: str, filters: dict) -> Callable:
+        def decorator(callback: Callable):
+            self.add(callback, update_type, **filters)
+            return callback
+        return decorator
+
+    def handles(self, update_type: Optional[str]) -> bool:
+        return bool(self._handlers.get(update_type))
+
+    def __len__(self) -> int:
+        return sum(len(handlers) for handlers in self._handlers.values())
+
+    async def dispatch(self, update: Update) -> int:
+        """اجرای هندلرهای منطبق با آپدیت؛ تعداد هندلرهای اجراشده را برمی‌گرداند"""
+        update_type = update.type
+        index = self._indexes.get(update_type)
+        if index is None:
+            return 0
+        event = getattr(update, update_type)
+        raw = event.raw
+        if update_type == "callback_query":
+            text, content_type = raw.get("data"), None
+        else:
+            content_type = event.content_type
+            text = raw.get("text") or raw.get("caption")
+        instrumentation = self.instrumentation
+        handled = 0
+        for handler in index.candidates(text, content_type):
+            if not handler.check(event, content_type):
+                continue
+            handled += 1
+            if instrumentation is None:
+                await self._run(handler, raw if handler.raw else event)
+            else:
+                context = instrumentation.on_handler_start(handler.name)
+                started = time.perf_counter()
+                error = await self._run(handler, raw if handler.raw else event)
+                instrumentation.on_handler_done(handler.name, context, time.perf_counter() - started, error)
+            if handler.stop:
+                break
+        return handled
+
+    @staticmethod
+    async def _run(handler: Handler, event: Any) -> Optional[Exception]:
+        try:
+            result = handler.callback(event)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error("خطا در اجرای هندلر %s: %s", handler.name, e, extra={"handler": handler.name})
+            return e
+        return None
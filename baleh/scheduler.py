@@ -0,0 +1,386 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+
+class CronSpec:
+    """عبارت cron پنج‌بخشی: دقیقه ساعت روز-ماه ماه روز-هفته (۰ = یکشنبه)"""
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"عبارت cron باید ۵ بخش داشته باشد: {expression!r}")
+        self.expression = expression
+        fields = [self._parse(part, low, high) for part, (low, high) in zip(parts, self._RANGES)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = fields
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse(part: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for item in part.split(","):
+            step = 1
+            if "/" in item:
+                item, step_text = item.split("/", 1)
+                step = int(step_text)
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start, end = (int(x) for x in item.split("-", 1))
+            else:
+                start = end = int(item)
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"مقدار cron خارج از محدوده: {part!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, timestamp: float) -> float:
+        """اولین زمان مطابق بعد از timestamp (به وقت محلی)"""
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+                continue
+            if moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+                continue
+            return moment.timestamp()
+        raise ValueError(f"عبارت cron هیچ زمان معتبری ندارد: {self.expression!r}")
+
+
+class Job:
+    """یک کار زمان‌بندی‌شده؛ func نام متد کلاینت یا یک تابع async است"""
+
+    __slots__ = ("id", "run_at", "func", "kwargs", "interval", "cron", "cancelled")
+
+    def __init__(self, id: str, run_at: float, func: Union[str, Callable], kwargs: Dict[str, Any], interval: Optional[float] = None, cron: Optional[str] = None):
+        self.id = id
+        self.run_at = run_at
+        self.func = func
+        self.kwargs = kwargs
+        self.interval = interval
+        self.cron = CronSpec(cron) if cron else None
+        self.cancelled = False
+
+    @property
+    def recurring(self) -> bool:
+        return self.interval is not None or self.cron is not None
+
+    def next_run(self, now: float) -> float:
+        if self.cron is not None:
+            return self.cron.next_after(now)
+        # از run_at قبلی حساب می‌شود تا تأخیرها روی هم جمع نشوند
+        next_at = self.run_at + self.interval
+        return next_at if next_at > now else now + self.interval
+
+
+class JobStore:
+    """ذخیره‌ساز کارها؛ پیش‌فرض هیچ چیزی را ذخیره نمی‌کند"""
+
+    def load(self) -> List[Job]:
+        return []
+
+    def save(self, job: Job):
+        pass
+
+    def remove(self, job_id: str):
+        pass
+
+    @property
+    def dirty(self) -> bool:
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteJobStore(JobStore):
+    """ذخیره کارها در SQLite تا بعد از ری‌استارت از دست نروند
+
+    نوشتن‌ها جمع می‌شوند و در flush در یک تراکنش اعمال می‌شوند. فقط کارهایی که نام متد کلاینت
+    دارند ذخیره می‌شوند؛ کارهای با تابع فقط در حافظه اجرا می‌شوند و بعد از ری‌استارت برنمی‌گردند.
+    """
+
+    def __init__(self, path: str = "baleh_jobs.sqlite3"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, run_at REAL NOT NULL, method TEXT NOT NULL, "
+            "kwargs TEXT NOT NULL, interval REAL, cron TEXT)"
+        )
+        self._conn.commit()
+        self._pending: Dict[str, Optional[tuple]] = {}
+        # flush در executor اجرا می‌شود و save/remove روی event loop
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._memory_only: Set[str] = set()
+
+    def load(self) -> List[Job]:
+        rows = self._conn.execute("SELECT id, run_at, method, kwargs, interval, cron FROM jobs").fetchall()
+        return [Job(row[0], row[1], row[2], json.loads(row[3]), row[4], row[5]) for row in rows]
+
+    def save(self, job: Job):
+        if not isinstance(job.func, str):
+            if job.id not in self._memory_only:
+                self._memory_only.add(job.id)
+                logger.info("کار %s تابع است نه نام متد؛ فقط در حافظه نگه داشته می‌شود", job.id, extra={"job_id": job.id})
+            return
+        row = (
+            job.id, job.run_at, job.func, json.dumps(job.kwargs),
+            job.interval, job.cron.expression if job.cron else None,
+        )
+        with self._lock:
+            self._pending[job.id] = row
+
+    def remove(self, job_id: str):
+        if job_id in self._memory_only:
+            self._memory_only.discard(job_id)
+            return
+        with self._lock:
+            self._pending[job_id] = None
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, {}
+            upserts = [row for row in pending.values() if row is not None]
+            deletes = [(job_id,) for job_id, row in pending.items() if row is None]
+            try:
+                with self._conn:
+                    if upserts:
+                        self._conn.executemany("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)", upserts)
+                    if deletes:
+                        self._conn.executemany("DELETE FROM jobs WHERE id = ?", deletes)
+            except BaseException:
+                # تغییرات از دست نمی‌روند؛ تغییرات جدیدتر همان کار بر نسخه شکست‌خورده مقدم‌اند
+                with self._lock:
+                    pending.update(self._pending)
+                    self._pending = pending
+                raise
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+class Scheduler:
+    """زمان‌بند مبتنی بر min-heap که به عنوان task جدا اجرا می‌شود
+
+    درج O(log n) است و لغو با علامت‌گذاری O(1) انجام می‌شود؛ وقتی بیش از نصف heap
+    لغوشده باشد، heap از نو ساخته می‌شود.
+    """
+
+    def __init__(self, client, store: Optional[JobStore] = None, max_concurrency: int = 100, flush_interval: float = 1.0):
+        self.client = client
+        self.store = store or JobStore()
+        self.max_concurrency = max_concurrency
+        self.flush_interval = flush_interval
+        self._heap: List[tuple] = []
+        self._jobs: Dict[str, Job] = {}
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._running: Set[asyncio.Task] = set()
+        self._loaded = False
+        self.fired = 0
+        self.failed = 0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add(
+        self,
+        func: Union[str, Callable],
+        kwargs: Optional[Dict[str, Any]] = None,
+        delay: Optional[float] = None,
+        at: Optional[float] = None,
+        interval: Optional[float] = None,
+        cron: Optional[str] = None,
+        job_id: Optional[str] = None,
+    ) -> str:
+        """افزودن کار؛ زمان اجرا با delay (ثانیه)، at (timestamp)، interval یا cron تعیین می‌شود"""
+        now = time.time()
+        job = Job(job_id or uuid.uuid4().hex, now, func, kwargs or {}, interval, cron)
+        if at is not None:
+            job.run_at = at
+        elif delay is not None:
+            job.run_at = now + delay
+        elif job.cron is not None:
+            job.run_at = job.cron.next_after(now)
+        elif interval is not None:
+            job.run_at = now + interval
+        if job.id in self._jobs:
+            self.cancel(job.id)
+        self.store.save(job)
+        self._push(job)
+        self._ensure_started()
+        return job.id
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        self._cancelled += 1
+        self.store.remove(job_id)
+        if self._cancelled > len(self._heap) // 2:
+            self._compact()
+        return True
+
+    def _push(self, job: Job):
+        self._jobs[job.id] = job
+        is_first = not self._heap or job.run_at < self._heap[0][0]
+        heapq.heappush(self._heap, (job.run_at, next(self._counter), job))
+        if is_first and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+        heapq.heapify(self._heap)
+        self._cancelled = 0
+
+    def _ensure_started(self):
+        if self._task is not None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # با connect یا start_polling شروع می‌شود
+        self.start()
+
+    def start(self):
+        """اجرای حلقه زمان‌بند (داخل event loop)"""
+        if self._task is not None:
+            return
+        if not self._loaded:
+            self._loaded = True
+            for job in self.store.load():
+                if job.id not in self._jobs:
+                    self._push(job)
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self, timeout: float = 10):
+        """توقف حلقه و صبر برای کارهای در حال اجرا"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._running:
+            await asyncio.wait(self._running, timeout=timeout)
+            for task in self._running:
+                task.cancel()
+        self.store.flush()
+
+    async def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    self._cancelled -= 1
+                    continue
+                self._fire(job, now)
+            if time.monotonic() - last_flush >= self.flush_interval:
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, self.store.flush)
+                except Exception as e:
+                    # اجرای کارها ادامه پیدا می‌کند و flush بعد از flush_interval دوباره امتحان می‌شود
+                    logger.error("خطا در ذخیره کارهای زمان‌بندی‌شده: %s", e)
+                last_flush = time.monotonic()
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            if timeout is not None and timeout <= 0:
+                continue
+            if self.store.dirty:
+                # تغییرات ذخیره‌نشده حداکثر بعد از flush_interval نوشته می‌شوند
+                timeout = self.flush_interval if timeout is None else min(timeout, self.flush_interval)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _fire(self, job: Job, now: float):
+        lateness = now - job.run_at
+        self.max_lateness = max(self.max_lateness, lateness)
+        self.total_lateness += lateness
+        self.fired += 1
+        instrumentation = getattr(self.client, "instrumentation", None)
+        if instrumentation is not None:
+            instrumentation.on_job(job.func if isinstance(job.func, str) else getattr(job.func, "__name__", "job"), lateness)
+        if job.recurring:
+            job.run_at = job.next_run(now)
+            self.store.save(job)
+            heapq.heappush(self._heap, (job.run_at, next(self._counter), job))
+        else:
+            del self._jobs[job.id]
+            self.store.remove(job.id)
+        task = asyncio.ensure_future(self._execute(job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job: Job):
+        async with self._semaphore:
+            func = getattr(self.client, job.func) if isinstance(job.func, str) else job.func
+            try:
+                await func(**job.kwargs)
+            except Exception as e:
+                self.failed += 1
+                logger.error("خطا در اجرای کار زمان‌بندی‌شده %s: %s", job.id, e, extra={"job_id": job.id})
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "pending": len(self._jobs),
+            "running": len(self._running),
+            "fired": self.fired,
+            "failed": self.failed,
+            "max_lateness": self.max_lateness,
+            "avg_lateness": self.total_lateness / self.fired if self.fired else 0.0,
+        }
@@ -0,0 +1,306 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .client import BaleClient
+from .dispatcher import Dispatcher
+from .objects.update import Update, update_chat_id
+
+logger = logging.getLogger(__name__)
+
+
+class HashRing:
+    """هش سازگار برای نگاشت چت به worker؛ با تغییر تعداد workerها فقط بخش کوچکی جابه‌جا می‌شود"""
+
+    def __init__(self, nodes: int, replicas: int = 64):
+        self.nodes = nodes
+        points = sorted((self._hash(f"{node}:{replica}"), node) for node in range(nodes) for replica in range(replicas))
+        self._keys = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    def get(self, key: Any) -> int:
+        index = bisect.bisect(self._keys, self._hash(str(key)))
+        return self._nodes[index % len(self._nodes)]
+
+
+def _worker_main(index: int, token: str, setup: Callable[[BaleClient], Any], client_kwargs: dict, inbox, acks):
+    try:
+        asyncio.run(_worker_loop(index, token, setup, client_kwargs, inbox, acks))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _worker_loop(index: int, token: str, setup: Callable[[BaleClient], Any], client_kwargs: dict, inbox, acks):
+    client = BaleClient(token, **client_kwargs)
+    result = setup(client)
+    if asyncio.iscoroutine(result):
+        await result
+    await client.connect()
+
+    async def process(item):
+        seq, update = item
+        try:
+            if client.chat_cache is not None:
+                client.chat_cache.observe(update)
+            await client._process_update(Update.from_dict(update, client))
+        finally:
+            acks.put((index, seq))
+
+    # ترتیب هر چت داخل worker هم حفظ می‌شود
+    dispatcher = Dispatcher(process, workers=client.dispatcher.workers, max_pending=client.dispatcher.max_pending)
+    dispatcher.start()
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            item = await loop.run_in_executor(None, inbox.get)
+            if item is None:
+                break
+            await dispatcher.put(update_chat_id(item[1]), item)
+    finally:
+        await dispatcher.stop(drain=True)
+        await client.disconnect()
+
+
+class _IntakeClient(BaleClient):
+    """کلاینت دریافت: آپدیت‌ها به جای اجرای هندلر به workerها فرستاده می‌شوند"""
+
+    def __init__(self, token: str, route: Callable[[dict], Any], **kwargs):
+        super().__init__(token, **kwargs)
+        self._route = route
+
+    async def _feed_update(self, update: dict) -> bool:
+        update_id = update.get("update_id")
+        if update_id is not None and not self._recent_updates.add(update_id):
+            return False
+        await self._route(update)
+        return True
+
+
+class _Worker:
+    __slots__ = ("index", "process", "inbox", "unacked", "deliveries", "started_at", "restarts")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.inbox = None
+        self.unacked: "OrderedDict[int, dict]" = OrderedDict()
+        self.deliveries: Dict[int, int] = {}
+        self.started_at = 0.0
+        self.restarts = 0
+
+
+class ShardedRunner:
+    """یک فرایند دریافت (پولینگ یا وب‌هوک) و N فرایند worker برای اجرای هندلرها
+
+    آپدیت‌ها با هش سازگار روی chat.id به workerها می‌رسند تا ترتیب و وضعیت هر چت در یک worker بماند.
+    setup(client) در هر worker هندلرها را ثبت می‌کند و باید تابعی در سطح ماژول باشد (قابل pickle).
+    هر آپدیت تا تأیید worker نگه داشته می‌شود و اگر worker از کار بیفتد، بعد از راه‌اندازی دوباره
+    دوباره تحویل داده می‌شود (حداقل یک بار؛ هندلرها باید تکرار را تحمل کنند).
+    """
+
+    def __init__(
+        self,
+        token: str,
+        setup: Callable[[BaleClient], Any],
+        processes: int = 2,
+        max_inflight: int = 1000,
+        max_deliveries: int = 3,
+        restart_delay: float = 1.0,
+        start_method: str = "spawn",
+        intake_kwargs: Optional[dict] = None,
+        **client_kwargs: Any,
+    ):
+        """max_inflight سقف آپدیت‌های تأییدنشده هر worker و max_deliveries سقف تحویل یک آپدیت است"""
+        if processes < 1:
+            raise ValueError("تعداد فرایندها باید حداقل ۱ باشد")
+        self.token = token
+        self.setup = setup
+        self.processes = processes
+        self.max_inflight = max_inflight
+        self.max_deliveries = max_deliveries
+        self.restart_delay = restart_delay
+        self.client_kwargs = client_kwargs
+        self.ring = HashRing(processes)
+        self.intake = _IntakeClient(token, self._route, **(intake_kwargs or {}))
+        self._ctx = multiprocessing.get_context(start_method)
+        self._acks = None
+        self._workers: List[_Worker] = [_Worker(i) for i in range(processes)]
+        self._seq = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._capacity: Optional[asyncio.Condition] = None
+        self._ack_thread: Optional[threading.Thread] = None
+        self._supervisor: Optional[asyncio.Task] = None
+        self._started = False
+        self.routed = 0
+        self.acked = 0
+        self.dropped = 0
+
+    def _spawn(self, worker: _Worker):
+        worker.inbox = self._ctx.Queue()
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.index, self.token, self.setup, self.client_kwargs, worker.inbox, self._acks),
+            name=f"baleh-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+
+    async def start(self):
+        """راه‌اندازی workerها، خواننده تأییدها و ناظر"""
+        if self._started:
+            return
+        self._started = True
+        self._loop = asyncio.get_running_loop()
+        self._capacity = asyncio.Condition()
+        self._acks = self._ctx.Queue()
+        for worker in self._workers:
+            self._spawn(worker)
+        self._ack_thread = threading.Thread(target=self._read_acks, name="baleh-acks", daemon=True)
+        self._ack_thread.start()
+        self._supervisor = asyncio.ensure_future(self._supervise())
+        logger.info("%d worker راه‌اندازی شد", self.processes)
+
+    async def _route(self, update: dict):
+        worker = self._workers[self.ring.get(update_chat_id(update))]
+        if len(worker.unacked) >= self.max_inflight:
+            async with self._capacity:
+                await self._capacity.wait_for(lambda: len(worker.unacked) < self.max_inflight)
+        self._seq += 1
+        worker.unacked[self._seq] = update
+        worker.deliveries[self._seq] = 1
+        worker.inbox.put((self._seq, update))
+        self.routed += 1
+
+    def _read_acks(self):
+        while True:
+            item = self._acks.get()
+            if item is None:
+                return
+            self._loop.call_soon_threadsafe(self._on_ack, *item)
+
+    def _on_ack(self, index: int, seq: int):
+        worker = self._workers[index]
+        update = worker.unacked.pop(seq, None)
+        if update is not None:
+            self._commit(update)
+            worker.deliveries.pop(seq, None)
+            self.acked += 1
+            if len(worker.unacked) == self.max_inflight - 1:
+                asyncio.ensure_future(self._notify_capacity())
+
+    def _commit(self, update: dict):
+        # offset فقط بعد از تأیید worker (یا کنار گذاشتن آپدیت) در offset_store دریافت جلو می‌رود
+        update_id = update.get("update_id")
+        if update_id is not None:
+            self.intake.offset_store.ack(update_id)
+
+    async def _notify_capacity(self):
+        async with self._capacity:
+            self._capacity.notify_all()
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(0.5)
+            for worker in self._workers:
+                if worker.process.is_alive():
+                    continue
+                wait = worker.started_at + self.restart_delay - time.monotonic()
+                if wait > 0:
+                    continue
+                logger.error("worker %d با کد %s متوقف شد؛ راه‌اندازی دوباره", worker.index, worker.process.exitcode)
+                self._restart(worker)
+
+    def _restart(self, worker: _Worker):
+        worker.restarts += 1
+        # صف قبلی خواننده ندارد؛ نباید هنگام خروج منتظر خالی شدنش ماند
+        worker.inbox.cancel_join_thread()
+        worker.inbox.close()
+        self._spawn(worker)
+        for seq in list(worker.unacked):
+            worker.deliveries[seq] += 1
+            if worker.deliveries[seq] > self.max_deliveries:
+                # آپدیتی که چند بار worker را از کار انداخته دیگر فرستاده نمی‌شود
+                update_id = worker.unacked[seq].get("update_id")
+                logger.error("آپدیت %s بعد از %d تحویل کنار گذاشته شد", update_id, self.max_deliveries, extra={"update_id": update_id})
+                self._commit(worker.unacked.pop(seq))
+                del worker.deliveries[seq]
+                self.dropped += 1
+                continue
+            worker.inbox.put((seq, worker.unacked[seq]))
+        asyncio.ensure_future(self._notify_capacity())
+
+    async def join(self, timeout: Optional[float] = None) -> bool:
+        """انتظار تا تأیید همه آپدیت‌های ارسال‌شده"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(worker.unacked for worker in self._workers):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def stop(self, timeout: float = 10.0):
+        """توقف دریافت، انتظار برای تأیید آپدیت‌های باقی‌مانده و بستن workerها"""
+        if not self._started:
+            return
+        self._started = False
+        self.intake.stop_polling()
+        await self.join(timeout)
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            self._supervisor = None
+        for worker in self._workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.inbox.put(None)
+        loop = asyncio.get_running_loop()
+        for worker in self._workers:
+            if worker.process is not None:
+                await loop.run_in_executor(None, worker.process.join, timeout)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+        if self._acks is not None:
+            self._acks.put(None)
+        await self.intake.disconnect()
+        logger.info("همه workerها متوقف شدند")
+
+    async def run_polling(self, allowed_updates: Optional[List[str]] = None, limit: int = 100, catch_up: bool = False):
+        """دریافت آپدیت‌ها با پولینگ و پخش آن‌ها بین workerها"""
+        await self.start()
+        try:
+            await self.intake.start_polling(allowed_updates=allowed_updates, limit=limit, catch_up=catch_up)
+        finally:
+            await self.stop()
+
+    async def run_webhook(self, host: str = "0.0.0.0", port: int = 8080, path: str = "/webhook", secret: Optional[str] = None, webhook_url: Optional[str] = None):
+        """دریافت آپدیت‌ها با وب‌هوک و پخش آن‌ها بین workerها"""
+        await self.start()
+        try:
+            await self.intake.run_webhook(host, port, path, secret, webhook_url)
+        finally:
+            await self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routed": self.routed,
+            "acked": self.acked,
+            "dropped": self.dropped,
+            "workers": [
+                {
+                    "index": worker.index,
+                    "alive": worker.process is not None and worker.process.is_alive(),
+                    "unacked": len(worker.unacked),
+                    "restarts": worker.restarts,
+                }
+                for worker in self._workers
+            ],
+        }
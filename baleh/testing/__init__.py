@@ -0,0 +1,4 @@
+"""ابزارهای تست: سرور جعلی API بله برای اجرای ربات‌ها و بنچمارک‌ها بدون شبکه"""
+from .server import MockBaleServer
+
+__all__ = ["MockBaleServer"]
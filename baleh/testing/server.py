@@ -0,0 +1,449 @@
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from aiohttp import web
+
+from ..codec import JSONCodec, get_codec
+
+# فیلد فایل هر متد ارسال رسانه
+MEDIA_FIELDS = {
+    "sendPhoto": "photo",
+    "sendDocument": "document",
+    "sendVideo": "video",
+    "sendAudio": "audio",
+    "sendVoice": "voice",
+    "sendAnimation": "animation",
+    "sendSticker": "sticker",
+    "sendVideoNote": "video_note",
+}
+
+# متدهایی که پیام برمی‌گردانند
+MESSAGE_METHODS = {"sendMessage", "sendLocation", "sendContact", "forwardMessage", "editMessageText", *MEDIA_FIELDS}
+
+DESCRIPTIONS = {
+    400: "Bad Request",
+    403: "Forbidden",
+    429: "Too Many Requests: retry later",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+}
+
+Latency = Union[float, Callable[[str], float]]
+
+
+class _Failure:
+    __slots__ = ("error_code", "description", "retry_after", "remaining", "html")
+
+    def __init__(self, error_code: int, description: str, retry_after: Optional[float], times: int, html: bool = False):
+        self.error_code = error_code
+        self.description = description
+        self.retry_after = retry_after
+        self.remaining = times
+        self.html = html
+
+
+class MockBaleServer:
+    """سرور جعلی API بله روی aiohttp برای تست و بنچمارک بدون شبکه
+
+    getUpdates از صف آپدیت‌ها (push_update/push_message) یا جریان ساخته‌شده با stream پاسخ می‌دهد و
+    offset را مثل سرور واقعی تأیید می‌کند. متدهای sendX پیام ساختگی برمی‌گردانند؛ latency تأخیر
+    هر پاسخ (عدد یا تابعی از نام متد)، error_rate و flood_rate احتمال خطای 500 و 429 هستند و با fail
+    می‌توان خطای مشخصی را برای چند درخواست بعدی یک متد برنامه‌ریزی کرد. فایل‌های multipart تکه‌تکه
+    خوانده و فقط شمارش می‌شوند (upload_bytes) و در حافظه نمی‌مانند.
+
+        async with MockBaleServer() as server:
+            client = server.client()
+            server.push_message(chat_id=1, text="/start")
+    """
+
+    def __init__(
+        self,
+        token: str = "TEST:TOKEN",
+        latency: Latency = 0.0,
+        error_rate: float = 0.0,
+        flood_rate: float = 0.0,
+        retry_after: float = 1,
+        max_poll_wait: Optional[float] = None,
+        record: bool = False,
+        seed: Optional[int] = 0,
+        codec: Optional[JSONCodec] = None,
+        upload_bandwidth: Optional[float] = None,
+    ):
+        """max_poll_wait سقف انتظار long poll است (None یعنی همان timeout درخواست)؛
+        با record=True بدنه همه درخواست‌ها در requests نگه داشته می‌شود.
+        upload_bandwidth (بایت بر ثانیه برای هر درخواست) خواندن فایل‌ها را کند می‌کند تا
+        اثر اندازه آپلود مثل یک اتصال واقعی دیده شود.
+        """
+        self.token = token
+        self.latency = latency
+        self.error_rate = error_rate
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.max_poll_wait = max_poll_wait
+        self.record = record
+        self.codec = codec or get_codec()
+        self.upload_bandwidth = upload_bandwidth
+        self.random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.upload_bytes: Counter = Counter()
+        self.uploads = 0
+        self.requests: List[Tuple[str, dict]] = []
+        self.served_updates = 0
+        self._updates: Deque[dict] = deque()
+        self._next_update_id = 1
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._stream: Optional[Callable[[int], dict]] = None
+        self._stream_remaining: Optional[int] = None
+        self._stream_index = itertools.count()
+        self._failures: Dict[str, Deque[_Failure]] = {}
+        self.files: Dict[str, Union[bytes, int]] = {}
+        self.members: Dict[Tuple[int, int], str] = {}
+        self.downloads = 0
+        self._update_event: Optional[asyncio.Event] = None
+        self._runner: Optional[web.AppRunner] = None
+        self.host = "127.0.0.1"
+        self.port: Optional[int] = None
+
+    @property
+    def url(self) -> str:
+        """نشانی سرور برای api_url کلاینت"""
+        if self.port is None:
+            raise RuntimeError("سرور هنوز شروع نشده است")
+        return f"http://{self.host}:{self.port}"
+
+    def client(self, **kwargs: Any):
+        """BaleClient متصل به این سرور (محدودکننده نرخ برای سنجش خود کتابخانه خاموش است)"""
+        from ..client import BaleClient
+
+        kwargs.setdefault("rate_limiter", None)
+        return BaleClient(self.token, api_url=self.url, **kwargs)
+
+    # ---- آپدیت‌ها ----
+
+    def push_update(self, update: dict) -> dict:
+        """افزودن آپدیت به صف getUpdates؛ اگر update_id نداشته باشد به ترتیب داده می‌شود"""
+        if "update_id" not in update:
+            update = dict(update, update_id=self._next_update_id)
+        self._next_update_id = max(self._next_update_id, update["update_id"] + 1)
+        self._updates.append(update)
+        if self._update_event is not None:
+            self._update_event.set()
+        return update
+
+    def push_message(self, chat_id: int, text: Optional[str] = None, user_id: Optional[int] = None, chat_type: str = "private", **fields: Any) -> dict:
+        """افزودن آپدیت پیام؛ fields فیلدهای دیگر پیام (مثلاً photo یا caption) هستند"""
+        return self.push_update({"message": self.make_message(chat_id, text, user_id, chat_type, **fields)})
+
+    def feed(self, updates: Iterable[dict]):
+        for update in updates:
+            self.push_update(update)
+
+    def stream(self, factory: Callable[[int], dict], count: Optional[int] = None):
+        """جریان آپدیت: هر وقت صف خالی شود factory(i) آپدیت‌های بعدی را می‌سازد (count=None یعنی بی‌پایان)"""
+        self._stream = factory
+        self._stream_remaining = count
+        self._stream_index = itertools.count()
+        if self._update_event is not None:
+            self._update_event.set()
+
+    @property
+    def pending_updates(self) -> int:
+        return len(self._updates)
+
+    def make_message(self, chat_id: int, text: Optional[str] = None, user_id: Optional[int] = None, chat_type: str = "private", **fields: Any) -> dict:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": chat_type},
+            "from": {"id": user_id or chat_id, "is_bot": False, "first_name": "Test"},
+        }
+        if text is not None:
+            message["text"] = text
+        message.update(fields)
+        return message
+
+    def add_file(self, data: Union[bytes, int], file_id: Optional[str] = None) -> str:
+        """ثبت فایل قابل دانلود؛ data عدد یعنی فایل ساختگی با همین اندازه که تکه‌تکه تولید می‌شود"""
+        file_id = file_id or f"mock-file-{next(self._file_ids)}"
+        self.files[file_id] = data
+        return file_id
+
+    # ---- خطاهای تزریقی ----
+
+    def fail(self, method: str = "*", error_code: int = 500, description: Optional[str] = None, times: int = 1, retry_after: Optional[float] = None, html: bool = False):
+        """خطای error_code برای times درخواست بعدی method ("*" یعنی همه متدها جز getUpdates)
+
+        با html=True بدنه پاسخ صفحه HTML است (مثل 502 یک پروکسی) نه JSON بله.
+        """
+        if error_code == 429 and retry_after is None:
+            retry_after = self.retry_after
+        description = description or DESCRIPTIONS.get(error_code, "Error")
+        self._failures.setdefault(method, deque()).append(_Failure(error_code, description, retry_after, times, html))
+
+    def _injected_failure(self, method: str) -> Optional[_Failure]:
+        for key in (method, "*"):
+            failures = self._failures.get(key)
+            if failures:
+                failure = failures[0]
+                failure.remaining -= 1
+                if failure.remaining <= 0:
+                    failures.popleft()
+                return failure
+        if self.flood_rate and self.random.random() < self.flood_rate:
+            return _Failure(429, DESCRIPTIONS[429], self.retry_after, 1)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return _Failure(500, DESCRIPTIONS[500], None, 1)
+        return None
+
+    # ---- چرخه عمر ----
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> "MockBaleServer":
+        """اجرای سرور؛ port=0 یعنی یک پورت آزاد"""
+        self._update_event = asyncio.Event()
+        app = web.Application(client_max_size=1024 ** 3)
+        app.router.add_route("*", "/bot{token}/{method}", self._handle)
+        app.router.add_get("/file/bot{token}/{path:.+}", self._download)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.host = host
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockBaleServer":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    # ---- پاسخ‌ها ----
+
+    def _reply(self, result: Any) -> web.Response:
+        return web.Response(body=self.codec.dumps({"ok": True, "result": result}), content_type="application/json")
+
+    def _error(self, error_code: int, description: str, parameters: Optional[dict] = None) -> web.Response:
+        body = {"ok": False, "error_code": error_code, "description": description}
+        if parameters:
+            body["parameters"] = parameters
+        return web.Response(status=error_code, body=self.codec.dumps(body), content_type="application/json")
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        if request.match_info["token"] != self.token:
+            return self._error(403, "Token not found")
+        params = await self._read_params(request)
+        if self.record:
+            self.requests.append((method, params))
+        if method == "getUpdates":
+            return self._reply(await self._get_updates(params))
+        latency = self.latency(method) if callable(self.latency) else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+        failure = self._injected_failure(method)
+        if failure is not None:
+            self.errors[failure.error_code] += 1
+            if failure.html:
+                page = f"<html><body><h1>{failure.error_code} {failure.description}</h1></body></html>"
+                return web.Response(status=failure.error_code, text=page, content_type="text/html")
+            parameters = {"retry_after": failure.retry_after} if failure.retry_after is not None else None
+            return self._error(failure.error_code, failure.description, parameters)
+        handler = getattr(self, f"_method_{method}", None)
+        if handler is not None:
+            result = handler(params)
+            return result if isinstance(result, web.Response) else self._reply(result)
+        if method in MESSAGE_METHODS:
+            return self._reply(self._sent_message(method, params))
+        return self._error(404, "Not Found: method not found")
+
+    async def _read_params(self, request: web.Request) -> dict:
+        params: Dict[str, Any] = dict(request.query)
+        if request.content_type == "application/json":
+            params.update(self.codec.loads(await request.read()))
+        elif request.content_type == "multipart/form-data":
+            reader = await request.multipart()
+            async for part in reader:
+                if part.filename is None:
+                    params[part.name] = await part.text()
+                    continue
+                # فایل فقط شمارش می‌شود تا بنچمارک آپلود حافظه سرور را اندازه نگیرد
+                size = 0
+                while True:
+                    chunk = await part.read_chunk(256 * 1024)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if self.upload_bandwidth:
+                        await asyncio.sleep(len(chunk) / self.upload_bandwidth)
+                self.upload_bytes[part.name] += size
+                self.uploads += 1
+                params[part.name] = {"filename": part.filename, "size": size}
+        elif request.content_type == "application/x-www-form-urlencoded":
+            params.update(await request.post())
+        return params
+
+    async def _get_updates(self, params: dict) -> List[dict]:
+        offset = int(params.get("offset") or 0)
+        limit = min(int(params.get("limit") or 100), 100)
+        timeout = float(params.get("timeout") or 0)
+        if self.max_poll_wait is not None:
+            timeout = min(timeout, self.max_poll_wait)
+        # offset آپدیت‌های قبلی را تأیید و حذف می‌کند
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates:
+            self._fill_from_stream(limit)
+        if not self._updates and timeout > 0:
+            self._update_event.clear()
+            try:
+                await asyncio.wait_for(self._update_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._fill_from_stream(limit)
+        result = list(itertools.islice((u for u in self._updates if u["update_id"] >= offset), limit))
+        self.served_updates += len(result)
+        return result
+
+    def _fill_from_stream(self, limit: int):
+        if self._stream is None:
+            return
+        count = limit if self._stream_remaining is None else min(limit, self._stream_remaining)
+        for _ in range(count):
+            self.push_update(self._stream(next(self._stream_index)))
+        if self._stream_remaining is not None:
+            self._stream_remaining -= count
+
+    def _sent_message(self, method: str, params: dict) -> dict:
+        chat_id = _as_int(params.get("chat_id"))
+        message = self.make_message(chat_id, params.get("text"))
+        message["from"] = {"id": 1, "is_bot": True, "first_name": "MockBot"}
+        if params.get("caption"):
+            message["caption"] = params["caption"]
+        field = MEDIA_FIELDS.get(method)
+        if field is not None:
+            self._attach_media(message, field, params.get(field))
+        return message
+
+    def _attach_media(self, message: dict, field: str, value: Any):
+        size = value.get("size") if isinstance(value, dict) else None
+        file_id = value if isinstance(value, str) else f"mock-{field}-{next(self._file_ids)}"
+        media = {"file_id": file_id, "file_unique_id": file_id}
+        if size is not None:
+            media["file_size"] = size
+        message[field] = [dict(media, width=90, height=90), dict(media, width=1280, height=1280)] if field == "photo" else media
+
+    def _method_sendMediaGroup(self, params: dict) -> Any:
+        items = params.get("media")
+        if isinstance(items, str):
+            items = self.codec.loads(items)
+        if not items or not 2 <= len(items) <= 10:
+            return self._error(400, "Bad Request: media must include 2-10 items")
+        group_id = str(next(self._file_ids))
+        messages = []
+        for item in items:
+            value = item.get("media")
+            if isinstance(value, str) and value.startswith("attach://"):
+                value = params.get(value[len("attach://"):])
+                if value is None:
+                    return self._error(400, "Bad Request: attached file not found")
+            message = self.make_message(_as_int(params.get("chat_id")))
+            message["from"] = {"id": 1, "is_bot": True, "first_name": "MockBot"}
+            message["media_group_id"] = group_id
+            if item.get("caption"):
+                message["caption"] = item["caption"]
+            self._attach_media(message, item.get("type", "photo"), value)
+            messages.append(message)
+        return messages
+
+    def _method_getMe(self, params: dict) -> dict:
+        return {"id": 1, "is_bot": True, "first_name": "MockBot", "username": "mock_bot"}
+
+    def _method_deleteMessage(self, params: dict) -> bool:
+        return True
+
+    def _method_answerCallbackQuery(self, params: dict) -> bool:
+        return True
+
+    def _method_setWebhook(self, params: dict) -> bool:
+        return True
+
+    def _method_deleteWebhook(self, params: dict) -> bool:
+        return True
+
+    def _method_getFile(self, params: dict) -> Any:
+        file_id = params.get("file_id")
+        if file_id not in self.files:
+            return self._error(400, "Bad Request: file not found")
+        data = self.files[file_id]
+        size = data if isinstance(data, int) else len(data)
+        return {"file_id": file_id, "file_unique_id": file_id, "file_size": size, "file_path": f"files/{file_id}"}
+
+    async def _download(self, request: web.Request) -> web.StreamResponse:
+        if request.match_info["token"] != self.token:
+            return self._error(403, "Token not found")
+        file_id = request.match_info["path"].rsplit("/", 1)[-1]
+        data = self.files.get(file_id)
+        if data is None:
+            return self._error(404, "Not Found")
+        self.downloads += 1
+        if isinstance(data, bytes):
+            return web.Response(body=data, content_type="application/octet-stream")
+        response = web.StreamResponse(headers={"Content-Type": "application/octet-stream", "Content-Length": str(data)})
+        await response.prepare(request)
+        block = b"\0" * (256 * 1024)
+        remaining = data
+        while remaining > 0:
+            await response.write(block[:remaining])
+            remaining -= len(block)
+        await response.write_eof()
+        return response
+
+    def _method_getChat(self, params: dict) -> dict:
+        return {"id": _as_int(params.get("chat_id")), "type": "private"}
+
+    def set_member(self, chat_id: int, user_id: int, status: str = "member"):
+        """وضعیت عضویت برای getChatMember و getChatAdministrators (پیش‌فرض همه member هستند)"""
+        self.members[(chat_id, user_id)] = status
+
+    def _method_getChatMember(self, params: dict) -> dict:
+        chat_id, user_id = _as_int(params.get("chat_id")), _as_int(params.get("user_id"))
+        status = self.members.get((chat_id, user_id), "member")
+        return {"status": status, "user": {"id": user_id, "is_bot": False, "first_name": "Test"}}
+
+    def _method_getChatAdministrators(self, params: dict) -> list:
+        chat_id = _as_int(params.get("chat_id"))
+        return [
+            {"status": status, "user": {"id": user_id, "is_bot": False, "first_name": "Test"}}
+            for (chat, user_id), status in self.members.items()
+            if chat == chat_id and status in ("creator", "administrator")
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(self.calls),
+            "errors": dict(self.errors),
+            "served_updates": self.served_updates,
+            "pending_updates": len(self._updates),
+            "uploads": self.uploads,
+            "upload_bytes": sum(self.upload_bytes.values()),
+        }
+
+
+def _as_int(value: Any) -> Any:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
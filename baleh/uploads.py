@@ -0,0 +1,220 @@
+import asyncio
+import errno
+import inspect
+import os
+from typing import IO, Any, AsyncIterable, AsyncIterator, Optional, Union
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class UploadBudget:
+    """سقف حافظه‌ای که همه آپلودهای در جریان روی هم می‌توانند اشغال کنند"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        if max_bytes < 1:
+            raise ValueError("max_bytes باید مثبت باشد")
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self, size: int) -> int:
+        """رزرو size بایت؛ تکه‌های بزرگ‌تر از کل سقف به اندازه سقف رزرو می‌شوند"""
+        size = min(size, self.max_bytes)
+        cond = self._condition()
+        async with cond:
+            await cond.wait_for(lambda: self.in_use + size <= self.max_bytes)
+            self.in_use += size
+        return size
+
+    async def release(self, size: int):
+        cond = self._condition()
+        async with cond:
+            self.in_use -= size
+            cond.notify_all()
+
+
+class FileId(str):
+    """file_id یا URL که همان‌طور فرستاده می‌شود، حتی اگر شبیه مسیر باشد"""
+
+    __slots__ = ()
+
+
+def _looks_like_path(value: str) -> bool:
+    if "://" in value:
+        return False
+    separators = (os.sep, os.altsep, "/")
+    return any(sep and sep in value for sep in separators) or bool(os.path.splitext(value)[1])
+
+
+class InputFile:
+    """فایل ورودی برای آپلود: مسیر، file_id، bytes، فایل باز یا async iterator
+
+    PathLike همیشه مسیر است. رشته‌ای که جداکننده مسیر یا پسوند دارد مسیر حساب می‌شود و بقیه
+    رشته‌ها (و FileId) file_id یا URL هستند؛ برای فایلی بدون پسوند در پوشه جاری از Path یا "./name"
+    استفاده کنید. نبودن فایل با check() قبل از ارسال درخواست گزارش می‌شود.
+    """
+
+    def __init__(self, source: Any, filename: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.kind = self._detect(source)
+        self.filename = filename or self._guess_filename()
+        # موقعیت اولیه فایل باز تا در تلاش دوباره از همان‌جا خوانده شود
+        self._start = source.tell() if self.kind == "fileobj" and self.replayable else None
+
+    @staticmethod
+    def _detect(source: Any) -> str:
+        if isinstance(source, FileId):
+            return "file_id"
+        if isinstance(source, os.PathLike):
+            return "path"
+        if isinstance(source, str):
+            # بدون دسترسی به دیسک تصمیم گرفته می‌شود تا مسیر اشتباه به جای file_id فرستاده نشود
+            return "path" if _looks_like_path(source) else "file_id"
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return "bytes"
+        if hasattr(source, "read"):
+            return "fileobj"
+        if hasattr(source, "__aiter__"):
+            return "aiter"
+        raise TypeError(f"نوع فایل پشتیبانی نمی‌شود: {type(source).__name__}")
+
+    def _guess_filename(self) -> Optional[str]:
+        if self.kind == "path":
+            return os.path.basename(os.fspath(self.source))
+        if self.kind == "fileobj":
+            name = getattr(self.source, "name", None)
+            if isinstance(name, str):
+                return os.path.basename(name)
+        return None
+
+    async def check(self):
+        """FileNotFoundError برای مسیری که فایلش وجود ندارد (در executor، قبل از باز کردن اتصال)"""
+        if self.kind != "path":
+            return
+        path = os.fspath(self.source)
+        if not await asyncio.get_running_loop().run_in_executor(None, os.path.isfile, path):
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+
+    @property
+    def is_file_id(self) -> bool:
+        return self.kind == "file_id"
+
+    @property
+    def replayable(self) -> bool:
+        """آیا می‌توان بدنه را برای تلاش دوباره از اول ساخت"""
+        if self.kind in ("path", "file_id", "bytes"):
+            return True
+        if self.kind == "fileobj":
+            seekable = getattr(self.source, "seekable", None)
+            return bool(seekable and not inspect.iscoroutinefunction(seekable) and seekable())
+        return False
+
+    def payload(self, budget: Optional[UploadBudget] = None) -> Union[str, bytes, memoryview, AsyncIterator[bytes]]:
+        """مقداری که به aiohttp.FormData داده می‌شود"""
+        if self.kind == "file_id":
+            return self.source
+        if self.kind == "bytes":
+            # داده از قبل در حافظه است؛ بدون کپی فرستاده می‌شود
+            return self.source
+        return self.stream(budget)
+
+    async def stream(self, budget: Optional[UploadBudget] = None) -> AsyncIterator[bytes]:
+        """خواندن تکه‌تکه فایل بدون بلاک کردن event loop"""
+        if self.kind == "bytes":
+            view = memoryview(self.source)
+            for start in range(0, len(view), self.chunk_size):
+                yield bytes(view[start:start + self.chunk_size])
+            return
+        if self.kind == "aiter":
+            async for chunk in self.source:
+                reserved = await budget.acquire(len(chunk)) if budget else 0
+                try:
+                    yield chunk
+                finally:
+                    if reserved:
+                        await budget.release(reserved)
+            return
+        if self.kind not in ("path", "fileobj"):
+            raise TypeError("file_id قابل استریم نیست")
+
+        loop = asyncio.get_running_loop()
+        if self.kind == "path":
+            f = await loop.run_in_executor(None, open, os.fspath(self.source), "rb")
+        else:
+            f = self.source
+        async_read = inspect.iscoroutinefunction(getattr(f, "read", None))
+        if self._start is not None and not async_read:
+            await loop.run_in_executor(None, f.seek, self._start)
+        try:
+            while True:
+                reserved = await budget.acquire(self.chunk_size) if budget else 0
+                try:
+                    if async_read:
+                        chunk = await f.read(self.chunk_size)
+                    else:
+                        chunk = await loop.run_in_executor(None, f.read, self.chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+                finally:
+                    if reserved:
+                        await budget.release(reserved)
+        finally:
+            if self.kind == "path":
+                await loop.run_in_executor(None, f.close)
+
+
+FileInput = Union[str, FileId, os.PathLike, bytes, bytearray, memoryview, IO[bytes], AsyncIterable[bytes], InputFile]
+
+
+class InputMedia:
+    """یک آیتم آلبوم برای send_media_group؛ media می‌تواند مسیر، bytes، فایل باز یا file_id باشد"""
+
+    type = ""
+
+    def __init__(self, media: FileInput, caption: Optional[str] = None, parse_mode: Optional[str] = None, filename: Optional[str] = None, **fields: Any):
+        self.media = media if isinstance(media, InputFile) else InputFile(media, filename=filename)
+        self.caption = caption
+        self.parse_mode = parse_mode
+        self.fields = {name: value for name, value in fields.items() if value is not None}
+
+    def to_dict(self, media: str) -> dict:
+        """توصیف JSON آیتم؛ media مقدار file_id یا attach://name است"""
+        data = {"type": self.type, "media": media}
+        if self.caption:
+            data["caption"] = self.caption
+        if self.parse_mode:
+            data["parse_mode"] = self.parse_mode
+        data.update(self.fields)
+        return data
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.media.filename or self.media.kind!r})"
+
+
+class InputMediaPhoto(InputMedia):
+    type = "photo"
+
+
+class InputMediaVideo(InputMedia):
+    type = "video"
+
+    def __init__(self, media: FileInput, caption: Optional[str] = None, parse_mode: Optional[str] = None, filename: Optional[str] = None, width: Optional[int] = None, height: Optional[int] = None, duration: Optional[int] = None, **fields: Any):
+        super().__init__(media, caption, parse_mode, filename, width=width, height=height, duration=duration, **fields)
+
+
+class InputMediaAudio(InputMedia):
+    type = "audio"
+
+    def __init__(self, media: FileInput, caption: Optional[str] = None, parse_mode: Optional[str] = None, filename: Optional[str] = None, duration: Optional[int] = None, performer: Optional[str] = None, title: Optional[str] = None, **fields: Any):
+        super().__init__(media, caption, parse_mode, filename, duration=duration, performer=performer, title=title, **fields)
+
+
+class InputMediaDocument(InputMedia):
+    type = "document"
@@ -1,5 +1,13 @@
 import aiohttp
+import asyncio
+import hashlib
+import json
 import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Union
+from ..exceptions import BaleAPIError, RetryAfter
 
 logger = logging.getLogger(__name__)
 
@@ -9,16 +17,170 @@ def format_message(text: str) -> str:
         text = str(text)
     return text.strip()
 
-async def handle_response(response: aiohttp.ClientResponse) -> dict:
-    """مدیریت پاسخ‌های API"""
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """هش SHA-256 محتوای فایل (برای اجرا در executor)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# داده‌های کوچک‌تر از این اندازه مستقیم روی event loop هش می‌شوند
+INLINE_HASH_LIMIT = 256 * 1024
+
+class ContentHasher:
+    """هش SHA-256 محتوای bytes یا فایل روی دیسک بدون معطل کردن event loop
+
+    هش مسیرها بر اساس (اندازه، زمان تغییر) به خاطر سپرده می‌شود تا فایل تکراری دوباره خوانده نشود.
+    """
+
+    def __init__(self, max_paths: int = 1024):
+        self.max_paths = max_paths
+        self._paths: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def digest(self, source: Union[bytes, bytearray, memoryview, str, "os.PathLike[str]"]) -> str:
+        loop = asyncio.get_running_loop()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            if len(source) <= INLINE_HASH_LIMIT:
+                return hashlib.sha256(source).hexdigest()
+            return await loop.run_in_executor(None, lambda: hashlib.sha256(source).hexdigest())
+        path = os.fspath(source)
+        st = await loop.run_in_executor(None, os.stat, path)
+        stamp = (st.st_size, st.st_mtime_ns)
+        memo = self._paths.get(path)
+        if memo and memo[0] == stamp:
+            self._paths.move_to_end(path)
+            return memo[1]
+        digest = await loop.run_in_executor(None, sha256_file, path)
+        self._paths[path] = (stamp, digest)
+        if len(self._paths) > self.max_paths:
+            self._paths.popitem(last=False)
+        return digest
+
+def shared_task(inflight: Dict[Hashable, asyncio.Future], key: Hashable, factory: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+    """اجرای factory() در task مستقل که تا پایانش در inflight[key] می‌ماند (single-flight)
+
+    منتظرها (از جمله سازنده task) باید با asyncio.shield منتظر بمانند تا لغو یکی از آن‌ها
+    نتیجه مشترک بقیه را خراب نکند.
+    """
+    task = asyncio.ensure_future(factory())
+    inflight[key] = task
+
+    def done(finished: asyncio.Future):
+        if inflight.get(key) is finished:
+            del inflight[key]
+        if not finished.cancelled():
+            finished.exception()  # جلوگیری از هشدار وقتی منتظری نمانده
+
+    task.add_done_callback(done)
+    return task
+
+async def handle_response(response: aiohttp.ClientResponse, loads: Optional[Callable[[bytes], Any]] = None) -> dict:
+    """مدیریت پاسخ‌های API؛ بدنه مستقیم از bytes با loads (مثلاً کدک کلاینت) خوانده می‌شود"""
     try:
-        result = await response.json()
+        body = await response.read()
+        try:
+            result = (loads or json.loads)(body)
+        except ValueError:
+            if response.status >= 500:
+                # صفحه HTML خطای پروکسی یا gateway؛ مثل هر 5xx دیگر موقتی حساب می‌شود
+                raise BaleAPIError(response.reason or "Server Error", error_code=response.status)
+            raise
         if result.get("ok"):
             return result
-        logger.error(f"خطای API بله: {result}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # خطا به صورت استثنا بالا می‌رود و همان‌جا لاگ می‌شود؛ این‌جا فقط جزئیات برای اشکال‌زدایی
+            endpoint = response.url.path.rsplit("/", 1)[-1]
+            logger.debug(
+                "خطای API بله در %s: [%s] %s", endpoint, result.get("error_code"), result.get("description"),
+                extra={"endpoint": endpoint, "error_code": result.get("error_code")},
+            )
         if result.get("error_code") == 403 and "Token not found" in result.get("description", ""):
             raise ValueError("توکن ربات نامعتبر است.")
-        return None
+        if result.get("error_code") == 429:
+            raise RetryAfter(result.get("description", "Too Many Requests"), parameters=result.get("parameters"))
+        raise BaleAPIError(
+            result.get("description", "Unknown error"),
+            error_code=result.get("error_code"),
+            parameters=result.get("parameters"),
+        )
+    except (BaleAPIError, ValueError):
+        raise
     except Exception as e:
-        logger.error(f"خطا در پردازش پاسخ: {str(e)}")
+        logger.error("خطا در پردازش پاسخ: %s", e)
         raise
+
+
+class RecentIds:
+    """پنجره محدود از شناسه‌های اخیر برای حذف آپدیت‌های تکراری"""
+
+    def __init__(self, maxlen: int = 10000):
+        self.maxlen = maxlen
+        self._order = deque()
+        self._seen = set()
+
+    def add(self, item) -> bool:
+        """اگر شناسه تازه باشد ثبت می‌کند و True برمی‌گرداند"""
+        if item in self._seen:
+            return False
+        self._seen.add(item)
+        self._order.append(item)
+        if len(self._order) > self.maxlen:
+            self._seen.discard(self._order.popleft())
+        return True
+
+    def discard(self, item):
+        """پس گرفتن شناسه‌ای که پردازشش شروع نشد تا تحویل دوباره آن پذیرفته شود (نادر و O(n))"""
+        if item in self._seen:
+            self._seen.discard(item)
+            self._order.remove(item)
+
+    def __contains__(self, item) -> bool:
+        return item in self._seen
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+class TTLCache:
+    """کش کوچک با انقضای زمانی و حذف LRU وقتی از maxsize بیشتر شود"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def keys(self) -> list:
+        return list(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_MISSING = object()
@@ -0,0 +1,73 @@
+import asyncio
+import hmac
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Bale-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """سرور وب‌هوک که آپدیت‌ها را به همان dispatcher کلاینت می‌سپارد"""
+
+    def __init__(self, client, path: str = "/webhook", secret: Optional[str] = None):
+        self.client = client
+        self.path = path if path.startswith("/") else "/" + path
+        self.secret = secret
+        self._runner: Optional[web.AppRunner] = None
+
+    def build_app(self) -> web.Application:
+        """ساخت aiohttp.web.Application (برای تست با aiohttp.test_utils هم قابل استفاده است)"""
+        app = web.Application()
+        app.router.add_post(self.path, self._handle)
+        # اگر کلاینت Metrics داشته باشد، /metrics روی همین سرور هم در دسترس است
+        if self.client.metrics is not None:
+            self.client.metrics.add_route(app)
+        return app
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        if self.secret is not None:
+            token = request.headers.get(SECRET_HEADER, "")
+            if not hmac.compare_digest(token, self.secret):
+                logger.warning("درخواست وب‌هوک با توکن نامعتبر از %s", request.remote)
+                return web.Response(status=403)
+        try:
+            update = self.client.codec.loads(await request.read())
+        except Exception:
+            return web.Response(status=400)
+        if not isinstance(update, dict) or "update_id" not in update:
+            return web.Response(status=400)
+        # پاسخ بلافاصله داده می‌شود؛ هندلرها در dispatcher اجرا می‌شوند
+        await self.client._feed_update(update)
+        return web.Response(status=200)
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8080):
+        """راه‌اندازی سرور روی host و port"""
+        if self._runner:
+            return
+        self.client.dispatcher.start()
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        logger.info("وب‌هوک روی %s:%s%s در حال اجراست", host, port, self.path)
+
+    async def stop(self):
+        """توقف سرور و خالی کردن صف آپدیت‌ها"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+            logger.info("وب‌هوک متوقف شد.")
+        await self.client.dispatcher.stop()
+
+    async def serve_forever(self, host: str = "0.0.0.0", port: int = 8080):
+        """اجرای سرور تا زمان فراخوانی stop_polling یا لغو task"""
+        await self.start(host, port)
+        try:
+            while self.client.is_running:
+                await asyncio.sleep(1)
+        finally:
+            await self.stop()
@@ -0,0 +1,79 @@
+"""مقایسه کدک‌های JSON روی دسته‌های واقعی getUpdates و بدنه sendMessage
+
+اجرا:  python benchmarks/bench_codec.py [تعداد تکرار]
+"""
+import sys
+import time
+
+sys.path.insert(0, __file__.rsplit("/benchmarks/", 1)[0])
+
+from baleh.codec import CODECS, JSONCodec  # noqa: E402
+
+
+def make_update(i: int) -> dict:
+    return {
+        "update_id": 1000 + i,
+        "message": {
+            "message_id": 5000 + i,
+            "date": 1700000000 + i,
+            "chat": {"id": 100000 + i % 50, "type": "private", "first_name": "کاربر", "username": f"user{i % 50}"},
+            "from": {"id": 100000 + i % 50, "is_bot": False, "first_name": "کاربر", "username": f"user{i % 50}"},
+            "text": "سلام، لطفاً سفارش شماره ۱۲۳۴ را پیگیری کنید" if i % 3 else "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}] if i % 3 == 0 else None,
+        },
+    }
+
+
+KEYBOARD = {
+    "inline_keyboard": [
+        [{"text": "محصولات", "callback_data": "products"}, {"text": "سبد خرید", "callback_data": "cart"}],
+        [{"text": "پیگیری سفارش", "callback_data": "track"}, {"text": "پشتیبانی", "callback_data": "support"}],
+        [{"text": "تنظیمات", "callback_data": "settings"}],
+    ]
+}
+
+
+def available_codecs():
+    codecs = []
+    for cls in CODECS.values():
+        try:
+            codecs.append(cls())
+        except ImportError:
+            continue
+    return codecs
+
+
+def timeit(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    batch = JSONCodec().dumps({"ok": True, "result": [make_update(i) for i in range(100)]})
+    print(f"getUpdates batch: 100 updates, {len(batch)} bytes, {rounds} rounds")
+    for codec in available_codecs():
+        decode = timeit(lambda: codec.loads(batch), rounds)
+        text = "لطفاً یکی از گزینه‌ها را انتخاب کنید"
+
+        def encode_each_time():
+            # کیبورد در هر ارسال دوباره سریال می‌شود
+            return codec.dumps({"chat_id": 123456, "text": text, "reply_markup": codec.prepare_markup(KEYBOARD)})
+
+        prepared = codec.prepare_markup(KEYBOARD)
+
+        def encode_prepared():
+            return codec.dumps({"chat_id": 123456, "text": text, "reply_markup": prepared})
+
+        encode = timeit(encode_each_time, rounds * 10)
+        encode_cached = timeit(encode_prepared, rounds * 10)
+        print(
+            f"{codec.name:<8} decode {decode * 1e6:8.1f} us/batch   "
+            f"sendMessage encode {encode * 1e6:6.2f} us, with prepared markup {encode_cached * 1e6:6.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""میکروبنچمارک ساخت اشیا از آپدیت‌ها: زمان و حافظه به ازای هر آپدیت
+
+اجرا:  python benchmarks/bench_objects.py [تعداد]
+"""
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+sys.path.insert(0, __file__.rsplit("/benchmarks/", 1)[0])
+
+from baleh.objects import Message, Update  # noqa: E402
+
+SAMPLE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 42,
+        "date": 1700000000,
+        "chat": {"id": 123456, "type": "private", "first_name": "Ali", "username": "ali"},
+        "from": {"id": 123456, "is_bot": False, "first_name": "Ali", "username": "ali"},
+        "text": "/start hello",
+        "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        "reply_to_message": {
+            "message_id": 41,
+            "date": 1699999990,
+            "chat": {"id": 123456, "type": "private"},
+            "photo": [
+                {"file_id": "a", "file_unique_id": "a1", "width": 90, "height": 90},
+                {"file_id": "b", "file_unique_id": "b1", "width": 320, "height": 320},
+            ],
+        },
+    },
+}
+
+
+@dataclass
+class EagerChat:
+    """مدل قبلی: dataclass با __dict__ و پر کردن همه فیلدها با setattr"""
+
+    id: int
+    type: str
+    title: Optional[str] = None
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+@dataclass
+class EagerMessage:
+    message_id: int
+    chat: EagerChat
+    date: int
+    text: Optional[str] = None
+    from_user: Optional[dict] = None
+    reply_to_message: Optional["EagerMessage"] = None
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+def eager(update: dict):
+    data = update["message"]
+
+    def build(m):
+        chat = m.get("chat", {})
+        reply = m.get("reply_to_message")
+        return EagerMessage(
+            message_id=m.get("message_id"),
+            chat=EagerChat(id=chat.get("id"), type=chat.get("type"), username=chat.get("username"), first_name=chat.get("first_name")),
+            date=m.get("date", 0),
+            text=m.get("text"),
+            from_user=m.get("from", {}),
+            reply_to_message=build(reply) if reply else None,
+        )
+
+    message = build(data)
+    return message, message.chat.id, message.text
+
+
+def lazy(update: dict):
+    message = Update.from_dict(update).message
+    return message, message.chat.id, message.text
+
+
+def lazy_chat_id(update: dict):
+    message = Message.from_dict(update["message"])
+    return message, message.chat_id, message.text
+
+
+def raw(update: dict):
+    data = update["message"]
+    return data, data["chat"]["id"], data.get("text")
+
+
+def measure(name, func, payloads):
+    start = time.perf_counter()
+    for update in payloads:
+        func(update)
+    elapsed = time.perf_counter() - start
+
+    # حافظه اشیای ساخته‌شده که تا پایان هندلر زنده می‌مانند (خود JSON حساب نمی‌شود)
+    tracemalloc.start()
+    kept = [func(update) for update in payloads[:1000]]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    print(f"{name:<14} {elapsed / len(payloads) * 1e6:8.2f} us/update  {peak / 1000:8.0f} B/update")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    encoded = json.dumps(SAMPLE)
+    # هر آپدیت دیکشنری مستقل خودش را دارد، مثل آپدیت‌های واقعی
+    payloads = [json.loads(encoded) for _ in range(count)]
+    print(f"{count} updates")
+    measure("eager", eager, payloads)
+    measure("lazy", lazy, payloads)
+    measure("lazy+chat_id", lazy_chat_id, payloads)
+    measure("raw", raw, payloads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""بنچمارک سرتاسری کلاینت روی MockBaleServer (بدون شبکه) با خروجی JSON
+
+می‌سنجد: آپدیت بر ثانیه از start_polling تا هندلر، پیام بر ثانیه با send_message،
+توان و حافظه آپلود با send_document و دانلود با download_many، اندازه و تأخیر send_photo
+با و بدون ImageProcessor، آلبوم با send_media_group، کش get_chat_member، خالی کردن صف انباشته
+با catch-up و offset_store، و دقت زمان‌بند.
+نتیجه را قبل و بعد از ارتقای baleh مقایسه کنید؛ مقادیر seed ثابت‌اند تا اجراها تکرارپذیر باشند.
+
+اجرا:  python benchmarks/bench_suite.py [--quick] [--only polling,send] [--output results.json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, __file__.rsplit("/benchmarks/", 1)[0])
+
+import baleh  # noqa: E402
+from baleh.testing import MockBaleServer  # noqa: E402
+
+SEED = 1234
+
+
+def percentiles(samples, scale=1000.0):
+    """p50/p90/p99/max بر حسب میلی‌ثانیه"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * scale, 3)
+
+    return {
+        "mean": round(statistics.fmean(ordered) * scale, 3),
+        "p50": at(0.50),
+        "p90": at(0.90),
+        "p99": at(0.99),
+        "max": round(ordered[-1] * scale, 3),
+    }
+
+
+def make_update(i: int) -> dict:
+    chat_id = 100000 + i % 500
+    return {
+        "message": {
+            "message_id": i + 1,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": "کاربر"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "کاربر"},
+            "text": "/start" if i % 10 == 0 else f"سلام، سفارش {i} را پیگیری کنید",
+        }
+    }
+
+
+async def bench_polling(count: int, reply: bool) -> dict:
+    """آپدیت‌های جریان سرور از getUpdates تا هندلر؛ با reply=True هر هندلر یک پاسخ هم می‌فرستد"""
+    async with MockBaleServer(seed=SEED) as server:
+        client = server.client(poll_timeout=1)
+        handled = 0
+        done = asyncio.Event()
+
+        @client.on_message()
+        async def handle(message):
+            nonlocal handled
+            if reply:
+                await message.reply_text("ok")
+            handled += 1
+            if handled >= count:
+                done.set()
+
+        server.stream(make_update, count)
+        started = time.perf_counter()
+        task = asyncio.ensure_future(client.start_polling())
+        await done.wait()
+        elapsed = time.perf_counter() - started
+        client.stop_polling()
+        await task
+        await client.disconnect()
+        return {
+            "updates": count,
+            "seconds": round(elapsed, 4),
+            "updates_per_sec": round(count / elapsed, 1),
+            "get_updates_calls": server.calls["getUpdates"],
+        }
+
+
+async def bench_send(count: int, concurrency: int, latency: float) -> dict:
+    """send_message با concurrency درخواست هم‌زمان و تأخیر ثابت سرور"""
+    async with MockBaleServer(latency=latency, seed=SEED) as server:
+        client = server.client()
+        await client.connect()
+        markup = client.prepare_markup({"inline_keyboard": [[{"text": "منو", "callback_data": "menu"}]]})
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def send(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                await client.send_message(100000 + i % 500, f"پیام شماره {i}", reply_markup=markup)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send(i) for i in range(count)))
+        elapsed = time.perf_counter() - started
+        await client.disconnect()
+        return {
+            "messages": count,
+            "concurrency": concurrency,
+            "server_latency_ms": latency * 1000,
+            "seconds": round(elapsed, 4),
+            "messages_per_sec": round(count / elapsed, 1),
+            "latency_ms": percentiles(latencies),
+        }
+
+
+async def _upload_round(server: MockBaleServer, path: str, count: int, concurrency: int) -> float:
+    client = server.client()
+    await client.connect()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(i: int):
+        async with semaphore:
+            await client.send_document(100000 + i, path, caption="گزارش")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(count)))
+    elapsed = time.perf_counter() - started
+    await client.disconnect()
+    return elapsed
+
+
+async def bench_upload(size_mb: int, count: int, concurrency: int) -> dict:
+    """send_document با فایل روی دیسک؛ حافظه اوج با tracemalloc در اجرای جدا اندازه گرفته می‌شود"""
+    fd, path = tempfile.mkstemp(suffix=".bin")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(size_mb):
+                f.write(block)
+        async with MockBaleServer(seed=SEED) as server:
+            elapsed = await _upload_round(server, path, count, concurrency)
+            received = sum(server.upload_bytes.values())
+            tracemalloc.start()
+            await _upload_round(server, path, count, concurrency)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return {
+            "file_mb": size_mb,
+            "uploads": count,
+            "concurrency": concurrency,
+            "seconds": round(elapsed, 4),
+            "mb_per_sec": round(received / 1024 / 1024 / elapsed, 1),
+            # حافظه هر دو طرف (کلاینت و سرور جعلی) در همین فرایند شمرده می‌شود
+            "peak_traced_mb": round(peak / 1024 / 1024, 2),
+        }
+    finally:
+        os.unlink(path)
+
+
+async def bench_download(size_mb: int, count: int, concurrency: int) -> dict:
+    """download_many از سرور جعلی به دیسک؛ حافظه اوج نباید با اندازه فایل رشد کند"""
+    directory = tempfile.mkdtemp()
+    try:
+        async with MockBaleServer(seed=SEED) as server:
+            file_ids = [server.add_file(size_mb * 1024 * 1024) for _ in range(count)]
+            client = server.client()
+            await client.connect()
+            started = time.perf_counter()
+            await client.download_many(file_ids, directory, concurrency=concurrency)
+            elapsed = time.perf_counter() - started
+            tracemalloc.start()
+            await client.download(file_ids[0], directory)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            await client.disconnect()
+        return {
+            "file_mb": size_mb,
+            "downloads": count,
+            "concurrency": concurrency,
+            "seconds": round(elapsed, 4),
+            "mb_per_sec": round(size_mb * count / elapsed, 1),
+            "peak_traced_mb_single": round(peak / 1024 / 1024, 2),
+        }
+    finally:
+        for name in os.listdir(directory):
+            os.unlink(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+def make_photo(width: int = 3000, height: int = 2000) -> bytes:
+    """PNG شبیه عکس کاربر: گرادیان با نویز، همراه با EXIF"""
+    from PIL import Image
+
+    noise = Image.effect_noise((width, height), 40).convert("L")
+    gradient = Image.linear_gradient("L").resize((width, height))
+    image = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+    exif = Image.Exif()
+    exif[0x010F] = "Camera"
+    output = io.BytesIO()
+    image.save(output, "PNG", exif=exif)
+    return output.getvalue()
+
+
+async def bench_photo(count: int, concurrency: int, bandwidth: float) -> dict:
+    """send_photo با عکس بزرگ، بدون و با ImageProcessor (تصاویر متفاوت تا کش پردازش اثری نداشته باشد)
+
+    سرور با پهنای باند bandwidth (بایت بر ثانیه) فایل را می‌خواند تا اثر حجم آپلود دیده شود.
+    """
+    base = make_photo()
+    photos = [base + i.to_bytes(4, "big") for i in range(count)]
+    results = {"photo_bytes": len(base), "photos": count, "concurrency": concurrency, "bandwidth_mb_per_sec": bandwidth / 1024 / 1024}
+    for name, processor in (("raw", None), ("processed", baleh.ImageProcessor())):
+        async with MockBaleServer(seed=SEED, upload_bandwidth=bandwidth) as server:
+            client = server.client(image_processor=processor)
+            await client.connect()
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies = []
+
+            async def send(i: int):
+                async with semaphore:
+                    started = time.perf_counter()
+                    await client.send_photo(100000 + i, photos[i])
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(send(i) for i in range(count)))
+            elapsed = time.perf_counter() - started
+            await client.disconnect()
+            if processor is not None:
+                processor.close()
+            results[name] = {
+                "seconds": round(elapsed, 4),
+                "uploaded_bytes_per_photo": sum(server.upload_bytes.values()) // count,
+                "latency_ms": percentiles(latencies),
+            }
+    return results
+
+
+async def bench_album(albums: int, latency: float) -> dict:
+    """ده عکس با ده send_photo پشت سر هم در برابر یک send_media_group"""
+    photos = [os.urandom(64 * 1024) for _ in range(10)]
+    results = {"albums": albums, "photos_per_album": len(photos), "server_latency_ms": latency * 1000}
+    async with MockBaleServer(latency=latency, seed=SEED) as server:
+        client = server.client()
+        await client.connect()
+        started = time.perf_counter()
+        for i in range(albums):
+            for photo in photos:
+                await client.send_photo(100000 + i, photo)
+        results["send_photo_seconds_per_album"] = round((time.perf_counter() - started) / albums, 4)
+        started = time.perf_counter()
+        for i in range(albums):
+            await client.send_media_group(100000 + i, photos)
+        results["media_group_seconds_per_album"] = round((time.perf_counter() - started) / albums, 4)
+        await client.disconnect()
+    return results
+
+
+async def bench_member_lookup(lookups: int, users: int, latency: float) -> dict:
+    """get_chat_member هم‌زمان برای چند کاربر تکراری، با و بدون chat_cache"""
+    results = {"lookups": lookups, "distinct_users": users, "server_latency_ms": latency * 1000}
+    for name, cached in (("uncached", False), ("cached", True)):
+        async with MockBaleServer(latency=latency, seed=SEED) as server:
+            client = server.client()
+            if not cached:
+                client.chat_cache = None
+            await client.connect()
+            started = time.perf_counter()
+            await asyncio.gather(*(client.get_chat_member(-100, i % users) for i in range(lookups)))
+            elapsed = time.perf_counter() - started
+            await client.disconnect()
+            results[name] = {"seconds": round(elapsed, 4), "api_calls": server.calls["getChatMember"]}
+    return results
+
+
+async def bench_backlog(count: int, chats: int, handler_delay: float) -> dict:
+    """خالی کردن count آپدیت انباشته (مثل بعد از ری‌استارت) با پولینگ عادی، catch-up و catch-up با SQLiteOffsetStore"""
+    results = {"updates": count, "chats": chats, "handler_delay_ms": handler_delay * 1000}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, catch_up, durable in (("normal", False, False), ("catch_up", True, False), ("catch_up_sqlite", True, True)):
+            async with MockBaleServer(seed=SEED) as server:
+                for i in range(count):
+                    server.push_message(200000 + i % chats, "backlog")
+                store = baleh.SQLiteOffsetStore(os.path.join(tmp, f"{name}.sqlite3")) if durable else None
+                client = server.client(poll_timeout=1, offset_store=store)
+                handled = 0
+                done = asyncio.Event()
+
+                @client.on_message()
+                async def handle(message):
+                    nonlocal handled
+                    await asyncio.sleep(handler_delay)
+                    handled += 1
+                    if handled >= count:
+                        done.set()
+
+                started = time.perf_counter()
+                task = asyncio.ensure_future(client.start_polling(catch_up=catch_up))
+                await done.wait()
+                elapsed = time.perf_counter() - started
+                client.stop_polling()
+                await task
+                await client.disconnect()
+                if store is not None:
+                    store.close()
+                results[name] = {"seconds": round(elapsed, 4), "get_updates_calls": server.calls["getUpdates"]}
+    return results
+
+
+async def bench_scheduler(jobs: int, horizon: float) -> dict:
+    """کارهای یک‌باره پخش‌شده در horizon ثانیه؛ lateness فاصله اجرای واقعی تا زمان تعیین‌شده است"""
+    async with MockBaleServer(seed=SEED) as server:
+        client = server.client()
+        await client.connect()
+        lateness = []
+        done = asyncio.Event()
+
+        async def job(run_at: float):
+            lateness.append(time.time() - run_at)
+            if len(lateness) >= jobs:
+                done.set()
+
+        step = horizon / jobs
+        now = time.time()
+        for i in range(jobs):
+            run_at = now + 0.05 + i * step
+            client.schedule(job, at=run_at, run_at=run_at)
+        await asyncio.wait_for(done.wait(), horizon + 30)
+        await client.disconnect()
+        return {"jobs": jobs, "horizon_seconds": horizon, "lateness_ms": percentiles(lateness)}
+
+
+async def run(quick: bool, only) -> dict:
+    scale = 0.1 if quick else 1.0
+    suite = {
+        "polling": lambda: bench_polling(int(20000 * scale), reply=False),
+        "polling_reply": lambda: bench_polling(int(5000 * scale), reply=True),
+        "send": lambda: bench_send(int(10000 * scale), concurrency=50, latency=0.0),
+        "send_latency": lambda: bench_send(int(5000 * scale), concurrency=100, latency=0.02),
+        "upload": lambda: bench_upload(4 if quick else 16, count=max(4, int(40 * scale)), concurrency=8),
+        "download": lambda: bench_download(8 if quick else 64, count=8, concurrency=4),
+        "photo": lambda: bench_photo(max(4, int(40 * scale)), concurrency=4, bandwidth=2 * 1024 * 1024),
+        "album": lambda: bench_album(max(2, int(20 * scale)), latency=0.05),
+        "member_lookup": lambda: bench_member_lookup(int(5000 * scale), users=50, latency=0.02),
+        "backlog": lambda: bench_backlog(int(5000 * scale), chats=200, handler_delay=0.01),
+        "scheduler": lambda: bench_scheduler(int(5000 * scale), horizon=2.0 if quick else 5.0),
+    }
+    results = {}
+    for name, bench in suite.items():
+        if only and name not in only:
+            continue
+        results[name] = await bench()
+        print(f"{name}: {json.dumps(results[name], ensure_ascii=False)}", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="baleh benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="اجرای کوتاه (یک دهم حجم)")
+    parser.add_argument("--only", default="", help="فهرست بنچمارک‌ها با کاما")
+    parser.add_argument("--output", help="مسیر فایل JSON خروجی (پیش‌فرض stdout)")
+    args = parser.parse_args()
+    # لاگ هر پیام INFO خودش هزینه‌ای است که نباید در نتیجه‌ها بیاید
+    logging.getLogger("baleh").setLevel(logging.WARNING)
+    only = {name for name in args.only.split(",") if name}
+    report = {
+        "baleh_version": baleh.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "codec": type(baleh.get_codec()).__name__,
+        "quick": args.quick,
+        "timestamp": int(time.time()),
+        "results": asyncio.run(run(args.quick, only)),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,16 @@ setup(
         "baleh": ["*.py"],
         "baleh.objects": ["*.py"],
         "baleh.utils": ["*.py"],
+        "baleh.testing": ["*.py"],
     },
     install_requires=[
         "aiohttp>=3.8.0",
         "Pillow>=9.0.0",
     ],
+    extras_require={
+        "speed": ["orjson>=3.6"],
+        "test": ["pytest"],
+    },
     author="Hamid Rashidi",
     author_email="spiderhamidman@gmail.com",
     description="A powerful Python library for developing Bale messenger bots",
@@ -0,0 +1,48 @@
+import os
+import stat
+import sys
+
+from baleh import MediaConverter, MemoryFileIdCache
+from baleh.testing import MockBaleServer
+
+
+def fake_ffmpeg(tmp_path):
+    """اسکریپتی با رابط ffmpeg که ورودی را در خروجی کپی می‌کند و اجراها را می‌شمارد"""
+    script = tmp_path / "ffmpeg"
+    runs = tmp_path / "runs"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import shutil, sys\n"
+        f"open({str(runs)!r}, 'a').write('x')\n"
+        "shutil.copyfile(sys.argv[sys.argv.index('-i') + 1], sys.argv[-1])\n"
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script), runs
+
+
+async def test_converter_caches_output_by_content(tmp_path):
+    ffmpeg, runs = fake_ffmpeg(tmp_path)
+    source = tmp_path / "a.tgs"
+    source.write_bytes(b"lottie")
+    converter = MediaConverter(cache_dir=str(tmp_path / "cache"), ffmpeg=ffmpeg)
+    first = await converter.tgs_to_webm(str(source))
+    second = await converter.tgs_to_webm(str(source))
+    assert first == second and os.path.exists(first)
+    assert runs.read_text() == "x"
+    assert converter.stats()["conversions"] == 1
+
+
+async def test_cached_animation_skips_conversion(tmp_path):
+    ffmpeg, runs = fake_ffmpeg(tmp_path)
+    source = tmp_path / "a.tgs"
+    source.write_bytes(b"lottie")
+    converter = MediaConverter(cache_dir=str(tmp_path / "cache"), ffmpeg=ffmpeg)
+    async with MockBaleServer() as server:
+        client = server.client(file_cache=MemoryFileIdCache(), converter=converter)
+        assert client.file_cache.hasher is converter.hasher
+        await client.send_animation(1, str(source))
+        await client.send_animation(2, str(source))
+        await client.disconnect()
+    assert server.uploads == 1
+    assert converter.stats() == {"hits": 0, "conversions": 1, "inflight": 0}
+    assert runs.read_text() == "x"
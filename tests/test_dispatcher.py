@@ -0,0 +1,99 @@
+import asyncio
+import random
+
+from baleh import Dispatcher
+
+
+async def test_per_chat_order_is_kept_while_chats_run_concurrently():
+    seen = {}
+    running = 0
+    peak = 0
+
+    async def process(item):
+        nonlocal running, peak
+        chat, seq = item
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(random.uniform(0, 0.005))
+        running -= 1
+        seen.setdefault(chat, []).append(seq)
+
+    dispatcher = Dispatcher(process, workers=4)
+    dispatcher.start()
+    for seq in range(20):
+        for chat in range(5):
+            await dispatcher.put(chat, (chat, seq))
+    assert await dispatcher.join(5)
+    await dispatcher.stop()
+    assert all(order == list(range(20)) for order in seen.values())
+    assert len(seen) == 5
+    assert peak > 1
+
+
+async def test_handler_cancelled_error_does_not_kill_worker():
+    handled = []
+
+    async def process(item):
+        if item == 1:
+            raise asyncio.CancelledError()
+        handled.append(item)
+
+    dispatcher = Dispatcher(process, workers=2)
+    dispatcher.start()
+    for item in range(5):
+        await dispatcher.put("chat", item)
+    assert await dispatcher.join(1)
+    assert handled == [0, 2, 3, 4]
+    assert not any(task.done() for task in dispatcher._tasks)
+    assert dispatcher.stats()["workers"] == 2
+    await dispatcher.stop()
+
+
+async def test_stop_cancels_unfinished_work():
+    started = asyncio.Event()
+
+    async def process(item):
+        started.set()
+        await asyncio.sleep(10)
+
+    dispatcher = Dispatcher(process, workers=1)
+    dispatcher.start()
+    await dispatcher.put("chat", 1)
+    await started.wait()
+    await dispatcher.stop(drain=True, timeout=0.05)
+    assert not dispatcher.running
+    assert dispatcher.pending == 0
+
+
+async def test_resize_adds_and_retires_workers():
+    async def process(item):
+        await asyncio.sleep(0.001)
+
+    dispatcher = Dispatcher(process, workers=2)
+    dispatcher.start()
+    dispatcher.resize(6)
+    for item in range(30):
+        await dispatcher.put(item, item)
+    dispatcher.resize(3)
+    assert await dispatcher.join(1)
+    await asyncio.sleep(0)
+    assert sum(not task.done() for task in dispatcher._tasks) == 3
+    await dispatcher.stop()
+
+
+async def test_external_cancel_stops_worker():
+    started = asyncio.Event()
+
+    async def process(item):
+        started.set()
+        await asyncio.sleep(10)
+
+    dispatcher = Dispatcher(process, workers=1)
+    dispatcher.start()
+    await dispatcher.put("chat", 1)
+    await started.wait()
+    worker = dispatcher._tasks[0]
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
+    assert worker.cancelled()
+    await dispatcher.stop(drain=False)
@@ -0,0 +1,51 @@
+import asyncio
+
+from baleh import MemoryFileIdCache, SQLiteFileIdCache
+from baleh.testing import MockBaleServer
+
+
+async def test_file_id_cache_skips_reupload_and_tracks_content(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"v1" * 1000)
+    async with MockBaleServer() as server:
+        client = server.client(file_cache=MemoryFileIdCache())
+        await client.send_document(1, str(path))
+        await client.send_document(2, str(path))
+        assert server.uploads == 1
+        await asyncio.sleep(0.01)
+        path.write_bytes(b"v2" * 1000)
+        await client.send_document(3, str(path))
+        await client.disconnect()
+    assert server.uploads == 2
+
+
+async def test_stale_file_id_is_invalidated_and_reuploaded(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"content")
+    async with MockBaleServer() as server:
+        cache = MemoryFileIdCache()
+        client = server.client(file_cache=cache)
+        await client.send_document(1, str(path))
+        server.fail("sendDocument", 400, "Bad Request: wrong file identifier")
+        await client.send_document(1, str(path))
+        await client.disconnect()
+    assert server.uploads == 2
+    assert cache.invalidations == 1
+
+
+async def test_sqlite_file_id_cache_persists_batched_writes(tmp_path):
+    db = str(tmp_path / "ids.sqlite3")
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"content")
+    async with MockBaleServer() as server:
+        client = server.client(file_cache=SQLiteFileIdCache(db, flush_interval=60))
+        await client.send_document(1, str(path))
+        assert client.file_cache.dirty
+        await client.disconnect()
+        assert not client.file_cache.dirty
+
+        client = server.client(file_cache=SQLiteFileIdCache(db))
+        await client.send_document(2, str(path))
+        await client.disconnect()
+        client.file_cache.close()
+    assert server.uploads == 1
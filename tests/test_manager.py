@@ -0,0 +1,41 @@
+import asyncio
+
+from baleh import BotManager
+from baleh.testing import MockBaleServer
+
+
+async def test_stop_keeps_bots_registered_and_manager_restarts():
+    async with MockBaleServer(max_poll_wait=0.05) as server:
+        manager = BotManager(api_url=server.url, rate_limiter=None)
+        handled = []
+        for name in ("a", "b"):
+            bot = manager.add_bot(server.token, name=name)
+            bot.on_message()(lambda message, name=name: handled.append(name))
+
+        await manager.start()
+        await asyncio.sleep(0.05)
+        assert all(stats["polling"] for stats in manager.stats().values())
+        await manager.stop()
+        assert manager.names == ["a", "b"]
+        assert not any(stats["polling"] for stats in manager.stats().values())
+
+        running = asyncio.ensure_future(manager.run())
+        server.push_message(chat_id=1, text="hi")
+        for _ in range(100):
+            if handled:
+                break
+            await asyncio.sleep(0.01)
+        await manager.stop()
+        await running
+    assert handled
+    assert len(manager) == 2
+
+
+async def test_remove_bot_unregisters_it():
+    async with MockBaleServer(max_poll_wait=0.05) as server:
+        async with BotManager(api_url=server.url, rate_limiter=None) as manager:
+            manager.add_bot(server.token, name="a")
+            manager.add_bot(server.token, name="b")
+            await manager.remove_bot("a")
+            assert manager.names == ["b"]
+            assert "a" not in manager
@@ -0,0 +1,21 @@
+from baleh import Update
+
+
+def test_nested_fields_decode_lazily():
+    update = Update.from_dict({
+        "update_id": 1,
+        "message": {
+            "message_id": 5,
+            "date": 0,
+            "chat": {"id": -10, "type": "group"},
+            "from": {"id": 7, "is_bot": False, "first_name": "A"},
+            "photo": [{"file_id": "p1", "file_unique_id": "u1", "width": 1, "height": 1}],
+            "new_chat_members": [{"id": 8, "is_bot": False, "first_name": "B"}],
+        },
+    })
+    message = update.message
+    assert message.chat.id == -10
+    assert message.from_user.id == 7
+    assert message.photo[0].file_id == "p1"
+    assert message.new_chat_members[0].id == 8
+    assert message.chat is message.chat
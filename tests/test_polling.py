@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+from baleh import FileOffsetStore, SQLiteOffsetStore
+from baleh.testing import MockBaleServer
+
+
+async def wait_until(predicate, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+async def stop(client, polling):
+    client.stop_polling()
+    await polling
+    await client.disconnect()
+
+
+async def test_catch_up_reads_full_batches_then_long_polls():
+    async with MockBaleServer(record=True, max_poll_wait=0.05) as server:
+        for index in range(250):
+            server.push_message(chat_id=index % 10, text=str(index))
+        client = server.client(workers=2)
+        handled = []
+        client.on_message()(lambda message: handled.append(message.text))
+        polling = asyncio.ensure_future(client.start_polling(catch_up=True))
+        await wait_until(lambda: len(handled) == 250)
+        await wait_until(lambda: client.dispatcher.stats()["workers"] == 2)
+        await stop(client, polling)
+    polls = [params for method, params in server.requests if method == "getUpdates"]
+    assert [params["timeout"] for params in polls[:3]] == ["0", "0", "0"]
+    assert polls[0]["limit"] == "100"
+    assert any(params["timeout"] != "0" for params in polls[3:])
+
+
+async def test_unfinished_updates_are_replayed_after_restart(tmp_path):
+    path = str(tmp_path / "offsets.sqlite3")
+    release = asyncio.Event()
+    async with MockBaleServer(max_poll_wait=0.05) as server:
+        for index in range(1, 6):
+            server.push_message(chat_id=1, text=str(index))
+
+        first = server.client(offset_store=SQLiteOffsetStore(path, commit_interval=0.01))
+        seen = []
+
+        async def slow(message):
+            seen.append(message.text)
+            if message.text == "3":
+                await release.wait()
+
+        first.on_message()(slow)
+        polling = asyncio.ensure_future(first.start_polling())
+        await wait_until(lambda: "3" in seen)
+        await asyncio.sleep(0.05)
+        first.stop_polling()
+        await first.dispatcher.stop(drain=False)
+        await polling
+        await first.disconnect()
+        first.offset_store.close()
+
+        second = server.client(offset_store=SQLiteOffsetStore(path, commit_interval=0.01))
+        replayed = []
+        second.on_message()(lambda message: replayed.append(message.text))
+        polling = asyncio.ensure_future(second.start_polling())
+        await wait_until(lambda: len(replayed) >= 3)
+        await asyncio.sleep(0.05)
+        await stop(second, polling)
+        second.offset_store.close()
+    assert seen == ["1", "2", "3"]
+    assert replayed == ["3", "4", "5"]
+
+
+class SlowFlushStore(FileOffsetStore):
+    """offset_store که flush آن تا آزاد شدن gate صبر می‌کند"""
+
+    def __init__(self, path):
+        super().__init__(path, commit_interval=60)
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+
+    def flush(self):
+        self.entered.set()
+        self.gate.wait(2)
+        super().flush()
+
+
+async def test_stop_during_journal_does_not_skip_batch(tmp_path):
+    store = SlowFlushStore(str(tmp_path / "offset.json"))
+    async with MockBaleServer(max_poll_wait=0.05) as server:
+        server.push_message(chat_id=1, text="kept")
+        client = server.client(offset_store=store)
+        handled = []
+        client.on_message()(lambda message: handled.append(message.text))
+        polling = asyncio.ensure_future(client.start_polling())
+        await asyncio.get_running_loop().run_in_executor(None, store.entered.wait, 2)
+        client.stop_polling()
+        store.gate.set()
+        await polling
+        assert handled == []
+        assert client.last_update_id == 0
+
+        polling = asyncio.ensure_future(client.start_polling())
+        await wait_until(lambda: handled == ["kept"])
+        await stop(client, polling)
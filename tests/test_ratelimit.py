@@ -0,0 +1,21 @@
+import asyncio
+
+from baleh import BaleClient, RateLimiter
+from baleh.testing import MockBaleServer
+
+
+async def test_reads_do_not_spend_group_flood_bucket():
+    async with MockBaleServer() as server:
+        client = server.client(rate_limiter=RateLimiter())
+        started = asyncio.get_running_loop().time()
+        await asyncio.gather(*(client.get_chat_member(-100, user_id) for user_id in range(8)))
+        elapsed = asyncio.get_running_loop().time() - started
+        await client.disconnect()
+    assert elapsed < 1
+
+
+async def test_rate_limiter_defaults_and_can_be_disabled():
+    limiter = RateLimiter()
+    assert BaleClient("TEST:TOKEN", rate_limiter=limiter).rate_limiter is limiter
+    assert BaleClient("TEST:TOKEN", rate_limiter=None).rate_limiter is None
+    assert isinstance(BaleClient("TEST:TOKEN").rate_limiter, RateLimiter)
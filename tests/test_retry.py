@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from baleh import BaleAPIError, CircuitBreakers, CircuitOpenError, RetryPolicy
+from baleh.retry import CircuitBreaker
+from baleh.testing import MockBaleServer
+
+
+def fast_policy():
+    return RetryPolicy(max_attempts=3, base_delay=0.001, jitter=False)
+
+
+async def test_idempotent_call_is_retried_after_5xx():
+    async with MockBaleServer() as server:
+        client = server.client(retry_policy=fast_policy())
+        server.fail("getChat", 500, times=2)
+        chat = await client.get_chat(-1, fresh=True)
+        await client.disconnect()
+    assert chat.id == -1
+    assert server.calls["getChat"] == 3
+
+
+async def test_html_gateway_error_is_transient():
+    async with MockBaleServer() as server:
+        client = server.client(retry_policy=fast_policy())
+        server.fail("getChat", 502, html=True)
+        await client.get_chat(-1, fresh=True)
+        await client.disconnect()
+    assert server.calls["getChat"] == 2
+
+
+async def test_client_error_is_not_retried():
+    async with MockBaleServer() as server:
+        client = server.client(retry_policy=fast_policy())
+        server.fail("getChat", 400, "Bad Request: chat not found")
+        with pytest.raises(BaleAPIError):
+            await client.get_chat(-1, fresh=True)
+        await client.disconnect()
+    assert server.calls["getChat"] == 1
+
+
+async def test_breaker_opens_then_half_open_probe_closes_it():
+    async with MockBaleServer() as server:
+        breakers = CircuitBreakers(failure_threshold=2, reset_timeout=0.05)
+        client = server.client(retry_policy=RetryPolicy(max_attempts=1), circuit_breakers=breakers)
+        server.fail("sendMessage", 500, times=2)
+        for _ in range(2):
+            with pytest.raises(BaleAPIError):
+                await client.send_message(1, "x")
+        breaker = breakers.get("sendMessage")
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            await client.send_message(1, "x")
+        await asyncio.sleep(0.06)
+        await client.send_message(1, "x")
+        assert breaker.state == CircuitBreaker.CLOSED
+        await client.disconnect()
+
+
+async def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker("m", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    await asyncio.sleep(0.02)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # فقط یک درخواست آزمایشی
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+async def test_cancelled_probe_does_not_wedge_breaker():
+    async with MockBaleServer(latency=0.2) as server:
+        breakers = CircuitBreakers(failure_threshold=1, reset_timeout=0.01)
+        client = server.client(circuit_breakers=breakers)
+        breaker = breakers.get("sendMessage")
+        breaker.record_failure()
+        await asyncio.sleep(0.02)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.send_message(1, "probe"), 0.05)
+        message = await client.send_message(1, "after")
+        await client.disconnect()
+    assert message.text == "after"
+    assert breaker.state == CircuitBreaker.CLOSED
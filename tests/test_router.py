@@ -0,0 +1,106 @@
+from baleh import Update
+from baleh.router import Router, parse_command
+
+
+def message(text=None, update_id=1, chat_type="private", **fields):
+    raw = {"message_id": update_id, "date": 0, "chat": {"id": 1, "type": chat_type}, "from": {"id": 7, "is_bot": False, "first_name": "A"}}
+    if text is not None:
+        raw["text"] = text
+    raw.update(fields)
+    return Update.from_dict({"update_id": update_id, "message": raw})
+
+
+def recording_router():
+    router = Router()
+    calls = []
+
+    def record(name, **filters):
+        router.add(lambda event, name=name: calls.append(name), **filters)
+
+    return router, calls, record
+
+
+def test_parse_command():
+    assert parse_command("/Start@MyBot arg") == "start"
+    assert parse_command("/") is None
+    assert parse_command("hello") is None
+
+
+async def test_command_index_matches_only_its_command():
+    router, calls, record = recording_router()
+    record("start", commands=["start"])
+    record("help", commands="/help")
+    assert await router.dispatch(message("/start@bot now")) == 1
+    assert await router.dispatch(message("/unknown")) == 0
+    assert await router.dispatch(message("start")) == 0
+    assert calls == ["start"]
+
+
+async def test_indexed_and_fallback_handlers_run_in_priority_then_registration_order():
+    router, calls, record = recording_router()
+    record("generic")
+    record("command", commands=["go"])
+    record("regex", regex=r"^/go \d+$")
+    record("urgent", commands=["go"], priority=10)
+    record("func", func=lambda event: event.text.endswith("1"))
+    await router.dispatch(message("/go 1"))
+    assert calls == ["urgent", "generic", "command", "regex", "func"]
+
+
+async def test_stop_halts_later_handlers():
+    router, calls, record = recording_router()
+    record("first", commands=["go"], stop=True)
+    record("second")
+    assert await router.dispatch(message("/go")) == 1
+    assert calls == ["first"]
+
+
+async def test_regex_is_applied_to_command_handlers():
+    router, calls, record = recording_router()
+    record("buy", commands=["buy"], regex=r"^/buy \d+$")
+    await router.dispatch(message("/buy now"))
+    await router.dispatch(message("/buy 12"))
+    assert calls == ["buy"]
+
+
+async def test_regex_index_handles_prefix_literal_and_scan_patterns():
+    router, calls, record = recording_router()
+    record("prefix", regex=r"^hello\b")
+    record("literal", regex="world")
+    record("scan", regex=r"\d{3}")
+    await router.dispatch(message("hello there"))
+    await router.dispatch(message("big world"))
+    await router.dispatch(message("code 123"))
+    await router.dispatch(message("nothing"))
+    assert calls == ["prefix", "literal", "scan"]
+
+
+async def test_content_and_chat_type_filters():
+    router, calls, record = recording_router()
+    record("photo", content_types=["photo"])
+    record("text_in_groups", chat_types=["group"])
+    photo = [{"file_id": "p", "file_unique_id": "p", "width": 1, "height": 1}]
+    await router.dispatch(message(photo=photo, caption="pic"))
+    await router.dispatch(message("hi", chat_type="group"))
+    await router.dispatch(message("hi", chat_type="private"))
+    assert calls == ["photo", "text_in_groups"]
+
+
+async def test_remove_rebuilds_index():
+    router, calls, record = recording_router()
+    record("start", commands=["start"])
+    router.remove(router._handlers["message"][0])
+    assert await router.dispatch(message("/start")) == 0
+    assert not router.handles("message")
+
+
+async def test_callback_query_data_filter():
+    router = Router()
+    seen = []
+    router.callback_query(data=["yes"])(lambda query: seen.append(query.data))
+    for update_id, data in enumerate(["no", "yes"], 1):
+        await router.dispatch(Update.from_dict({
+            "update_id": update_id,
+            "callback_query": {"id": str(update_id), "from": {"id": 7, "is_bot": False, "first_name": "A"}, "data": data},
+        }))
+    assert seen == ["yes"]
@@ -0,0 +1,127 @@
+import asyncio
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+from baleh.scheduler import CronSpec, Scheduler, SQLiteJobStore
+
+
+class Recorder:
+    """کلاینت حداقلی که فراخوانی متدهای زمان‌بندی‌شده را ثبت می‌کند"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def send_message(self, chat_id, text):
+        self.calls.append((chat_id, text))
+
+
+async def test_jobs_fire_in_time_order_and_cancel_skips():
+    client = Recorder()
+    scheduler = Scheduler(client)
+    for index, delay in enumerate([0.04, 0.01, 0.03, 0.02]):
+        scheduler.add("send_message", {"chat_id": index, "text": str(delay)}, delay=delay)
+    cancelled = scheduler.add("send_message", {"chat_id": 99, "text": "no"}, delay=0.015)
+    assert scheduler.cancel(cancelled)
+    assert not scheduler.cancel(cancelled)
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+    assert [chat_id for chat_id, _ in client.calls] == [1, 3, 2, 0]
+    assert scheduler.stats()["fired"] == 4
+
+
+async def test_interval_job_repeats_until_cancelled():
+    fired = []
+
+    async def tick():
+        fired.append(time.monotonic())
+
+    scheduler = Scheduler(Recorder())
+    job_id = scheduler.add(tick, interval=0.02)
+    await asyncio.sleep(0.09)
+    scheduler.cancel(job_id)
+    count = len(fired)
+    await asyncio.sleep(0.05)
+    await scheduler.stop()
+    assert 3 <= count <= 5
+    assert len(fired) == count
+
+
+def test_cron_next_after():
+    start = datetime(2024, 1, 1, 10, 7, 30).timestamp()  # دوشنبه
+    assert datetime.fromtimestamp(CronSpec("*/15 * * * *").next_after(start)) == datetime(2024, 1, 1, 10, 15)
+    assert datetime.fromtimestamp(CronSpec("0 9 * * 0").next_after(start)) == datetime(2024, 1, 7, 9, 0)
+    assert datetime.fromtimestamp(CronSpec("30 8 1 * *").next_after(start)) == datetime(2024, 2, 1, 8, 30)
+    with pytest.raises(ValueError):
+        CronSpec("61 * * * *")
+
+
+async def test_sqlite_store_restores_jobs_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    scheduler = Scheduler(Recorder(), store=SQLiteJobStore(path))
+    scheduler.add("send_message", {"chat_id": 1, "text": "later"}, delay=0.05, job_id="later")
+    scheduler.add("send_message", {"chat_id": 2, "text": "gone"}, delay=0.05, job_id="gone")
+    scheduler.cancel("gone")
+    await scheduler.stop()
+    scheduler.store.close()
+
+    client = Recorder()
+    restored = Scheduler(client, store=SQLiteJobStore(path))
+    restored.start()
+    await asyncio.sleep(0.1)
+    await restored.stop()
+    restored.store.close()
+    assert client.calls == [(1, "later")]
+
+
+async def test_callable_jobs_run_with_sqlite_store(tmp_path):
+    fired = asyncio.Event()
+
+    async def job():
+        fired.set()
+
+    scheduler = Scheduler(Recorder(), store=SQLiteJobStore(str(tmp_path / "jobs.sqlite3")))
+    scheduler.add(job, delay=0.01)
+    await asyncio.wait_for(fired.wait(), 1)
+    await scheduler.stop()
+    scheduler.store.close()
+
+
+def test_failed_flush_keeps_pending_rows(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = SQLiteJobStore(path)
+    scheduler = Scheduler(Recorder(), store=store)
+    scheduler.add("send_message", {"chat_id": 1, "text": "x"}, delay=60, job_id="a")
+    other = sqlite3.connect(path)
+    other.execute("DROP TABLE jobs")
+    other.commit()
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    assert store.dirty
+    other.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, run_at REAL NOT NULL, method TEXT NOT NULL, kwargs TEXT NOT NULL, interval REAL, cron TEXT)")
+    other.commit()
+    other.close()
+    store.flush()
+    assert [job.id for job in store.load()] == ["a"]
+    store.close()
+
+
+async def test_flush_error_does_not_stop_scheduler(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = SQLiteJobStore(path)
+    client = Recorder()
+    scheduler = Scheduler(client, store=store, flush_interval=0.01)
+    scheduler.start()
+    other = sqlite3.connect(path)
+    other.execute("DROP TABLE jobs")
+    other.commit()
+    other.close()
+    for index in range(3):
+        scheduler.add("send_message", {"chat_id": index, "text": "x"}, delay=0.02 * (index + 1))
+    await asyncio.sleep(0.15)
+    assert not scheduler._task.done()
+    with pytest.raises(sqlite3.OperationalError):
+        await scheduler.stop()
+    assert [chat_id for chat_id, _ in client.calls] == [0, 1, 2]
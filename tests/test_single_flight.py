@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from baleh import BaleAPIError, BaleClient, ChatCache
+from baleh.testing import MockBaleServer
+
+
+async def test_concurrent_lookups_share_one_request():
+    async with MockBaleServer(latency=0.02) as server:
+        client = server.client()
+        results = await asyncio.gather(*(client.get_chat_member(-100, 7) for _ in range(20)))
+        await client.disconnect()
+    assert server.calls["getChatMember"] == 1
+    assert all(result == results[0] for result in results)
+    assert client.chat_cache.coalesced == 19
+
+
+async def test_cancelled_leader_does_not_fail_waiters():
+    cache = ChatCache()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"status": "member"}
+
+    leader = asyncio.ensure_future(asyncio.wait_for(cache.member(-5, 7, loader), 0.01))
+    waiter = asyncio.ensure_future(cache.member(-5, 7, loader))
+    with pytest.raises(asyncio.TimeoutError):
+        await leader
+    assert await waiter == {"status": "member"}
+    assert calls == 1
+    # نتیجه با وجود لغو شروع‌کننده کش شده است
+    assert await cache.member(-5, 7, loader) == {"status": "member"}
+    assert calls == 1
+
+
+async def test_membership_update_invalidates_entry():
+    cache = ChatCache()
+    statuses = iter(["member", "kicked"])
+
+    async def loader():
+        return {"status": next(statuses)}
+
+    assert (await cache.member(-5, 7, loader))["status"] == "member"
+    cache.observe({"message": {"chat": {"id": -5}, "left_chat_member": {"id": 7}}})
+    assert (await cache.member(-5, 7, loader))["status"] == "kicked"
+
+
+async def test_empty_custom_cache_is_not_replaced():
+    cache = ChatCache(ttl=120, max_entries=10)
+    client = BaleClient("TEST:TOKEN", chat_cache=cache)
+    assert client.chat_cache is cache
+    assert BaleClient("TEST:TOKEN", chat_cache=None).chat_cache is None
+    assert isinstance(BaleClient("TEST:TOKEN").chat_cache, ChatCache)
+
+
+async def test_cached_not_member_error_is_raised_fresh():
+    cache = ChatCache()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        raise BaleAPIError("Bad Request: user not found", error_code=400)
+
+    errors = []
+    for _ in range(50):
+        with pytest.raises(BaleAPIError) as info:
+            await cache.member(-5, 7, loader)
+        errors.append(info.value)
+    assert calls == 1
+    assert errors[-1] is not errors[-2]
+    assert errors[-1].error_code == 400
+    depth = 0
+    tb = errors[-1].__traceback__
+    while tb is not None:
+        depth += 1
+        tb = tb.tb_next
+    assert depth < 10
@@ -0,0 +1,47 @@
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from baleh import FileId, InputFile, UploadBudget
+from baleh.testing import MockBaleServer
+
+
+def test_strings_are_classified_without_touching_disk():
+    assert InputFile("photo.jpg").kind == "path"
+    assert InputFile("uploads/report").kind == "path"
+    assert InputFile(Path("report")).kind == "path"
+    assert InputFile("AgACAgQAAxkBAAIB").kind == "file_id"
+    assert InputFile("https://example.com/a.jpg").kind == "file_id"
+    assert InputFile(FileId("odd/looking.id")).kind == "file_id"
+    assert InputFile(b"data").kind == "bytes"
+
+
+async def test_missing_path_raises_before_request(tmp_path):
+    async with MockBaleServer() as server:
+        client = server.client()
+        with pytest.raises(FileNotFoundError):
+            await client.send_document(1, str(tmp_path / "missing.pdf"))
+        await client.disconnect()
+    assert server.calls["sendDocument"] == 0
+
+
+async def test_path_is_streamed_within_memory_budget(tmp_path):
+    path = tmp_path / "big.bin"
+    path.write_bytes(os.urandom(300 * 1024))
+    budget = UploadBudget(64 * 1024)
+    peak = 0
+    size = 0
+    async for chunk in InputFile(str(path), chunk_size=16 * 1024).stream(budget):
+        peak = max(peak, budget.in_use)
+        size += len(chunk)
+    assert size == 300 * 1024
+    assert peak <= 16 * 1024
+    assert budget.in_use == 0
+
+    async with MockBaleServer() as server:
+        client = server.client(upload_memory_limit=32 * 1024, upload_chunk_size=8 * 1024)
+        await client.send_document(1, str(path))
+        await client.disconnect()
+    assert server.upload_bytes["document"] == 300 * 1024
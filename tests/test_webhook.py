@@ -0,0 +1,74 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from baleh import BaleClient
+from baleh.webhook import SECRET_HEADER
+
+from conftest import make_update
+
+
+async def _post(client: BaleClient, body, secret=None, headers=None):
+    app = client.webhook_server("/hook", secret=secret).build_app()
+    async with TestClient(TestServer(app)) as http:
+        responses = []
+        for item in body:
+            resp = await http.post("/hook", json=item, headers=headers)
+            responses.append(resp.status)
+        return responses
+
+
+async def test_duplicate_updates_are_dispatched_once():
+    client = BaleClient("TEST:TOKEN")
+    texts = []
+    client.on_message()(lambda message: texts.append(message.text))
+    update = make_update(10, text="once")
+    statuses = await _post(client, [update, update, make_update(11, text="twice")])
+    await client.dispatcher.join(1)
+    await client.disconnect()
+    assert statuses == [200, 200, 200]
+    assert texts == ["once", "twice"]
+
+
+async def test_secret_token_is_checked():
+    client = BaleClient("TEST:TOKEN")
+    texts = []
+    client.on_message()(lambda message: texts.append(message.text))
+    assert await _post(client, [make_update(1)], secret="s3cret") == [403]
+    assert await _post(client, [make_update(2)], secret="s3cret", headers={SECRET_HEADER: "s3cret"}) == [200]
+    await client.dispatcher.join(1)
+    await client.disconnect()
+    assert texts == ["hi"]
+
+
+async def test_invalid_body_is_rejected():
+    client = BaleClient("TEST:TOKEN")
+    assert await _post(client, [{"no_update_id": True}]) == [400]
+    await client.disconnect()
+
+
+async def test_update_rejected_while_stopping_is_accepted_on_redelivery():
+    client = BaleClient("TEST:TOKEN")
+    texts = []
+    release = asyncio.Event()
+
+    async def handler(message):
+        texts.append(message.text)
+        await release.wait()
+
+    client.on_message()(handler)
+    app = client.webhook_server("/hook").build_app()
+    async with TestClient(TestServer(app)) as http:
+        await http.post("/hook", json=make_update(1, text="first"))
+        await asyncio.sleep(0.01)
+        stopping = asyncio.ensure_future(client.dispatcher.stop(timeout=1))
+        await asyncio.sleep(0.01)
+        rejected = await http.post("/hook", json=make_update(2, text="retry"))
+        release.set()
+        await stopping
+        redelivered = await http.post("/hook", json=make_update(2, text="retry"))
+        await client.dispatcher.join(1)
+    await client.disconnect()
+    assert rejected.status == 500
+    assert redelivered.status == 200
+    assert texts == ["first", "retry"]